@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api_services'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registers signal receivers)
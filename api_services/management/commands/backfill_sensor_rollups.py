@@ -0,0 +1,49 @@
+from datetime import date, datetime, time, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from api_services.models import SensorData
+from api_services.services.sensor_rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-minute and per-hour sensor rollups from the raw readings, one day at a time. "
+        "Run it once after upgrading, and after editing or deleting readings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', default=None,
+                            help="First YYYY-MM-DD day to rebuild. Defaults to the day of the oldest reading.")
+        parser.add_argument('--until', default=None,
+                            help="Last YYYY-MM-DD day to rebuild. Defaults to the day of the newest reading.")
+        parser.add_argument('--box', default=None,
+                            help="Only rebuild this box id.")
+
+    def handle(self, *args, **options):
+        readings = SensorData.objects.all()
+        if options['box'] is not None:
+            readings = readings.filter(box_id=options['box'])
+        bounds = readings.aggregate(oldest=Min('received_at'), newest=Max('received_at'))
+        if bounds['oldest'] is None and not (options['since'] and options['until']):
+            self.stdout.write("No sensor readings to roll up.")
+            return
+
+        try:
+            since = date.fromisoformat(options['since']) if options['since'] else timezone.localdate(bounds['oldest'])
+            until = date.fromisoformat(options['until']) if options['until'] else timezone.localdate(bounds['newest'])
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+        if until < since:
+            raise CommandError("--until must not be before --since.")
+
+        totals = {}
+        day = since
+        while day <= until:
+            start = timezone.make_aware(datetime.combine(day, time.min))
+            written = rebuild_rollups(start, start + timedelta(days=1), box_id=options['box'])
+            for name, count in written.items():
+                totals[name] = totals.get(name, 0) + count
+            day += timedelta(days=1)
+        summary = ", ".join(f"{count} {name}" for name, count in totals.items())
+        self.stdout.write(f"Rebuilt sensor rollups from {since} to {until}: {summary} rows.")
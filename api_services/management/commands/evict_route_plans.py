@@ -0,0 +1,31 @@
+import os
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from api_services.services.route_plan_cache import evict_plans, plan_ttl
+from api_services.services.route_plan_jobs import purge_jobs
+
+
+class Command(BaseCommand):
+    help = "Delete cached route plans, and finished planning jobs, that are past their TTL or beyond the row limit."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-hours', type=float, default=None,
+            help="Delete plans older than this. Defaults to ROUTE_PLAN_CACHE_TTL.",
+        )
+        parser.add_argument(
+            '--max-rows', type=int, default=None,
+            help="Keep at most this many of the newest plans. Defaults to ROUTE_PLAN_CACHE_MAX_ROWS, or 10000.",
+        )
+
+    def handle(self, *args, **options):
+        max_age = plan_ttl()
+        if options['max_age_hours'] is not None:
+            max_age = timedelta(hours=options['max_age_hours'])
+        max_rows = options['max_rows']
+        if max_rows is None:
+            max_rows = int(os.getenv('ROUTE_PLAN_CACHE_MAX_ROWS', 10000))
+
+        deleted = evict_plans(max_age=max_age, max_rows=max_rows)
+        purged = purge_jobs(max_age)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} cached route plans and {purged} finished jobs."))
@@ -0,0 +1,136 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from api_services.models import CustomersData, OrdersData, OriginData, RiderHistoryData, RoutePlanJob
+from api_services.services.distance_providers import distance_matrix_with_fallback
+from api_services.services.route_planner_service import plan_cache_key, plan_routes
+from api_services.services.route_plan_cache import get_plan
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute route plans for upcoming delivery dates so the first plans of the day are cache hits. "
+        "Rider combinations come from recent planning jobs and from the least-used riders in RiderHistoryData."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=1,
+                            help="Warm dates from tomorrow up to this many days ahead (default 1).")
+        parser.add_argument('--date', action='append', default=[],
+                            help="Warm this YYYY-MM-DD date instead; may be repeated.")
+        parser.add_argument('--num-riders', type=int, action='append', default=[],
+                            help="Rider counts to plan for; may be repeated. "
+                                 "Defaults to the counts used by recent planning jobs.")
+        parser.add_argument('--lookback-days', type=int, default=14,
+                            help="How far back to look for planning jobs to repeat (default 14).")
+        parser.add_argument('--max-plans', type=int, default=10,
+                            help="Most plans per date (default 10).")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Plans computed at once. Defaults to PLAN_WARMUP_WORKERS, or 2.")
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or int(os.getenv('PLAN_WARMUP_WORKERS', 2))
+        dates = options['date'] or self._upcoming_dates(options['days'])
+        if not dates:
+            self.stdout.write("No upcoming delivery dates with orders.")
+            return
+
+        requests = self._likely_requests(options['num_riders'], options['lookback_days'], options['max_plans'])
+        if not requests:
+            raise CommandError("No rider combinations to plan for; add riders or pass --num-riders.")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for delivery_date in dates:
+                started = time.monotonic()
+                distance_seconds = self._warm_distances(delivery_date)
+                outcomes = list(executor.map(lambda request: self._plan(delivery_date, request), requests))
+                counts = {outcome: outcomes.count(outcome) for outcome in set(outcomes)}
+                summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+                self.stdout.write(
+                    f"{delivery_date}: {len(outcomes)} plans ({summary}) in {time.monotonic() - started:.1f}s "
+                    f"(distances {distance_seconds:.1f}s)"
+                )
+
+    def _upcoming_dates(self, days):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        return [
+            delivery_date.isoformat()
+            for delivery_date in OrdersData.objects.filter(
+                delivery_date__range=(tomorrow, tomorrow + timedelta(days=max(days, 1) - 1)),
+            ).order_by('delivery_date').values_list('delivery_date', flat=True).distinct()
+        ]
+
+    def _likely_requests(self, counts, lookback_days, max_plans):
+        """
+        Planning requests worth warming, most likely first: the rider sets and
+        options of recent jobs, then the least-used riders for each rider count.
+        """
+        requests = []
+        seen = set()
+
+        def add(rider_names, routing_engine="cluster", clustering_method="kmeans", balance_clusters=False):
+            key = (tuple(sorted(rider_names)), routing_engine, clustering_method, balance_clusters)
+            if key not in seen and len(requests) < max_plans:
+                seen.add(key)
+                requests.append({
+                    "rider_names": list(key[0]),
+                    "routing_engine": routing_engine,
+                    "clustering_method": clustering_method,
+                    "balance_clusters": balance_clusters,
+                })
+
+        recent = RoutePlanJob.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=lookback_days),
+        ).order_by('-created_at').values_list('parameters', flat=True)
+        for parameters in recent.iterator():
+            if counts and len(parameters["rider_names"]) not in counts:
+                continue
+            add(parameters["rider_names"], parameters.get("routing_engine", "cluster"),
+                parameters.get("clustering_method", "kmeans"), parameters.get("balance_clusters", False))
+
+        # plan_routes hands the longest routes to the least-used riders, so those are picked first
+        riders = list(RiderHistoryData.objects.order_by('total_distance', 'id').values_list('rider_name', flat=True))
+        for count in counts or sorted({len(request["rider_names"]) for request in requests}):
+            if 0 < count <= len(riders):
+                add(riders[:count])
+        return requests
+
+    def _warm_distances(self, delivery_date):
+        """
+        Fill the road-distance cache for every stop on the date in one go, so
+        the plans computed in parallel afterwards all read it instead of OSRM.
+        """
+        started = time.monotonic()
+        origin = OriginData.objects.first()
+        orders = OrdersData.objects.filter(delivery_date=delivery_date)
+        locations = set(orders.filter(customer__lat__isnull=False).values_list('customer__lat', 'customer__lng'))
+        # Orders without a customer link are matched by name, as the planner does
+        unlinked_names = orders.filter(customer__isnull=True).values_list('customer_name', flat=True)
+        locations.update(
+            CustomersData.objects.filter(name__in=unlinked_names, lat__isnull=False).values_list('lat', 'lng')
+        )
+        if origin is not None and origin.lat is not None:
+            try:
+                distance_matrix_with_fallback([[origin.lat, origin.lng]] + [list(location) for location in sorted(locations)])
+            except (ValueError, RuntimeError) as e:
+                self.stderr.write(f"{delivery_date}: could not warm distances: {e}")
+        return time.monotonic() - started
+
+    def _plan(self, delivery_date, request):
+        close_old_connections()
+        try:
+            cache_key = plan_cache_key(delivery_date, request["rider_names"], request["routing_engine"],
+                                       request["clustering_method"], request["balance_clusters"])
+            if get_plan(delivery_date, cache_key) is not None:
+                return "cached"
+            plan_routes(len(request["rider_names"]), delivery_date, **request)
+            return "planned"
+        except (ValueError, TimeoutError, RuntimeError) as e:
+            self.stderr.write(f"{delivery_date} {request['rider_names']}: {e}")
+            return "failed"
+        finally:
+            close_old_connections()
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0010_routeplancache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoadDistance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_coordinate', models.CharField(max_length=32)),
+                ('to_coordinate', models.CharField(max_length=32)),
+                ('profile', models.CharField(default='cycling', max_length=20)),
+                ('distance', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('profile', 'from_coordinate', 'to_coordinate'), name='unique_road_distance')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0011_roaddistance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClusterSeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin_latlng', models.CharField(max_length=100)),
+                ('weekday', models.PositiveSmallIntegerField()),
+                ('n_clusters', models.PositiveSmallIntegerField()),
+                ('centroids', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('origin_latlng', 'weekday', 'n_clusters'), name='unique_cluster_seed')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_orders_to_customers(apps, schema_editor):
+    """
+    Point every existing order at the customer with the same name (the oldest one if names repeat).
+    """
+    CustomersData = apps.get_model('api_services', 'CustomersData')
+    OrdersData = apps.get_model('api_services', 'OrdersData')
+    customer_ids = {}
+    for customer_id, name in CustomersData.objects.order_by('id').values_list('id', 'name'):
+        customer_ids.setdefault(name, customer_id)
+    orders = list(OrdersData.objects.filter(customer__isnull=True).only('id', 'customer_name'))
+    for order in orders:
+        order.customer_id = customer_ids.get(order.customer_name)
+    OrdersData.objects.bulk_update([order for order in orders if order.customer_id], ['customer'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0012_clusterseed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordersdata',
+            name='customer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='api_services.customersdata'),
+        ),
+        migrations.AlterField(
+            model_name='customersdata',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.RunPython(link_orders_to_customers, migrations.RunPython.noop),
+    ]
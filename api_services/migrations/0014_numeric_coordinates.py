@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+def _split(value):
+    try:
+        lat, lng = (float(part.strip()) for part in value.split(","))
+    except (AttributeError, ValueError):
+        return None, None
+    return lat, lng
+
+
+def fill_numeric_coordinates(apps, schema_editor):
+    """
+    Parse the existing "lat,lng" strings into the new float columns.
+    """
+    for model_name, source_field in (('CustomersData', 'coordinate'), ('OriginData', 'latlng')):
+        model = apps.get_model('api_services', model_name)
+        rows = list(model.objects.exclude(**{f'{source_field}__isnull': True}).only('id', source_field))
+        for row in rows:
+            row.lat, row.lng = _split(getattr(row, source_field))
+        model.objects.bulk_update(rows, ['lat', 'lng'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0013_ordersdata_customer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customersdata',
+            name='lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='customersdata',
+            name='lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='origindata',
+            name='lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='origindata',
+            name='lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customersdata',
+            index=models.Index(fields=['lat', 'lng'], name='customer_latlng_idx'),
+        ),
+        migrations.RunPython(fill_numeric_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:08
+
+from django.db import migrations, models
+
+
+def drop_duplicate_plans(apps, schema_editor):
+    """
+    Keep only the newest cached plan per (delivery_date, rider_names_hash) so the key can be made unique.
+    """
+    RoutePlanCache = apps.get_model('api_services', 'RoutePlanCache')
+    seen = set()
+    duplicates = []
+    rows = RoutePlanCache.objects.order_by('-created_at', '-id').values_list('id', 'delivery_date', 'rider_names_hash')
+    for plan_id, delivery_date, key in rows.iterator():
+        if (delivery_date, key) in seen:
+            duplicates.append(plan_id)
+        else:
+            seen.add((delivery_date, key))
+    for start in range(0, len(duplicates), 1000):
+        RoutePlanCache.objects.filter(id__in=duplicates[start:start + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0014_numeric_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrdersVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delivery_date', models.DateField(unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='routeplancache',
+            index=models.Index(fields=['created_at'], name='route_plan_created_idx'),
+        ),
+        migrations.RunPython(drop_duplicate_plans, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='routeplancache',
+            constraint=models.UniqueConstraint(fields=('delivery_date', 'rider_names_hash'), name='unique_route_plan'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0016_routeplanjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routeplancache',
+            name='plan_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='routeplancache',
+            name='route_orders',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='routeplancache',
+            index=models.Index(fields=['plan_key', 'created_at'], name='route_plan_key_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:16
+
+import gzip
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def render_existing_plans(apps, schema_editor):
+    """
+    Store every cached plan as gzip-compressed JSON; the compact format is rendered on first use.
+    """
+    RoutePlanCache = apps.get_model('api_services', 'RoutePlanCache')
+    for plan in RoutePlanCache.objects.only('id', 'result_json').iterator():
+        body = json.dumps(plan.result_json, separators=(',', ':')).encode()
+        plan.etag = hashlib.sha256(body).hexdigest()
+        plan.plan_gzip = gzip.compress(body)
+        plan.save(update_fields=['etag', 'plan_gzip'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0017_routeplancache_plan_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routeplancache',
+            name='compact_etag',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='routeplancache',
+            name='compact_gzip',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='routeplancache',
+            name='etag',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='routeplancache',
+            name='plan_gzip',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(render_existing_plans, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='routeplancache',
+            name='result_json',
+        ),
+    ]
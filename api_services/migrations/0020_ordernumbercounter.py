@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:21
+
+import re
+from datetime import date
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    """
+    Start each day's counter after the highest order number already issued that day.
+    """
+    OrdersData = apps.get_model('api_services', 'OrdersData')
+    OrderNumberCounter = apps.get_model('api_services', 'OrderNumberCounter')
+    last_numbers = {}
+    for order_number in OrdersData.objects.filter(order_number__startswith='ORD').values_list('order_number', flat=True).iterator():
+        match = re.fullmatch(r'ORD(\d{4})(\d{2})(\d{2})-(\d+)', order_number)
+        if match is None:
+            continue
+        try:
+            day = date(*(int(part) for part in match.groups()[:3]))
+        except ValueError:
+            continue
+        last_numbers[day] = max(last_numbers.get(day, 0), int(match.group(4)))
+    OrderNumberCounter.objects.bulk_create(
+        OrderNumberCounter(day=day, last_number=last_number) for day, last_number in last_numbers.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0019_geocodecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+def mark_resolved(apps, schema_editor):
+    """
+    Customers that already have coordinates are resolved; the rest stay pending and are geocoded when next needed.
+    """
+    CustomersData = apps.get_model('api_services', 'CustomersData')
+    CustomersData.objects.filter(lat__isnull=False).update(geocode_status='resolved')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0020_ordernumbercounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customersdata',
+            name='geocode_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('resolved', 'Resolved'), ('failed', 'Failed')], default='pending', editable=False, max_length=10),
+        ),
+        migrations.RunPython(mark_resolved, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_services', '0022_sensor_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='routeplanjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=10),
+        ),
+    ]
@@ -3,4 +3,11 @@ from .orders_data import OrdersData
 from .customers_data import CustomersData
 from .origin_data import OriginData
 from .rider_history_data import RiderHistoryData
-from .route_plan_cache import RoutePlanCache
\ No newline at end of file
+from .route_plan_cache import RoutePlanCache
+from .road_distance import RoadDistance
+from .cluster_seed import ClusterSeed
+from .orders_version import OrdersVersion
+from .route_plan_job import RoutePlanJob
+from .geocode_cache import GeocodeCache
+from .order_number_counter import OrderNumberCounter
+from .sensor_rollup import SensorMinuteRollup, SensorHourRollup
\ No newline at end of file
@@ -0,0 +1,16 @@
+from django.db import models
+
+class ClusterSeed(models.Model):
+    origin_latlng = models.CharField(max_length=100)  # origin the clusters were planned from
+    weekday = models.PositiveSmallIntegerField()  # delivery_date.weekday() of the plan (0 = Monday)
+    n_clusters = models.PositiveSmallIntegerField()
+    centroids = models.JSONField()  # [[lat, lng], ...] from the latest plan
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['origin_latlng', 'weekday', 'n_clusters'], name='unique_cluster_seed'),
+        ]
+
+    def __str__(self):
+        return f"{self.origin_latlng} / weekday {self.weekday} / {self.n_clusters} clusters"
@@ -1,8 +1,34 @@
 from django.db import models
+from ..utils.coordinates import sync_latlng_fields
 
 class CustomersData(models.Model):
-    name = models.CharField(max_length=255)
+    PENDING = 'pending'
+    RESOLVED = 'resolved'
+    FAILED = 'failed'
+    GEOCODE_STATUS_CHOICES = [(PENDING, 'Pending'), (RESOLVED, 'Resolved'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=255, db_index=True)
     address = models.TextField()
     coordinate = models.CharField(max_length=100, blank=True, null=True)
+    lat = models.FloatField(null=True, blank=True, editable=False)  # parsed from coordinate on save
+    lng = models.FloatField(null=True, blank=True, editable=False)
+    # pending until the geocoding queue resolves the address or gives up on it
+    geocode_status = models.CharField(max_length=10, choices=GEOCODE_STATUS_CHOICES, default=PENDING, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lat', 'lng'], name='customer_latlng_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = sync_latlng_fields(self, 'coordinate', kwargs.get('update_fields'))
+        if self.lat is not None:
+            # Coordinates entered by hand count as resolved too
+            self.geocode_status = self.RESOLVED
+            if update_fields is not None and 'coordinate' in update_fields:
+                update_fields = set(update_fields) | {'geocode_status'}
+        kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
@@ -0,0 +1,12 @@
+from django.db import models
+
+class GeocodeCache(models.Model):
+    address_key = models.CharField(max_length=64, unique=True)  # sha256 of the normalized address
+    normalized_address = models.TextField()
+    lat = models.FloatField(null=True, blank=True)  # null together with lng: Google found nothing
+    lng = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.normalized_address} -> {self.lat},{self.lng}"
@@ -0,0 +1,8 @@
+from django.db import models
+
+class OrderNumberCounter(models.Model):
+    day = models.DateField(unique=True)
+    last_number = models.PositiveIntegerField(default=0)  # NNNN of the last ORD{day}-NNNN handed out
+
+    def __str__(self):
+        return f"{self.day} - {self.last_number}"
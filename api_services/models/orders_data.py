@@ -1,21 +1,47 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from datetime import datetime
 from django.utils.timezone import localtime, now
+from ..utils.transactions import write_transaction
+from .customers_data import CustomersData
+from .order_number_counter import OrderNumberCounter
+
+def reserve_order_numbers(count):
+    """
+    Reserve the next 'count' order numbers of today, in the ORD{YYYYMMDD}-NNNN format.
+
+    The day's OrderNumberCounter row is locked with select_for_update() and
+    advanced in the same transaction, so concurrent writers and bulk imports
+    never get the same number. SQLite ignores FOR UPDATE; there the transaction
+    holds the database write lock from its start instead (see write_transaction).
+
+    Returns:
+        list: The reserved order numbers, in increasing order.
+    """
+    today = localtime(now()).date()
+    with write_transaction():
+        counter = OrderNumberCounter.objects.select_for_update().filter(day=today).first()
+        if counter is None:
+            try:
+                with transaction.atomic():
+                    counter = OrderNumberCounter.objects.create(day=today, last_number=0)
+            except IntegrityError:
+                # Another writer created today's counter first
+                counter = OrderNumberCounter.objects.select_for_update().get(day=today)
+        counter.last_number += count
+        counter.save(update_fields=['last_number'])
+    prefix = f"ORD{today:%Y%m%d}"
+    return [f'{prefix}-{number:04d}' for number in range(counter.last_number - count + 1, counter.last_number + 1)]
+
 class OrdersData(models.Model):
     order_number = models.CharField(max_length=20,unique=True,blank=True)
+    customer = models.ForeignKey(CustomersData, on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
     customer_name = models.CharField(max_length=255)
     address = models.CharField(max_length=255)
     product = models.CharField(max_length=255)
     delivery_date = models.DateField(null=True,blank=True)
     def save(self, *args, **kwargs):
         if not self.order_number :
-            today = localtime(now()).strftime('%Y%m%d')
-            last_order = OrdersData.objects.filter(order_number__startswith=f"ORD{today}").order_by('id').last()
-            if last_order:
-                last_number = int(last_order.order_number.split("-")[-1])
-                self.order_number = f'ORD{today}-{last_number + 1:04d}'
-            else:
-                self.order_number =f'ORD{today}-0001'
+            self.order_number = reserve_order_numbers(1)[0]
         super().save(*args, **kwargs)
     def __str__(self):
         return f"Order for {self.customer_name} , {self.product}"
\ No newline at end of file
@@ -0,0 +1,9 @@
+from django.db import models
+
+class OrdersVersion(models.Model):
+    delivery_date = models.DateField(unique=True)
+    version = models.PositiveBigIntegerField(default=0)  # bumped whenever an order for this date changes
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.delivery_date} - v{self.version}"
@@ -1,14 +1,18 @@
 from django.db import models
 from django.core.exceptions import ValidationError
+from ..utils.coordinates import sync_latlng_fields
 
 class OriginData(models.Model):
     name = models.CharField(max_length=255)
     address = models.CharField(max_length=255)
     latlng = models.CharField(max_length=100, blank=True, null=True)
+    lat = models.FloatField(null=True, blank=True, editable=False)  # parsed from latlng on save
+    lng = models.FloatField(null=True, blank=True, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.pk and OriginData.objects.exists():
             raise ValidationError("Accept only one Origin")
+        kwargs['update_fields'] = sync_latlng_fields(self, 'latlng', kwargs.get('update_fields'))
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -0,0 +1,17 @@
+from django.db import models
+
+class RoadDistance(models.Model):
+    from_coordinate = models.CharField(max_length=32)  # "lat,lng" rounded to 6 decimals
+    to_coordinate = models.CharField(max_length=32)
+    profile = models.CharField(max_length=20, default='cycling')  # OSRM routing profile
+    distance = models.FloatField()  # meters
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # The unique constraint doubles as the composite lookup index
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'from_coordinate', 'to_coordinate'], name='unique_road_distance'),
+        ]
+
+    def __str__(self):
+        return f"{self.from_coordinate} -> {self.to_coordinate} ({self.profile}): {self.distance} meters"
@@ -3,8 +3,23 @@ from django.db import models
 class RoutePlanCache(models.Model):
     delivery_date = models.DateField()
     rider_names_hash = models.CharField(max_length=256)  # เก็บค่า hash ที่สร้างจาก delivery_date, rider_names และ orders
-    result_json = models.JSONField()  # เก็บผลลัพธ์การคำนวณในรูปแบบ JSON
+    etag = models.CharField(max_length=64, default='')  # sha256 of the uncompressed JSON
+    plan_gzip = models.BinaryField(default=b'')  # the plan, rendered to JSON and gzip-compressed
+    compact_etag = models.CharField(max_length=64, blank=True, default='')
+    compact_gzip = models.BinaryField(null=True, blank=True)  # same plan in the compact format
+    plan_key = models.CharField(max_length=64, blank=True, default='')  # same hash without the orders version
+    route_orders = models.JSONField(null=True, blank=True)  # order ids of each route in the plan, in visiting order
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # The unique constraint doubles as the lookup index
+        constraints = [
+            models.UniqueConstraint(fields=['delivery_date', 'rider_names_hash'], name='unique_route_plan'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='route_plan_created_idx'),
+            models.Index(fields=['plan_key', 'created_at'], name='route_plan_key_idx'),
+        ]
+
     def __str__(self):
         return f"{self.delivery_date} - {self.rider_names_hash}"
@@ -0,0 +1,41 @@
+import uuid
+from django.db import models
+from django.db.models import Q
+
+class RoutePlanJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed'), (CANCELLED, 'Cancelled'),
+    ]
+    ACTIVE_STATUSES = (PENDING, RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    cache_key = models.CharField(max_length=256)  # same key the plan is cached under
+    delivery_date = models.DateField()
+    parameters = models.JSONField()  # keyword arguments for plan_routes
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    result_json = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    error_status = models.PositiveSmallIntegerField(null=True, blank=True)  # HTTP status the error maps to
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # At most one computation in flight per plan; identical requests join it
+            models.UniqueConstraint(
+                fields=['cache_key'],
+                condition=Q(status__in=['pending', 'running']),
+                name='unique_active_route_plan_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['cache_key', 'status'], name='route_plan_job_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.delivery_date} - {self.status} ({self.id})"
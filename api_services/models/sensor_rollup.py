@@ -0,0 +1,33 @@
+from django.db import models
+
+class SensorRollup(models.Model):
+    box_id = models.CharField(max_length=50, blank=True, default='')
+    bucket = models.DateTimeField()  # start of the minute or hour, in UTC
+    count = models.PositiveIntegerField(default=0)  # readings in the bucket
+    # mean = sum / count; the counts leave out readings without the value
+    temperature_count = models.PositiveIntegerField(default=0)
+    temperature_sum = models.FloatField(default=0)
+    temperature_min = models.FloatField(null=True, blank=True)
+    temperature_max = models.FloatField(null=True, blank=True)
+    humidity_count = models.PositiveIntegerField(default=0)
+    humidity_sum = models.FloatField(default=0)
+    humidity_min = models.FloatField(null=True, blank=True)
+    humidity_max = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.box_id or '-'} {self.bucket} ({self.count} readings)"
+
+class SensorMinuteRollup(SensorRollup):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['box_id', 'bucket'], name='unique_sensor_minute_rollup'),
+        ]
+
+class SensorHourRollup(SensorRollup):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['box_id', 'bucket'], name='unique_sensor_hour_rollup'),
+        ]
@@ -3,6 +3,7 @@ from datetime import datetime
 from django.utils.timezone import localtime, now
 
 class SensorData(models.Model):
+    box_id = models.CharField(max_length=50, blank=True, default='')  # cold box that sent the reading
     sensor_type = models.CharField(max_length=50)  # ประเภทเซ็นเซอร์
     temperature = models.FloatField(null=True, blank=True)  # อุณหภูมิ
     humidity = models.FloatField(null=True, blank=True)  # ความชื้น
@@ -12,5 +13,10 @@ class SensorData(models.Model):
     box_status = models.CharField(max_length=50, null=True, blank=True)  # สถานะของกล่อง
     received_at = models.DateTimeField(default=now)  # เวลาที่รับข้อมูล
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['box_id', 'received_at'], name='sensor_box_time_idx'),
+        ]
+
     def __str__(self):
         return f"{self.sensor_type} - Temp: {self.temperature}°C, Humidity: {self.humidity}%"
\ No newline at end of file
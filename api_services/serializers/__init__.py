@@ -1,5 +1,5 @@
-from .orders_data_serializer import OrdersDataSerializer
+from .orders_data_serializer import OrdersDataSerializer, OrderImportRowSerializer
 from .customers_data_serializer import CustomerDataSerializer
-from .sensors_data_serializer import SensorDataSerializer
+from .sensors_data_serializer import SensorDataSerializer, SensorSeriesSerializer
 from .origin_data_serializer import OriginDataSerializer
 from .rider_history_data_serializer import RiderHistoryDataSerializer
\ No newline at end of file
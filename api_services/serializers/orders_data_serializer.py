@@ -4,4 +4,10 @@ from ..models.orders_data import OrdersData
 class OrdersDataSerializer(serializers.ModelSerializer):
     class Meta :
         model = OrdersData
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class OrderImportRowSerializer(serializers.Serializer):
+    customer_name = serializers.CharField(max_length=255)
+    address = serializers.CharField(max_length=255)
+    product = serializers.CharField(max_length=255)
+    delivery_date = serializers.DateField(required=False, allow_null=True)
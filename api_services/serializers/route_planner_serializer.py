@@ -1,9 +1,56 @@
 from rest_framework import serializers
 class RoutePlannerSerializer(serializers.Serializer):
-    num_riders = serializers.IntegerField(min_value=1, max_value=5)
+    num_riders = serializers.IntegerField(min_value=1, max_value=50)
     delivery_date = serializers.DateField()
     rider_names = serializers.ListField(
         child=serializers.CharField(max_length=100),
         min_length=1,
         help_text="List of rider names (must match num_riders)"
-    )
\ No newline at end of file
+    )
+    routing_engine = serializers.ChoiceField(
+        choices=["cluster", "vrp"],
+        default="cluster",
+        help_text="cluster clusters customers then solves one TSP per rider; vrp builds all routes jointly"
+    )
+    clustering_method = serializers.ChoiceField(
+        choices=["kmeans", "kmedoids"],
+        default="kmeans",
+        help_text="Cluster engine only: kmeans groups by straight-line position; kmedoids groups by road distance"
+    )
+    balance_clusters = serializers.BooleanField(
+        default=False,
+        help_text="Cap cluster sizes (kmedoids only) so every route stays within the exact solver's range"
+    )
+    force_full_replan = serializers.BooleanField(
+        default=False,
+        help_text="Plan from scratch instead of reusing the cached or previous plan for these riders"
+    )
+    response_format = serializers.ChoiceField(
+        choices=["full", "compact"],
+        default="full",
+        help_text="compact lists each coordinate once and refers to it by index, with route polylines"
+    )
+
+class FleetSweepSerializer(serializers.Serializer):
+    delivery_date = serializers.DateField()
+    rider_names = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        min_length=1,
+        help_text="Riders available; a fleet of k riders uses the k least-used of them"
+    )
+    min_riders = serializers.IntegerField(min_value=1, max_value=50)
+    max_riders = serializers.IntegerField(min_value=1, max_value=50)
+    chosen_num_riders = serializers.IntegerField(
+        min_value=1, max_value=50, required=False,
+        help_text="Fleet size whose full plan is returned; defaults to the shortest total distance"
+    )
+    routing_engine = serializers.ChoiceField(choices=["cluster", "vrp"], default="cluster")
+    clustering_method = serializers.ChoiceField(choices=["kmeans", "kmedoids"], default="kmeans")
+    balance_clusters = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data["min_riders"] > data["max_riders"]:
+            raise serializers.ValidationError("min_riders cannot exceed max_riders.")
+        if data["max_riders"] > len(set(data["rider_names"])):
+            raise serializers.ValidationError("max_riders cannot exceed the number of rider names.")
+        return data
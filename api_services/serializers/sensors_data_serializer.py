@@ -5,3 +5,16 @@ class SensorDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = SensorData
         fields = '__all__' 
+
+
+class SensorSeriesSerializer(serializers.Serializer):
+    box_id = serializers.CharField(max_length=50, required=False, allow_blank=True, default='',
+                                   help_text="Box to chart; leave empty for readings sent without a box id")
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    max_points = serializers.IntegerField(min_value=1, max_value=10000, default=500)
+
+    def validate(self, data):
+        if data['end'] <= data['start']:
+            raise serializers.ValidationError("end must be after start.")
+        return data
@@ -1,10 +1,12 @@
 from ..models import CustomersData
-from ..utils import address_to_coordinate
+from .geocode_queue import enqueue_geocode
 
 def get_or_create_customer(customer_name, address):
     """
     Get or create a customer by name and address.
-    If the customer is created or doesn't have coordinates, update the coordinate using address_to_coordinate.
+    If the customer is created or doesn't have coordinates, queue its address
+    for the background geocoder instead of waiting for Google; the customer's
+    geocode_status stays pending until then.
     Returns:
         CustomersData instance.
     """
@@ -13,8 +15,5 @@ def get_or_create_customer(customer_name, address):
         defaults={'address': address, 'coordinate': None}
     )
     if created or not customer.coordinate:
-        lat, lng = address_to_coordinate(address)
-        if lat and lng:
-            customer.coordinate = f"{lat},{lng}"
-            customer.save()
+        enqueue_geocode(customer.id)
     return customer
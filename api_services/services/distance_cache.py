@@ -0,0 +1,118 @@
+import logging
+import os
+import numpy as np
+from django.db.models import Q
+from ..models import RoadDistance
+from ..utils import traveling_salesman_problem
+from ..utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# In-process front of the RoadDistance table, keyed by (profile, from_key, to_key)
+_memory_cache = LRUCache(maxsize=int(os.getenv('DISTANCE_CACHE_SIZE', 200000)))
+
+
+def coordinate_key(latlng):
+    """
+    Normalize a [lat, lng] pair (or a "lat,lng" string) into the key stored in RoadDistance.
+    """
+    if isinstance(latlng, str):
+        latlng = latlng.split(",")
+    return f"{float(latlng[0]):.6f},{float(latlng[1]):.6f}"
+
+
+def get_distance_matrix(locations, profile='cycling', timeout=10):
+    """
+    Build the road-distance matrix for locations, asking OSRM only for pairs
+    that are neither in the in-process cache nor in the RoadDistance table.
+
+    Parameters:
+        locations (list): A list of coordinate pairs (each as [lat, lon]).
+        profile (str, optional): OSRM routing profile. Default is 'cycling'.
+        timeout (int, optional): Timeout for the OSRM request in seconds. Default is 10 seconds.
+
+    Returns:
+        np.ndarray: An n x n matrix where entry [i][j] is the distance in meters from locations[i] to locations[j].
+
+    Raises:
+        ValueError: If the locations are invalid.
+        RuntimeError: If fetching the missing distances from OSRM fails.
+    """
+    try:
+        keys = [coordinate_key(location) for location in locations]
+    except (TypeError, ValueError, IndexError) as e:
+        logger.error("Invalid coordinate values in locations: %s", locations)
+        raise ValueError("Invalid coordinate values") from e
+
+    # Customers sharing a coordinate share one row/column
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    unique_keys = unique_keys.tolist()
+    n = len(unique_keys)
+    matrix = np.full((n, n), np.nan)
+    np.fill_diagonal(matrix, 0.0)
+
+    # 1. In-process cache
+    for i, from_key in enumerate(unique_keys):
+        for j, to_key in enumerate(unique_keys):
+            if i != j:
+                distance = _memory_cache.get((profile, from_key, to_key))
+                if distance is not None:
+                    matrix[i, j] = distance
+
+    # 2. Database
+    missing_rows, missing_cols = np.nonzero(np.isnan(matrix))
+    if len(missing_rows):
+        index = {key: i for i, key in enumerate(unique_keys)}
+        stored = RoadDistance.objects.filter(
+            profile=profile,
+            from_coordinate__in={unique_keys[i] for i in missing_rows},
+            to_coordinate__in={unique_keys[j] for j in missing_cols},
+        ).values_list('from_coordinate', 'to_coordinate', 'distance')
+        for from_key, to_key, distance in stored:
+            matrix[index[from_key], index[to_key]] = distance
+            _memory_cache.set((profile, from_key, to_key), distance)
+
+    # 3. OSRM, restricted to the sources and destinations that still have gaps
+    missing = np.isnan(matrix)
+    if missing.any():
+        sources = np.nonzero(missing.any(axis=1))[0].tolist()
+        destinations = np.nonzero(missing.any(axis=0))[0].tolist()
+        logger.info("Fetching %d x %d distances from OSRM.", len(sources), len(destinations))
+        fetched = traveling_salesman_problem.fetch_distance_matrix_tiled(
+            [unique_keys[i].split(",") for i in range(n)],
+            timeout=timeout,
+            sources=sources,
+            destinations=destinations,
+            profile=profile,
+        )
+        new_rows = []
+        for a, i in enumerate(sources):
+            for b, j in enumerate(destinations):
+                if missing[i, j]:
+                    distance = float(fetched[a, b])
+                    matrix[i, j] = distance
+                    _memory_cache.set((profile, unique_keys[i], unique_keys[j]), distance)
+                    new_rows.append(RoadDistance(
+                        from_coordinate=unique_keys[i],
+                        to_coordinate=unique_keys[j],
+                        profile=profile,
+                        distance=distance,
+                    ))
+        RoadDistance.objects.bulk_create(new_rows, batch_size=1000, ignore_conflicts=True)
+
+    return matrix[np.ix_(inverse, inverse)]
+
+
+def invalidate_coordinate(coordinate):
+    """
+    Drop every cached distance that starts or ends at the given coordinate.
+
+    Parameters:
+        coordinate (str or list): The coordinate as "lat,lng" or [lat, lng].
+    """
+    try:
+        key = coordinate_key(coordinate)
+    except (TypeError, ValueError, IndexError):
+        return
+    RoadDistance.objects.filter(Q(from_coordinate=key) | Q(to_coordinate=key)).delete()
+    _memory_cache.discard_where(lambda cached: key in (cached[1], cached[2]))
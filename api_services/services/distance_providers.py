@@ -0,0 +1,146 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import numpy as np
+from django.db import close_old_connections
+from ..models import RoadDistance
+from ..utils import traveling_salesman_problem
+from ..utils.haversine import haversine_matrix
+from .distance_cache import get_distance_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class DistanceProvider:
+    """
+    Source of road-distance matrices for the route planner.
+
+    Subclasses implement matrix(); approximate providers produce estimates that
+    must not be treated as authoritative (e.g. stored in RoutePlanCache).
+    """
+    name = None
+    approximate = False
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+
+    def matrix(self, locations):
+        """
+        Parameters:
+            locations (list): A list of coordinate pairs (each as [lat, lon]).
+
+        Returns:
+            np.ndarray: An n x n matrix of distances in meters.
+        """
+        raise NotImplementedError
+
+
+class OSRMDistanceProvider(DistanceProvider):
+    """Distances fetched directly from OSRM on every call."""
+    name = 'osrm'
+
+    def matrix(self, locations):
+        return traveling_salesman_problem.fetch_distance_matrix_tiled(locations, timeout=self.timeout)
+
+
+class CachedDistanceProvider(DistanceProvider):
+    """OSRM distances read through the RoadDistance table and its in-process cache."""
+    name = 'cache'
+
+    def matrix(self, locations):
+        return get_distance_matrix(locations, timeout=self.timeout)
+
+
+class HaversineDistanceProvider(DistanceProvider):
+    """
+    Offline estimate: great-circle distance scaled by a road factor.
+
+    The factor is calibrated once per process as the median road/great-circle
+    ratio of recently cached OSRM distances, falling back to DISTANCE_ROAD_FACTOR.
+    """
+    name = 'haversine'
+    approximate = True
+    _calibrated_factor = None
+    _calibration_lock = threading.Lock()
+
+    def __init__(self, timeout=10, road_factor=None):
+        super().__init__(timeout)
+        self.road_factor = road_factor
+
+    @classmethod
+    def calibrate(cls, sample_size=1000):
+        with cls._calibration_lock:
+            if cls._calibrated_factor is None:
+                default = float(os.getenv('DISTANCE_ROAD_FACTOR', 1.3))
+                rows = list(
+                    RoadDistance.objects.filter(distance__gt=0)
+                    .order_by('-id')
+                    .values_list('from_coordinate', 'to_coordinate', 'distance')[:sample_size]
+                )
+                ratios = []
+                if rows:
+                    origins = [row[0].split(",") for row in rows]
+                    targets = [row[1].split(",") for row in rows]
+                    straight = haversine_matrix(origins, targets).diagonal()
+                    road = np.array([row[2] for row in rows])
+                    # Very short hops are dominated by snapping to the road network
+                    usable = straight > 100
+                    ratios = road[usable] / straight[usable]
+                cls._calibrated_factor = float(np.median(ratios)) if len(ratios) else default
+            return cls._calibrated_factor
+
+    def matrix(self, locations):
+        factor = self.road_factor if self.road_factor is not None else self.calibrate()
+        return haversine_matrix(locations) * factor
+
+
+PROVIDERS = {
+    provider.name: provider
+    for provider in (OSRMDistanceProvider, CachedDistanceProvider, HaversineDistanceProvider)
+}
+
+# Threads that run the primary provider so its latency can be bounded
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('DISTANCE_PROVIDER_WORKERS', 4)))
+
+
+def _run_provider(provider, locations):
+    try:
+        return provider.matrix(locations)
+    finally:
+        close_old_connections()
+
+
+def distance_matrix_with_fallback(locations, primary=None, fallback=None, latency_budget=None):
+    """
+    Get a distance matrix from the primary provider, degrading to the fallback
+    provider when the primary fails or does not answer within the latency budget.
+
+    Parameters:
+        locations (list): A list of coordinate pairs (each as [lat, lon]).
+        primary (DistanceProvider, optional): Defaults to the provider named by the
+            DISTANCE_PROVIDER environment variable, or 'cache'.
+        fallback (DistanceProvider, optional): Defaults to HaversineDistanceProvider.
+        latency_budget (float, optional): Seconds to wait for the primary provider.
+            Defaults to the DISTANCE_LATENCY_BUDGET environment variable, or 5 seconds.
+
+    Returns:
+        tuple: (matrix, provider) where provider is the one that produced the matrix.
+    """
+    if latency_budget is None:
+        latency_budget = float(os.getenv('DISTANCE_LATENCY_BUDGET', 5.0))
+    if primary is None:
+        primary = PROVIDERS[os.getenv('DISTANCE_PROVIDER', 'cache')](timeout=latency_budget)
+    if fallback is None:
+        fallback = HaversineDistanceProvider()
+
+    future = _executor.submit(_run_provider, primary, locations)
+    try:
+        return future.result(timeout=latency_budget), primary
+    except FutureTimeoutError:
+        # The request keeps running in the background and still fills the cache
+        logger.warning("Distance provider '%s' exceeded %.1fs; falling back to '%s'.",
+                       primary.name, latency_budget, fallback.name)
+    except RuntimeError as e:
+        logger.warning("Distance provider '%s' failed (%s); falling back to '%s'.", primary.name, e, fallback.name)
+    return fallback.matrix(locations), fallback
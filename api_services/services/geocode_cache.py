@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from django.utils import timezone
+from ..models import GeocodeCache
+from ..utils.address_to_coordinate import geocode, normalize_address
+from ..utils.lru_cache import LRUCache
+from ..utils.transactions import write_transaction
+
+logger = logging.getLogger(__name__)
+
+# In-process front of the GeocodeCache table, keyed by address key; values are (expires_at, lat, lng)
+_memory_cache = LRUCache(maxsize=int(os.getenv('GEOCODE_CACHE_SIZE', 10000)))
+
+_stats = {"memory_hits": 0, "database_hits": 0, "api_calls": 0, "api_failures": 0}
+_stats_lock = threading.Lock()
+
+# Earliest time the next Google request may start, shared by all threads of this worker
+_next_api_call = 0.0
+_rate_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _throttle():
+    """
+    Space out Google requests to at most GEOCODE_RATE_LIMIT per second (0 disables the limit).
+    """
+    global _next_api_call
+    rate = float(os.getenv('GEOCODE_RATE_LIMIT', 20))
+    if rate <= 0:
+        return
+    with _rate_lock:
+        now = time.monotonic()
+        wait = _next_api_call - now
+        _next_api_call = max(now, _next_api_call) + 1 / rate
+    if wait > 0:
+        time.sleep(wait)
+
+
+def address_key(address):
+    """
+    Cache key of an address: the sha256 of its normalized form.
+    """
+    return hashlib.sha256(normalize_address(address).encode()).hexdigest()
+
+
+def geocode_cached(address, raise_errors=False):
+    """
+    Geocode an address, answering repeated addresses from the cache.
+
+    Found coordinates are kept for GEOCODE_CACHE_TTL seconds and "not found"
+    answers for GEOCODE_NEGATIVE_TTL seconds. Failed requests are not cached.
+
+    Parameters:
+        address (str): The address to be geocoded.
+        raise_errors (bool, optional): Raise instead of returning (None, None) when the request fails.
+
+    Returns:
+        tuple: (latitude, longitude), or (None, None) if the address was not found or the request failed.
+
+    Raises:
+        RuntimeError: If raise_errors is set and the request failed.
+    """
+    if not normalize_address(address):
+        return None, None
+    key = address_key(address)
+    now = timezone.now()
+
+    cached = _memory_cache.get(key)
+    if cached is not None and cached[0] > now:
+        _count("memory_hits")
+        return cached[1], cached[2]
+
+    row = GeocodeCache.objects.filter(address_key=key, expires_at__gt=now).values_list('expires_at', 'lat', 'lng').first()
+    if row is not None:
+        _count("database_hits")
+        _memory_cache.set(key, row)
+        return row[1], row[2]
+
+    _throttle()
+    _count("api_calls")
+    try:
+        lat, lng = geocode(address)
+    except RuntimeError:
+        _count("api_failures")
+        if raise_errors:
+            raise
+        return None, None
+
+    if lat is None or lng is None:
+        lat = lng = None
+        ttl = int(os.getenv('GEOCODE_NEGATIVE_TTL', 24 * 3600))
+    else:
+        ttl = int(os.getenv('GEOCODE_CACHE_TTL', 90 * 24 * 3600))
+    expires_at = now + timedelta(seconds=ttl)
+    with write_transaction():
+        GeocodeCache.objects.update_or_create(
+            address_key=key,
+            defaults={'normalized_address': normalize_address(address), 'lat': lat, 'lng': lng,
+                      'expires_at': expires_at},
+        )
+    _memory_cache.set(key, (expires_at, lat, lng))
+    return lat, lng
+
+
+def geocode_cache_stats():
+    """
+    Lookup counters of this worker since it started.
+
+    Returns:
+        dict: memory_hits, database_hits, api_calls and api_failures, plus
+            hit_rate (share of lookups answered without calling the API, None before any lookup).
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    hits = stats["memory_hits"] + stats["database_hits"]
+    lookups = hits + stats["api_calls"]
+    stats["hit_rate"] = hits / lookups if lookups else None
+    stats["memory_entries"] = len(_memory_cache)
+    return stats
@@ -0,0 +1,134 @@
+import logging
+import os
+import queue
+import threading
+import time
+from django.db import close_old_connections, transaction
+from ..models import CustomersData
+from .geocode_cache import geocode_cached
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.Queue()
+_queued = set()  # customer ids waiting, in progress or waiting to retry
+_queued_lock = threading.Lock()
+_workers = []
+
+
+def _ensure_workers():
+    """
+    Start this worker's geocoding threads on first use.
+    """
+    with _queued_lock:
+        if _workers:
+            return
+        for number in range(max(1, int(os.getenv('GEOCODE_QUEUE_WORKERS', 2)))):
+            worker = threading.Thread(target=_work, name=f'geocode-queue-{number}', daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def enqueue_geocode(*customer_ids):
+    """
+    Resolve customers' addresses in the background, once the current transaction commits.
+
+    Customers already queued are not queued twice, and customers without
+    coordinates that had failed are marked pending again.
+
+    Parameters:
+        customer_ids (int): Ids of the customers to geocode.
+    """
+    customer_ids = {customer_id for customer_id in customer_ids if customer_id is not None}
+    if not customer_ids:
+        return
+    CustomersData.objects.filter(pk__in=customer_ids, lat__isnull=True).exclude(
+        geocode_status=CustomersData.PENDING,
+    ).update(geocode_status=CustomersData.PENDING)
+
+    def put():
+        with _queued_lock:
+            new_ids = customer_ids - _queued
+            _queued.update(new_ids)
+        for customer_id in new_ids:
+            _queue.put((customer_id, 0))
+        _ensure_workers()
+
+    # The workers must see the customer rows
+    transaction.on_commit(put)
+
+
+def _work():
+    while True:
+        customer_id, attempt = _queue.get()
+        retry = False
+        try:
+            retry = _resolve(customer_id, attempt)
+        except Exception:
+            logger.exception("Geocoding customer %s failed.", customer_id)
+        finally:
+            close_old_connections()
+        if retry:
+            delay = min(float(os.getenv('GEOCODE_RETRY_BACKOFF', 2)) * 2 ** attempt, 300)
+            timer = threading.Timer(delay, _queue.put, args=((customer_id, attempt + 1),))
+            timer.daemon = True
+            timer.start()
+        else:
+            with _queued_lock:
+                _queued.discard(customer_id)
+
+
+def _resolve(customer_id, attempt):
+    """
+    Geocode one customer and store the outcome.
+
+    Returns:
+        bool: True if the request failed and should be retried.
+    """
+    customer = CustomersData.objects.filter(pk=customer_id).first()
+    if customer is None:
+        return False
+    if customer.lat is not None:
+        if customer.geocode_status != CustomersData.RESOLVED:
+            CustomersData.objects.filter(pk=customer_id).update(geocode_status=CustomersData.RESOLVED)
+        return False
+
+    try:
+        lat, lng = geocode_cached(customer.address, raise_errors=True)
+    except RuntimeError as e:
+        if attempt + 1 < int(os.getenv('GEOCODE_RETRIES', 5)):
+            logger.warning("Geocoding %s failed (attempt %d), retrying: %s", customer.name, attempt + 1, e)
+            return True
+        logger.error("Giving up geocoding %s after %d attempts: %s", customer.name, attempt + 1, e)
+        lat = lng = None
+
+    if lat and lng:
+        # Saving the coordinate retires cached plans for the customer's delivery dates
+        customer.coordinate = f"{lat},{lng}"
+        customer.save(update_fields=['coordinate'])
+    else:
+        CustomersData.objects.filter(pk=customer_id).update(geocode_status=CustomersData.FAILED)
+    return False
+
+
+def wait_for_geocodes(customer_ids, timeout):
+    """
+    Queue customers that are still pending and wait for them to be resolved.
+
+    Parameters:
+        customer_ids (list): Ids of the customers to wait for.
+        timeout (float): Most seconds to wait.
+
+    Returns:
+        list: Ids of the customers still pending when the wait ended.
+    """
+    pending = CustomersData.objects.filter(pk__in=customer_ids, geocode_status=CustomersData.PENDING)
+    pending_ids = list(pending.values_list('id', flat=True))
+    if not pending_ids:
+        return []
+    # Customers left pending by a restarted worker are queued again
+    enqueue_geocode(*pending_ids)
+    deadline = time.monotonic() + timeout
+    while pending_ids and time.monotonic() < deadline:
+        time.sleep(min(0.2, max(deadline - time.monotonic(), 0)))
+        pending_ids = list(pending.values_list('id', flat=True))
+    return pending_ids
@@ -0,0 +1,163 @@
+import csv
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection
+from django.db.models import Q
+from ..models import CustomersData, OrdersData
+from ..models.orders_data import reserve_order_numbers
+from ..serializers import OrderImportRowSerializer
+from ..utils.address_to_coordinate import normalize_address
+from ..utils.coordinates import sync_latlng_fields
+from ..utils.transactions import write_transaction
+from .geocode_cache import geocode_cached
+from .geocode_queue import enqueue_geocode
+from .route_plan_cache import bump_orders_version
+
+logger = logging.getLogger(__name__)
+
+
+def parse_csv(text):
+    """
+    Read an order CSV with a header row (customer_name, address, product, delivery_date).
+
+    Returns:
+        list: One dict per data row.
+    """
+    reader = csv.DictReader(io.StringIO(text.lstrip('\ufeff')))
+    return [{(key or '').strip(): (value or '').strip() for key, value in row.items()} for row in reader]
+
+
+def _geocode(address):
+    try:
+        return geocode_cached(address, raise_errors=True)
+    except RuntimeError:
+        # Left to the geocoding queue, which retries with backoff
+        return None
+    finally:
+        # Each pool thread opens its own connection for the geocode cache
+        connection.close()
+
+
+def _geocode_all(addresses):
+    """
+    Geocode distinct addresses concurrently, at most ORDER_IMPORT_GEOCODE_WORKERS at a time.
+
+    Returns:
+        dict: normalized address -> (lat, lng), (None, None) if it was not found,
+            or None if the request failed.
+    """
+    by_key = {}
+    for address in addresses:
+        by_key.setdefault(normalize_address(address), address)
+    if not by_key:
+        return {}
+    workers = max(1, min(int(os.getenv('ORDER_IMPORT_GEOCODE_WORKERS', 8)), len(by_key)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='order-import-geocode') as executor:
+        coordinates = executor.map(_geocode, by_key.values())
+        return dict(zip(by_key, coordinates))
+
+
+def import_orders(rows):
+    """
+    Create many orders at once.
+
+    Rows are validated one by one and invalid rows are reported and skipped.
+    Customers are matched by name as in get_or_create_customer, each name is
+    looked up once, and the addresses of new customers (or existing customers
+    without coordinates) are geocoded concurrently before anything is written;
+    addresses whose request failed are handed to the geocoding queue to retry.
+    Customers and orders are then inserted with bulk_create in one transaction.
+
+    Parameters:
+        rows (list): Dicts with customer_name, address, product and an optional delivery_date.
+
+    Returns:
+        list: One report per row, in input order: {"row", "status"} plus
+            "order_number" and "customer_id" for created orders (and "warning" if
+            the address could not be geocoded yet) or "errors" for invalid rows.
+    """
+    reports = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            reports[index] = {"row": index + 1, "status": "invalid", "errors": {"row": ["Expected an object."]}}
+            continue
+        row = {key: value for key, value in row.items() if value not in ('', None)}
+        serializer = OrderImportRowSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            reports[index] = {"row": index + 1, "status": "invalid", "errors": serializer.errors}
+    if not valid:
+        return reports
+
+    # The first row of a new customer gives its address, as in get_or_create_customer
+    addresses = {}
+    for _, data in valid:
+        addresses.setdefault(data["customer_name"], data["address"])
+    customers = {}
+    for customer in CustomersData.objects.filter(name__in=addresses).order_by('-id'):
+        customers[customer.name] = customer
+    new_customers = [CustomersData(name=name, address=address) for name, address in addresses.items()
+                     if name not in customers]
+    ungeocoded = [customer for customer in customers.values() if not customer.coordinate]
+
+    coordinates = _geocode_all(customer.address for customer in new_customers + ungeocoded)
+    geocoded = []
+    retry = []
+    for customer in new_customers + ungeocoded:
+        found = coordinates[normalize_address(customer.address)]
+        if found is None:
+            customer.geocode_status = CustomersData.PENDING
+            retry.append(customer)
+        elif found[0] and found[1]:
+            customer.coordinate = f"{found[0]},{found[1]}"
+            customer.geocode_status = CustomersData.RESOLVED
+            geocoded.append(customer)
+        else:
+            customer.geocode_status = CustomersData.FAILED
+        # bulk_create and bulk_update skip save(), which keeps lat/lng in step
+        sync_latlng_fields(customer, 'coordinate', None)
+
+    with write_transaction():
+        CustomersData.objects.bulk_create(new_customers)
+        customers.update((customer.name, customer) for customer in new_customers)
+        located = [customer for customer in ungeocoded if customer.coordinate]
+        CustomersData.objects.bulk_update(ungeocoded, ['coordinate', 'lat', 'lng', 'geocode_status'])
+        enqueue_geocode(*(customer.id for customer in retry))
+
+        order_numbers = reserve_order_numbers(len(valid))
+        orders = [
+            OrdersData(
+                order_number=order_number,
+                customer=customers[data["customer_name"]],
+                customer_name=data["customer_name"],
+                address=data["address"],
+                product=data["product"],
+                delivery_date=data.get("delivery_date"),
+            )
+            for order_number, (_, data) in zip(order_numbers, valid)
+        ]
+        OrdersData.objects.bulk_create(orders)
+
+        # bulk_create skips the signals that invalidate cached plans; the newly
+        # located customers also make their earlier orders plannable
+        dates = {order.delivery_date for order in orders}
+        dates.update(OrdersData.objects.filter(
+            Q(customer__in=located) | Q(customer__isnull=True, customer_name__in=[customer.name for customer in located])
+        ).values_list('delivery_date', flat=True).distinct())
+        bump_orders_version(*dates)
+
+    for order, (index, _) in zip(orders, valid):
+        report = {"row": index + 1, "status": "created", "order_number": order.order_number,
+                  "customer_id": order.customer.id}
+        if order.customer.geocode_status == CustomersData.PENDING:
+            report["warning"] = "Address is queued for geocoding."
+        elif not order.customer.coordinate:
+            report["warning"] = "Address could not be geocoded."
+        reports[index] = report
+    logger.info("Imported %d orders (%d invalid rows, %d new customers, %d geocoded).",
+                len(orders), len(rows) - len(orders), len(new_customers), len(geocoded))
+    return reports
@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from collections import namedtuple
+from datetime import timedelta
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from ..models import OrdersVersion, RoutePlanCache
+from ..utils.lru_cache import LRUCache
+from ..utils.plan_format import compact_plan
+from ..utils.transactions import write_transaction
+
+logger = logging.getLogger(__name__)
+
+# A plan rendered once for serving: gzip-compressed JSON and the sha256 of the uncompressed JSON
+RenderedPlan = namedtuple('RenderedPlan', ['etag', 'body'])
+
+# In-process front of the RoutePlanCache table, keyed by cache key;
+# values are (stored_at, full RenderedPlan, compact RenderedPlan)
+_memory_cache = LRUCache(maxsize=int(os.getenv('ROUTE_PLAN_CACHE_SIZE', 128)))
+
+
+def plan_ttl():
+    """
+    How long a cached route plan may be served, from the ROUTE_PLAN_CACHE_TTL environment variable (seconds).
+    """
+    return timedelta(seconds=int(os.getenv('ROUTE_PLAN_CACHE_TTL', 7 * 24 * 3600)))
+
+
+def orders_version(delivery_date):
+    """
+    Current orders version for a delivery date; 0 if no order for that date has changed yet.
+    """
+    version = OrdersVersion.objects.filter(delivery_date=delivery_date).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_orders_version(*delivery_dates):
+    """
+    Increment the orders version of each given delivery date, so plans cached for it are no longer used.
+
+    Order saves and deletes call this through signals; code that bypasses
+    signals (bulk_create, queryset.update) must call it itself.
+    """
+    # Dates may arrive as date objects or as YYYY-MM-DD strings; bump each day once
+    to_date = OrdersVersion._meta.get_field('delivery_date').to_python
+    for delivery_date in {to_date(d) for d in delivery_dates if d is not None}:
+        _, created = OrdersVersion.objects.get_or_create(delivery_date=delivery_date, defaults={'version': 1})
+        if not created:
+            OrdersVersion.objects.filter(delivery_date=delivery_date).update(
+                version=F('version') + 1, updated_at=timezone.now()
+            )
+
+
+def render_plan(result, compact=False):
+    """
+    Serialize a plan to gzip-compressed JSON, in the compact format if asked.
+
+    Returns:
+        RenderedPlan: The compressed body and its ETag.
+    """
+    if compact:
+        result = compact_plan(result)
+    body = json.dumps(result, default=str, separators=(',', ':')).encode()
+    return RenderedPlan(hashlib.sha256(body).hexdigest(), gzip.compress(body))
+
+
+def decode_plan(rendered):
+    """
+    Turn a RenderedPlan back into the plan dict.
+    """
+    return json.loads(gzip.decompress(rendered.body))
+
+
+def get_rendered_plan(delivery_date, cache_key, compact=False):
+    """
+    Look up a cached route plan, first in this process and then in the database.
+
+    Returns:
+        RenderedPlan: The cached plan in the requested format, or None if
+            there is no plan younger than the TTL.
+    """
+    oldest = timezone.now() - plan_ttl()
+    cached = _memory_cache.get(cache_key)
+    if cached is not None and cached[0] < oldest:
+        _memory_cache.pop(cache_key)
+        cached = None
+
+    if cached is None:
+        row = RoutePlanCache.objects.filter(
+            delivery_date=delivery_date, rider_names_hash=cache_key, created_at__gte=oldest,
+        ).values_list('created_at', 'etag', 'plan_gzip', 'compact_etag', 'compact_gzip').first()
+        if row is None:
+            return None
+        created_at, etag, plan_gzip, compact_etag, compact_gzip = row
+        full = RenderedPlan(etag, bytes(plan_gzip))
+        compact_rendered = RenderedPlan(compact_etag, bytes(compact_gzip)) if compact_gzip else None
+        cached = (created_at, full, compact_rendered)
+        _memory_cache.set(cache_key, cached)
+
+    stored_at, full, compact_rendered = cached
+    if not compact:
+        return full
+    if compact_rendered is None:
+        # Plans cached before the compact format existed
+        compact_rendered = render_plan(decode_plan(full), compact=True)
+        _memory_cache.set(cache_key, (stored_at, full, compact_rendered))
+        RoutePlanCache.objects.filter(delivery_date=delivery_date, rider_names_hash=cache_key).update(
+            compact_etag=compact_rendered.etag, compact_gzip=compact_rendered.body,
+        )
+    return compact_rendered
+
+
+def get_plan(delivery_date, cache_key):
+    """
+    Look up a cached route plan as a dict.
+
+    Returns:
+        dict: The cached plan, or None if there is no plan younger than the TTL.
+    """
+    rendered = get_rendered_plan(delivery_date, cache_key)
+    return None if rendered is None else decode_plan(rendered)
+
+
+def get_latest_plan(plan_key):
+    """
+    Most recent unexpired plan stored under a plan_key, whatever orders it was computed for.
+
+    Returns:
+        tuple: (result, route_orders), or None if there is no such plan.
+    """
+    row = RoutePlanCache.objects.filter(
+        plan_key=plan_key, created_at__gte=timezone.now() - plan_ttl(),
+    ).order_by('-created_at').values_list('etag', 'plan_gzip', 'route_orders').first()
+    if row is None:
+        return None
+    etag, plan_gzip, route_orders = row
+    return decode_plan(RenderedPlan(etag, bytes(plan_gzip))), route_orders
+
+
+def store_plan(delivery_date, cache_key, result, plan_key='', route_orders=None):
+    """
+    Render a route plan once, in both formats, and save it in both cache
+    tiers, replacing an expired row with the same key.
+
+    Parameters:
+        delivery_date (str): Delivery date in YYYY-MM-DD format.
+        cache_key (str): Key of the plan for the current orders version.
+        result (dict): The plan.
+        plan_key (str, optional): Key of the same request regardless of orders version,
+            used to find the plan again for incremental re-planning.
+        route_orders (list, optional): Order ids of each route in result["routes"], in visiting order.
+
+    Returns:
+        RenderedPlan: The plan in the full format.
+    """
+    full = render_plan(result)
+    compact_rendered = render_plan(result, compact=True)
+    stored_at = timezone.now()
+    try:
+        with write_transaction():
+            RoutePlanCache.objects.update_or_create(
+                delivery_date=delivery_date,
+                rider_names_hash=cache_key,
+                defaults={
+                    'etag': full.etag,
+                    'plan_gzip': full.body,
+                    'compact_etag': compact_rendered.etag,
+                    'compact_gzip': compact_rendered.body,
+                    'plan_key': plan_key,
+                    'route_orders': route_orders,
+                    'created_at': stored_at,
+                },
+            )
+    except IntegrityError:
+        # A concurrent request stored the same plan first
+        logger.info("Route plan %s was cached concurrently.", cache_key)
+    _memory_cache.set(cache_key, (stored_at, full, compact_rendered))
+    return full
+
+
+def evict_plans(max_age=None, max_rows=None):
+    """
+    Delete cached route plans older than max_age, then the oldest ones beyond max_rows.
+
+    Parameters:
+        max_age (timedelta, optional): Oldest plan to keep. Defaults to the cache TTL.
+        max_rows (int, optional): Most plans to keep. Unlimited by default.
+
+    Returns:
+        int: The number of plans deleted.
+    """
+    if max_age is None:
+        max_age = plan_ttl()
+    deleted, _ = RoutePlanCache.objects.filter(created_at__lt=timezone.now() - max_age).delete()
+
+    if max_rows is not None:
+        excess = list(
+            RoutePlanCache.objects.order_by('-created_at', '-id').values_list('id', flat=True)[max_rows:]
+        )
+        for start in range(0, len(excess), 1000):
+            count, _ = RoutePlanCache.objects.filter(id__in=excess[start:start + 1000]).delete()
+            deleted += count
+    return deleted
@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+from ..models import RoutePlanJob
+from .route_plan_cache import get_plan
+from .route_planner_service import plan_cache_key, plan_routes
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """
+    Thread pool running planning jobs in this worker, created on first use.
+
+    Planning spends most of its time waiting on OSRM and the solver process
+    pool, so threads are enough to keep requests from blocking on it.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('PLAN_JOB_WORKERS', 2)),
+                thread_name_prefix='route-plan-job',
+            )
+        return _executor
+
+
+def _stale_before():
+    """
+    Jobs still active but untouched since this time are assumed to have died with their worker.
+    """
+    return timezone.now() - timedelta(seconds=int(os.getenv('PLAN_JOB_STALE_SECONDS', 600)))
+
+
+def _watch_for_cancel(job_id, cancel_event, finished):
+    """
+    Set cancel_event once the job is marked cancelled, by this worker or any other.
+    """
+    try:
+        while not finished.wait(1):
+            if RoutePlanJob.objects.filter(pk=job_id, status=RoutePlanJob.CANCELLED).exists():
+                cancel_event.set()
+                return
+    finally:
+        connection.close()
+
+
+def _run_job(job_id):
+    close_old_connections()
+    cancel_event = threading.Event()
+    finished = threading.Event()
+    try:
+        job = RoutePlanJob.objects.get(pk=job_id)
+        started = RoutePlanJob.objects.filter(pk=job_id, status=RoutePlanJob.PENDING).update(
+            status=RoutePlanJob.RUNNING, updated_at=timezone.now(),
+        )
+        if not started:
+            # Cancelled before a thread was free to run it
+            return
+        threading.Thread(
+            target=_watch_for_cancel, args=(job_id, cancel_event, finished),
+            name=f'route-plan-job-watch-{job_id}', daemon=True,
+        ).start()
+        try:
+            result = plan_routes(**job.parameters, cancel_event=cancel_event)
+        except ValueError as e:
+            _finish(job_id, error=str(e), error_status=400)
+        except TimeoutError as e:
+            _finish(job_id, error=str(e), error_status=504)
+        except Exception:
+            if cancel_event.is_set():
+                logger.info("Route planning job %s was cancelled.", job_id)
+                return
+            logger.exception("Route planning job %s failed.", job_id)
+            _finish(job_id, error="Internal server error.", error_status=500)
+        else:
+            _finish(job_id, result=json.loads(json.dumps(result, default=str)))
+    finally:
+        finished.set()
+        close_old_connections()
+
+
+def _finish(job_id, result=None, error='', error_status=None):
+    # A cancelled job keeps its status even if its computation got to the end
+    RoutePlanJob.objects.filter(pk=job_id, status__in=RoutePlanJob.ACTIVE_STATUSES).update(
+        status=RoutePlanJob.FAILED if error else RoutePlanJob.DONE,
+        result_json=result,
+        error=error,
+        error_status=error_status,
+        updated_at=timezone.now(),
+    )
+
+
+def submit_plan(num_riders, delivery_date, rider_names, routing_engine="cluster", clustering_method="kmeans",
+                balance_clusters=False, force_full=False):
+    """
+    Queue a route plan and return its job straight away.
+
+    A request whose plan is already cached gets a finished job. A request
+    identical to one still being computed (same cache key) joins that job
+    instead of starting another computation.
+
+    Parameters:
+        Same as route_planner_service.plan_routes.
+
+    Returns:
+        tuple: (job, created) where created is False if the request joined an existing job.
+    """
+    cache_key = plan_cache_key(delivery_date, rider_names, routing_engine, clustering_method, balance_clusters)
+    parameters = {
+        "num_riders": num_riders,
+        "delivery_date": delivery_date,
+        "rider_names": list(rider_names),
+        "routing_engine": routing_engine,
+        "clustering_method": clustering_method,
+        "balance_clusters": balance_clusters,
+        "force_full": force_full,
+    }
+
+    cached_plan = None if force_full else get_plan(delivery_date, cache_key)
+    if cached_plan is not None:
+        job = RoutePlanJob.objects.create(
+            cache_key=cache_key, delivery_date=delivery_date, parameters=parameters,
+            status=RoutePlanJob.DONE, result_json=cached_plan,
+        )
+        return job, True
+
+    # Free the key from jobs whose worker went away mid-computation
+    RoutePlanJob.objects.filter(
+        cache_key=cache_key, status__in=RoutePlanJob.ACTIVE_STATUSES, updated_at__lt=_stale_before(),
+    ).update(status=RoutePlanJob.FAILED, error="Planning job was abandoned.", error_status=500)
+
+    try:
+        with transaction.atomic():
+            job = RoutePlanJob.objects.create(cache_key=cache_key, delivery_date=delivery_date, parameters=parameters)
+    except IntegrityError:
+        existing = RoutePlanJob.objects.filter(cache_key=cache_key, status__in=RoutePlanJob.ACTIVE_STATUSES).first()
+        if existing is not None:
+            logger.info("Joining route planning job %s.", existing.pk)
+            return existing, False
+        # The other job finished between our insert and lookup; its plan is cached now
+        return submit_plan(num_riders, delivery_date, rider_names, routing_engine, clustering_method,
+                           balance_clusters, force_full)
+
+    # Start the job only once its row is visible to the worker thread
+    transaction.on_commit(lambda: _get_executor().submit(_run_job, job.pk))
+    return job, True
+
+
+def get_job(job_id):
+    """
+    Look up a planning job by id.
+
+    Returns:
+        RoutePlanJob: The job, or None if there is no such job.
+    """
+    return RoutePlanJob.objects.filter(pk=job_id).first()
+
+
+def cancel_job(job_id):
+    """
+    Cancel a pending or running planning job.
+
+    The job is marked cancelled straight away, for every request that joined
+    it; the worker computing it stops solving within about a second.
+
+    Returns:
+        RoutePlanJob: The job, whose status is cancelled unless it had already
+            finished, or None if there is no such job.
+    """
+    RoutePlanJob.objects.filter(pk=job_id, status__in=RoutePlanJob.ACTIVE_STATUSES).update(
+        status=RoutePlanJob.CANCELLED, error="Route planning was cancelled.", updated_at=timezone.now(),
+    )
+    return get_job(job_id)
+
+
+def purge_jobs(max_age):
+    """
+    Delete finished jobs older than max_age (a timedelta).
+
+    Returns:
+        int: The number of jobs deleted.
+    """
+    deleted, _ = RoutePlanJob.objects.filter(
+        status__in=(RoutePlanJob.DONE, RoutePlanJob.FAILED, RoutePlanJob.CANCELLED),
+        updated_at__lt=timezone.now() - max_age,
+    ).delete()
+    return deleted
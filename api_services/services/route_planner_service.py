@@ -1,58 +1,269 @@
 import logging
 import hashlib
 import json
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from datetime import datetime
-from ..models import RiderHistoryData, OrdersData, OriginData, CustomersData, RoutePlanCache
-from ..utils import traveling_salesman_problem, clustering
+from django.db import connections
+from django.db.models import Q
+from ..models import RiderHistoryData, OrdersData, OriginData, CustomersData, ClusterSeed
+from ..utils import clustering, k_medoids, solver_pool, traveling_salesman_problem, vehicle_routing
+from ..utils.transactions import write_transaction
+from .distance_providers import distance_matrix_with_fallback
+from .geocode_queue import wait_for_geocodes
+from .route_plan_cache import get_latest_plan, get_plan, orders_version, store_plan
 
 logger = logging.getLogger(__name__)
 
-def _generate_cache_key(delivery_date, rider_names, orders_queryset):
+_PlanInputs = namedtuple(
+    '_PlanInputs', ['origin', 'origin_latlng', 'rider_data', 'delivery_data', 'latlng_data', 'order_ids']
+)
+
+def _generate_cache_key(delivery_date, rider_names, version, options=None):
     """
     Generate a unique cache key based on:
       - delivery_date: The delivery date
       - rider_names: A sorted list of rider names
-      - orders: A sorted list of order IDs for that date
+      - version: The orders version for that date, bumped on every order change
+        (None for a key that stays the same as orders change)
+      - options: Non-default planning options, if any
     """
-    order_ids = list(orders_queryset.values_list('id', flat=True))
     key_data = {
         "delivery_date": delivery_date,
         "rider_names": sorted(rider_names),
-        "orders": sorted(order_ids)
     }
+    if version is not None:
+        key_data["orders_version"] = version
+    if options:
+        key_data["options"] = options
     key_string = json.dumps(key_data, sort_keys=True)
     return hashlib.sha256(key_string.encode()).hexdigest()
 
-def plan_routes(num_riders, delivery_date, rider_names):
+def _solve_by_clusters(num_riders, delivery_date, origin, origin_latlng, latlng_data, distance_matrix,
+                       clustering_method, balance_clusters, cancel_event):
     """
-    Plan delivery routes based on the given input parameters.
-    Uses caching if delivery_date, rider names, and orders haven't changed.
+    Cluster the customers per rider, then solve one TSP per cluster.
+
+    Returns:
+        tuple: (clusters, routes) where each route is (optimized_route, total_distance, solver_info).
+    """
+    # Perform clustering based on the number of riders
+    if num_riders != 1 and clustering_method == "kmedoids":
+        # Group by road distance between customers, taken from the plan-wide matrix
+        max_size = None
+        if balance_clusters:
+            max_size = max(math.ceil(len(latlng_data) / num_riders), traveling_salesman_problem.exact_stop_limit())
+        groups = k_medoids.cluster(distance_matrix[1:, 1:], num_riders, max_size=max_size)
+    elif num_riders != 1:
+        # Warm-start from the centroids of the last plan for the same origin and weekday
+        weekday = datetime.strptime(delivery_date, "%Y-%m-%d").weekday()
+        seed = ClusterSeed.objects.filter(origin_latlng=origin.latlng, weekday=weekday, n_clusters=num_riders).first()
+        groups, centroids = clustering.fit_clusters(
+            latlng_data, num_riders, init_centroids=seed.centroids if seed else None
+        )
+        with write_transaction():
+            ClusterSeed.objects.update_or_create(
+                origin_latlng=origin.latlng, weekday=weekday, n_clusters=num_riders,
+                defaults={'centroids': centroids},
+            )
+    else:
+        # If only one rider, create a full circular route (origin → deliveries → origin)
+        groups = [list(range(len(latlng_data)))]
+    clustered = [
+        clustering.create_route([list(latlng_data[j]) for j in members], origin_latlng)
+        for members in groups
+    ]
+
+    # Solve the TSP for each cluster on its slice of the plan-wide matrix, in parallel
+    cluster_matrices = []
+    for members in groups:
+        matrix_index = [0] + [j + 1 for j in members]
+        cluster_matrices.append(distance_matrix[np.ix_(matrix_index, matrix_index)])
+    routes = solver_pool.solve_clusters(origin_latlng, clustered, cluster_matrices, cancel_event=cancel_event)
+    return clustered, routes
+
+
+def _solve_by_vrp(num_riders, origin_latlng, latlng_data, distance_matrix, cancel_event):
+    """
+    Assign customers to riders jointly with the savings/local-search VRP engine,
+    then re-sequence each rider's stops with the TSP solvers.
+
+    Returns:
+        tuple: (clusters, routes) in the same format as _solve_by_clusters.
+    """
+    vrp_routes = vehicle_routing.solve(
+        distance_matrix, num_riders, time_limit=float(os.getenv('VRP_TIME_BUDGET', 5.0))
+    )
+    clustered = [
+        clustering.create_route([list(latlng_data[i - 1]) for i in sequence[1:]], origin_latlng)
+        for _, sequence in vrp_routes
+    ]
+    route_matrices = [distance_matrix[np.ix_(sequence, sequence)] for _, sequence in vrp_routes]
+    polished = solver_pool.solve_clusters(origin_latlng, clustered, route_matrices, cancel_event=cancel_event)
+
+    routes = []
+    for (cost, _), cluster_route, (tsp_route, tsp_cost, solver_info) in zip(vrp_routes, clustered, polished):
+        # The rider assignment is heuristic, so no optimality gap is reported for the plan
+        info = {"solver": f"vrp+{solver_info['solver']}", "optimality_gap": None}
+        if tsp_cost <= cost:
+            routes.append((tsp_route, tsp_cost, info))
+        else:
+            routes.append((cluster_route, cost, info))
+    return clustered, routes
+
+def _plan_options(routing_engine, clustering_method, balance_clusters):
+    options = {}
+    if routing_engine != "cluster":
+        options["routing_engine"] = routing_engine
+    if clustering_method != "kmeans":
+        options["clustering_method"] = clustering_method
+    if balance_clusters:
+        options["balance_clusters"] = True
+    return options
+
+def plan_cache_key(delivery_date, rider_names, routing_engine="cluster", clustering_method="kmeans",
+                   balance_clusters=False):
+    """
+    Cache key of the plan that plan_routes would produce for these arguments right now.
+    """
+    options = _plan_options(routing_engine, clustering_method, balance_clusters)
+    return _generate_cache_key(delivery_date, rider_names, orders_version(delivery_date), options)
+
+def _orders_along(route, stops):
+    """
+    Order ids visited by a route, matched through the stop coordinates.
 
     Parameters:
-        num_riders (int): Number of riders.
-        delivery_date (str): Delivery date in YYYY-MM-DD format.
-        rider_names (list): List of rider names.
+        route (list): Coordinates [origin, stop, ..., origin] as returned by process_tsp.
+        stops (list): (order_id, (lat, lng)) for every order that may be on the route.
+            Orders at the same coordinate are interchangeable; each is used once.
+    """
+    by_coordinate = {}
+    for order_id, coordinate in stops:
+        by_coordinate.setdefault(tuple(coordinate), []).append(order_id)
+    return [by_coordinate[tuple(stop)].pop(0) for stop in route[1:-1]]
+
+def _replan_incrementally(previous, origin_latlng, order_ids, latlng_data, distance_matrix, cancel_event):
+    """
+    Update a previous plan for the current orders: drop cancelled or moved
+    stops, put new ones where they lengthen a route least, and re-solve only
+    the routes that changed. Riders keep their routes.
+
+    Parameters:
+        previous (tuple): (result, route_orders) of the previous plan, from get_latest_plan.
+        order_ids (list): Id of each order in latlng_data.
 
     Returns:
-        dict: Contains delivery details, coordinates, clusters, and assigned routes.
+        tuple: (assigned_routes, route_orders, clusters, changes), or None if
+            the previous plan cannot be reused or too much has changed.
     """
-    # Validate that the number of rider names matches the given number of riders
-    if len(rider_names) != num_riders:
-        raise ValueError("The number of rider names must match num_riders.")
+    result, route_orders = previous
+    previous_routes = result.get("routes") or []
+    if not route_orders or len(route_orders) != len(previous_routes):
+        return None
+    if any(route["route"][0] != list(origin_latlng) for route in previous_routes):
+        # The origin moved, so every route changes
+        return None
+
+    matrix_index = {order_id: i + 1 for i, order_id in enumerate(order_ids)}
+    previous_stops = {}
+    for route, orders in zip(previous_routes, route_orders):
+        previous_stops.update(zip(orders, route["route"][1:-1]))
+    kept = {
+        order_id for order_id, coordinate in previous_stops.items()
+        if order_id in matrix_index and list(latlng_data[matrix_index[order_id] - 1]) == coordinate
+    }
+    removed = set(previous_stops) - kept
+    added = [order_id for order_id in order_ids if order_id not in kept]
+    changes = len(removed) + len(added)
+    if changes > float(os.getenv('INCREMENTAL_MAX_CHANGE_RATIO', 0.2)) * len(order_ids):
+        return None
+
+    routes = [[matrix_index[order_id] for order_id in orders if order_id in kept] for orders in route_orders]
+    touched = {r for r, orders in enumerate(route_orders) if removed.intersection(orders)}
+    touched |= vehicle_routing.insert_cheapest(distance_matrix, routes, [matrix_index[o] for o in added])
+    touched = sorted(touched)
 
-    # Fetch delivery orders for the specified date
-    deliveries = OrdersData.objects.filter(delivery_date=delivery_date)
+    touched_clusters = [
+        clustering.create_route([list(latlng_data[i - 1]) for i in routes[r]], origin_latlng) for r in touched
+    ]
+    touched_matrices = [distance_matrix[np.ix_([0] + routes[r], [0] + routes[r])] for r in touched]
+    solved = solver_pool.solve_clusters(origin_latlng, touched_clusters, touched_matrices, cancel_event=cancel_event)
+
+    assigned_routes = [dict(route) for route in previous_routes]
+    new_route_orders = [list(orders) for orders in route_orders]
+    for r, (route, distance, solver_info) in zip(touched, solved):
+        stops = [(order_ids[i - 1], latlng_data[i - 1]) for i in routes[r]]
+        assigned_routes[r].update({
+            "route": route,
+            "distance": distance,
+            "solver": solver_info["solver"],
+            "optimality_gap": solver_info["optimality_gap"],
+        })
+        new_route_orders[r] = _orders_along(route, stops)
+
+    # Each route's stops form its cluster
+    clusters = [list(route["route"]) for route in assigned_routes]
+    return assigned_routes, new_route_orders, clusters, changes
+
+def _await_geocodes(delivery_date):
+    """
+    Wait, at most GEOCODE_WAIT_SECONDS, for the queued geocodes of the
+    customers with orders on a date.
+
+    Returns:
+        list: Names of the customers still pending afterwards.
+    """
+    orders = OrdersData.objects.filter(delivery_date=delivery_date)
+    # Unlinked orders are matched to customers by name when planning
+    pending = CustomersData.objects.filter(geocode_status=CustomersData.PENDING).filter(
+        Q(orders__delivery_date=delivery_date)
+        | Q(name__in=orders.filter(customer__isnull=True).values('customer_name'))
+    )
+    pending_ids = list(pending.values_list('id', flat=True).distinct())
+    if not pending_ids:
+        return []
+    logger.info("Waiting for %d customers of %s to be geocoded.", len(pending_ids), delivery_date)
+    pending_ids = wait_for_geocodes(pending_ids, float(os.getenv('GEOCODE_WAIT_SECONDS', 10)))
+    return sorted(set(CustomersData.objects.filter(pk__in=pending_ids).values_list('name', flat=True)))
+
+def _delivery_entry(delivery, customer_name, origin, latlng=None, error=None):
+    """
+    One order's entry in a plan's 'deliveries' list; orders left out of the plan carry an error.
+    """
+    delivery_date = delivery.delivery_date
+    entry = {
+        "customer_name": customer_name,
+        "latlng": latlng,
+        "address": delivery.address,
+        "product": delivery.product,
+        "delivery_date": delivery_date.isoformat() if hasattr(delivery_date, "isoformat") else delivery_date,
+        "origin": origin.name,
+    }
+    if error is not None:
+        entry["error"] = error
+    return entry
+
+def _load_plan_inputs(delivery_date, rider_names):
+    """
+    Load everything a plan needs from the database: the origin, the riders'
+    history and each order's delivery details and customer coordinates.
+
+    Returns:
+        _PlanInputs: Orders without usable coordinates appear in delivery_data
+            with an error and are left out of latlng_data and order_ids.
+
+    Raises:
+        ValueError: If there are no orders, riders or origin to plan with.
+    """
+    # Fetch delivery orders for the specified date, with their customers in the same query
+    deliveries = OrdersData.objects.filter(delivery_date=delivery_date).select_related('customer')
     if not deliveries.exists():
         raise ValueError("No delivery orders found for the specified date.")
 
-    # Generate a cache key based on delivery_date, rider_names, and orders
-    cache_key = _generate_cache_key(delivery_date, rider_names, deliveries)
-    cache_entry = RoutePlanCache.objects.filter(delivery_date=delivery_date, rider_names_hash=cache_key).first()
-    if cache_entry:
-        logger.info("Using cached route plan.")
-        return cache_entry.result_json
-
-    # No cache found — continue with route planning
     unique_riders = list(set(rider_names))
     rider_histories = RiderHistoryData.objects.filter(rider_name__in=unique_riders)
     if rider_histories.count() != len(unique_riders):
@@ -65,89 +276,292 @@ def plan_routes(num_riders, delivery_date, rider_names):
     origin = OriginData.objects.first()
     if not origin or not origin.latlng:
         raise ValueError("Origin data not found or is missing valid coordinates.")
-    try:
-        latlng_parts = origin.latlng.split(",")
-        origin_latlng = [float(latlng_parts[0].strip()), float(latlng_parts[1].strip())]
-    except Exception as e:
-        logger.error("Error parsing origin coordinates: %s", e)
+    if origin.lat is None or origin.lng is None:
+        logger.error("Error parsing origin coordinates: %s", origin.latlng)
         raise ValueError("Invalid origin coordinates.")
+    origin_latlng = [origin.lat, origin.lng]
+
+    # Orders without a customer link are matched by name, all in one query
+    unlinked_names = {delivery.customer_name for delivery in deliveries if delivery.customer_id is None}
+    customers_by_name = {}
+    if unlinked_names:
+        for customer in CustomersData.objects.filter(name__in=unlinked_names).order_by('id'):
+            customers_by_name.setdefault(customer.name, customer)
 
     # Build delivery details and customer coordinate list
     delivery_data = []
     latlng_data = []
+    order_ids = []
     for delivery in deliveries:
         customer_name = delivery.customer_name
         try:
-            customer = CustomersData.objects.get(name=customer_name)
-            lat, lng = map(float, customer.coordinate.split(","))
-            delivery_data.append({
-                "customer_name": customer.name,
-                "latlng": customer.coordinate,
-                "product": delivery.product,
-                "address": delivery.address,
-                "delivery_date": delivery.delivery_date.isoformat() if hasattr(delivery.delivery_date, "isoformat") else delivery.delivery_date,
-                "origin": origin.name,
-            })
-            latlng_data.append((lat, lng))
+            customer = delivery.customer or customers_by_name.get(customer_name)
+            if customer is None:
+                raise CustomersData.DoesNotExist
+            if customer.lat is None or customer.lng is None:
+                if customer.geocode_status == CustomersData.PENDING:
+                    error = f"Customer address is still being geocoded for {customer.name}"
+                else:
+                    error = f"Customer coordinate not resolved for {customer.name}"
+                delivery_data.append(_delivery_entry(delivery, customer.name, origin, error=error))
+                continue
+            delivery_data.append(_delivery_entry(delivery, customer.name, origin, latlng=customer.coordinate))
+            latlng_data.append((customer.lat, customer.lng))
+            order_ids.append(delivery.id)
         except CustomersData.DoesNotExist:
-            delivery_data.append({
-                "customer_name": customer_name,
-                "latlng": None,
-                "address": delivery.address,
-                "product": delivery.product,
-                "delivery_date": delivery.delivery_date.isoformat() if hasattr(delivery.delivery_date, "isoformat") else delivery.delivery_date,
-                "origin": origin.name,
-                "error": f"Customer data not found for {customer_name}"
-            })
+            delivery_data.append(_delivery_entry(
+                delivery, customer_name, origin, error=f"Customer data not found for {customer_name}"
+            ))
 
-    # Perform clustering based on the number of riders
-    if num_riders != 1:
-        clustered = clustering.cluster(latlng_data, origin_latlng, num_riders)
+    return _PlanInputs(origin, origin_latlng, rider_data, delivery_data, latlng_data, order_ids)
+
+def _assemble_plan(num_riders, delivery_date, inputs, distance_matrix, distance_provider, routing_engine,
+                   clustering_method, balance_clusters, cancel_event=None, previous=None):
+    """
+    Solve and assign the routes of one plan on an already fetched distance matrix.
+
+    Parameters:
+        inputs (_PlanInputs): From _load_plan_inputs, for exactly the riders of this plan.
+        distance_matrix (np.ndarray): Origin plus every located customer, in latlng_data order.
+        distance_provider (DistanceProvider): Where distance_matrix came from.
+        previous (tuple, optional): (result, route_orders) of an earlier plan to update incrementally.
+
+    Returns:
+        tuple: (result, route_orders) where route_orders lists the order ids of each route.
+    """
+    origin, origin_latlng, rider_data, delivery_data, latlng_data, order_ids = inputs
+
+    # Reuse the previous plan for these riders when only a few orders changed since
+    incremental = None
+    if previous is not None:
+        incremental = _replan_incrementally(
+            previous, origin_latlng, order_ids, latlng_data, distance_matrix, cancel_event
+        )
+
+    if incremental is not None:
+        assigned_routes, route_orders, clustered, changes = incremental
+        logger.info("Updated the previous route plan for %s incrementally (%d order changes).",
+                    delivery_date, changes)
     else:
-        # If only one rider, create a full circular route (origin → deliveries → origin)
-        origin_coords = [origin_latlng[0], origin_latlng[1]]
-        customer_coords = [[float(lat), float(lng)] for lat, lng in latlng_data]
-        clustered = [[origin_coords] + customer_coords + [origin_coords]]
+        if routing_engine == "vrp":
+            clustered, routes = _solve_by_vrp(num_riders, origin_latlng, latlng_data, distance_matrix, cancel_event)
+        else:
+            clustered, routes = _solve_by_clusters(
+                num_riders, delivery_date, origin, origin_latlng, latlng_data, distance_matrix,
+                clustering_method, balance_clusters, cancel_event,
+            )
 
-    # Solve the TSP for each cluster
-    routes = []
-    for cluster_route in clustered:
-        tsp_result = traveling_salesman_problem.process_tsp(origin_latlng, cluster_route)
-        routes.append(tsp_result)  # tsp_result: (optimized_route, total_distance)
-
-    # Sort routes by distance descending (longest first)
-    routes.sort(key=lambda x: x[1], reverse=True)
-
-    # Sort riders by historical distance ascending (least used first)
-    sorted_riders = sorted(rider_data.items(), key=lambda x: x[1])
-    assigned_routes = []
-    rider_queue = list(sorted_riders)
-
-    # Assign each route to a rider in a round-robin fashion
-    for i, route in enumerate(routes):
-        rider_name, _ = rider_queue[i % len(rider_queue)]
-        assigned_routes.append({
-            "rider_name": rider_name,
-            "route": route[0],
-            "distance": route[1]
-        })
+        # Sort routes by distance descending (longest first)
+        routes.sort(key=lambda x: x[1], reverse=True)
+
+        # Sort riders by historical distance ascending (least used first)
+        sorted_riders = sorted(rider_data.items(), key=lambda x: x[1])
+        assigned_routes = []
+        rider_queue = list(sorted_riders)
+
+        # Assign each route to a rider in a round-robin fashion
+        for i, route in enumerate(routes):
+            rider_name, _ = rider_queue[i % len(rider_queue)]
+            assigned_routes.append({
+                "rider_name": rider_name,
+                "route": route[0],
+                "distance": route[1],
+                "solver": route[2]["solver"],
+                "optimality_gap": route[2]["optimality_gap"],
+            })
+
+        # Remember which orders each route serves, for incremental re-planning later
+        stops = list(zip(order_ids, latlng_data))
+        route_orders = []
+        for route in assigned_routes:
+            served = _orders_along(route["route"], stops)
+            route_orders.append(served)
+            served = set(served)
+            stops = [stop for stop in stops if stop[0] not in served]
 
     # Final result
     result = {
         "deliveries": delivery_data,
         "latlng": [list(coord) for coord in latlng_data],
         "clusters": [[list(coord) for coord in cluster] for cluster in clustered],
-        "routes": assigned_routes
+        "routes": assigned_routes,
+        "distance_source": distance_provider.name,
+        "approximate_distances": distance_provider.approximate,
+        "plan_mode": "incremental" if incremental is not None else "full",
     }
 
-    # Convert delivery_date to a date object
-    delivery_date_obj = datetime.strptime(delivery_date, "%Y-%m-%d").date()
+    return result, route_orders
 
-    # Save the result to the cache
-    RoutePlanCache.objects.create(
-        delivery_date=delivery_date_obj,
-        rider_names_hash=cache_key,
-        result_json=json.loads(json.dumps(result, default=str))  
+def plan_routes(num_riders, delivery_date, rider_names, routing_engine="cluster", clustering_method="kmeans",
+                balance_clusters=False, cancel_event=None, force_full=False):
+    """
+    Plan delivery routes based on the given input parameters.
+    Uses caching if delivery_date, rider names, and orders haven't changed.
+    When only a few orders changed since the last plan for the same riders,
+    that plan is updated incrementally instead of re-planned from scratch.
+
+    Parameters:
+        num_riders (int): Number of riders.
+        delivery_date (str): Delivery date in YYYY-MM-DD format.
+        rider_names (list): List of rider names.
+        routing_engine (str, optional): "cluster" (cluster first, then one TSP per rider) or "vrp"
+            (all routes built jointly by the savings/local-search engine).
+        clustering_method (str, optional): "kmeans" (straight-line) or "kmedoids" (road distance).
+        balance_clusters (bool, optional): Cap k-medoids cluster sizes at the exact solver's limit.
+        cancel_event (threading.Event, optional): Set to abandon route solving early.
+        force_full (bool, optional): Ignore cached and previous plans and re-plan from scratch.
+
+    Returns:
+        dict: Contains delivery details, coordinates, clusters, and assigned routes.
+            'pending_geocodes' names customers whose addresses were still being
+            geocoded; their orders are left out and the plan is not cached.
+    """
+    # Validate that the number of rider names matches the given number of riders
+    if len(rider_names) != num_riders:
+        raise ValueError("The number of rider names must match num_riders.")
+
+    # Generate a cache key based on delivery_date, rider_names, and the orders version
+    options = _plan_options(routing_engine, clustering_method, balance_clusters)
+    cache_key = _generate_cache_key(delivery_date, rider_names, orders_version(delivery_date), options)
+    plan_key = _generate_cache_key(delivery_date, rider_names, None, options)
+    cached_plan = None if force_full else get_plan(delivery_date, cache_key)
+    if cached_plan is not None:
+        logger.info("Using cached route plan.")
+        return cached_plan
+
+    # Addresses resolved while waiting bump the orders version
+    pending_geocodes = _await_geocodes(delivery_date)
+    cache_key = _generate_cache_key(delivery_date, rider_names, orders_version(delivery_date), options)
+    inputs = _load_plan_inputs(delivery_date, rider_names)
+
+    # Fetch one origin + all-customers distance matrix for the whole plan
+    distance_matrix, distance_provider = distance_matrix_with_fallback([inputs.origin_latlng] + inputs.latlng_data)
+
+    # Reuse the last plan for these riders when only a few orders changed since
+    previous = None
+    if not force_full and not distance_provider.approximate:
+        previous = get_latest_plan(plan_key)
+    result, route_orders = _assemble_plan(
+        num_riders, delivery_date, inputs, distance_matrix, distance_provider,
+        routing_engine, clustering_method, balance_clusters, cancel_event, previous,
     )
+    result["pending_geocodes"] = pending_geocodes
+
+    # Plans built on estimated distances are not authoritative, so they are not cached
+    if distance_provider.approximate:
+        logger.warning("Route plan for %s used approximate distances; not caching.", delivery_date)
+        return result
+    # Nor are plans missing orders whose addresses are still being geocoded
+    if pending_geocodes:
+        logger.warning("Route plan for %s is missing %d customers still being geocoded; not caching.",
+                       delivery_date, len(pending_geocodes))
+        return result
+
+    # Save the result to the cache
+    store_plan(delivery_date, cache_key, result, plan_key=plan_key, route_orders=route_orders)
 
     return result
+
+def sweep_fleet_sizes(delivery_date, rider_names, rider_counts, routing_engine="cluster", clustering_method="kmeans",
+                      balance_clusters=False, chosen_num_riders=None, cancel_event=None):
+    """
+    Plan the same delivery date for several fleet sizes at once, sharing one
+    distance matrix, and compare them.
+
+    Each fleet size of k riders uses the k least-used riders in rider_names,
+    the ones plan_routes would favour. Sizes are planned in parallel and each
+    plan is cached, so a later plan_routes call for the chosen riders is a
+    cache hit.
+
+    Parameters:
+        delivery_date (str): Delivery date in YYYY-MM-DD format.
+        rider_names (list): The riders available, at least as many as the largest count.
+        rider_counts (list): Fleet sizes to compare.
+        routing_engine, clustering_method, balance_clusters: As for plan_routes.
+        chosen_num_riders (int, optional): Fleet size whose full plan is returned.
+            Defaults to the one with the shortest total distance.
+        cancel_event (threading.Event, optional): Set to abandon route solving early.
+
+    Returns:
+        dict: 'comparison' (one row per fleet size with its riders, total and
+            longest route distance, or the error that prevented planning it),
+            'chosen_num_riders', 'plan' (the full plan for that size) and
+            'pending_geocodes', as for plan_routes.
+
+    Raises:
+        ValueError: If the counts do not fit the riders, or the date cannot be planned at all.
+    """
+    rider_counts = sorted(set(rider_counts))
+    rider_names = list(dict.fromkeys(rider_names))
+    if not rider_counts or rider_counts[0] < 1 or rider_counts[-1] > len(rider_names):
+        raise ValueError("Rider counts must be between 1 and the number of rider names.")
+    if chosen_num_riders is not None and chosen_num_riders not in rider_counts:
+        raise ValueError("The chosen number of riders must be one of the rider counts.")
+
+    pending_geocodes = _await_geocodes(delivery_date)
+    inputs = _load_plan_inputs(delivery_date, rider_names)
+    distance_matrix, distance_provider = distance_matrix_with_fallback([inputs.origin_latlng] + inputs.latlng_data)
+    options = _plan_options(routing_engine, clustering_method, balance_clusters)
+    version = orders_version(delivery_date)
+    riders_by_use = [name for name, _ in sorted(inputs.rider_data.items(), key=lambda x: x[1])]
+
+    def plan_fleet(count):
+        riders = riders_by_use[:count]
+        cache_key = _generate_cache_key(delivery_date, riders, version, options)
+        try:
+            cached_plan = get_plan(delivery_date, cache_key)
+            if cached_plan is not None:
+                return riders, cached_plan
+            fleet_inputs = inputs._replace(rider_data={name: inputs.rider_data[name] for name in riders})
+            result, route_orders = _assemble_plan(
+                count, delivery_date, fleet_inputs, distance_matrix, distance_provider,
+                routing_engine, clustering_method, balance_clusters, cancel_event,
+            )
+            result["pending_geocodes"] = pending_geocodes
+            if not distance_provider.approximate and not pending_geocodes:
+                store_plan(
+                    delivery_date, cache_key, result,
+                    plan_key=_generate_cache_key(delivery_date, riders, None, options), route_orders=route_orders,
+                )
+            return riders, result
+        finally:
+            # Worker threads open their own database connections
+            connections.close_all()
+
+    workers = min(len(rider_counts), int(os.getenv('SWEEP_WORKERS', 4)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(count, executor.submit(plan_fleet, count)) for count in rider_counts]
+
+    comparison = []
+    plans = {}
+    for count, future in futures:
+        try:
+            riders, result = future.result()
+        except ValueError as e:
+            comparison.append({"num_riders": count, "rider_names": riders_by_use[:count], "error": str(e)})
+            continue
+        distances = [route["distance"] for route in result["routes"]]
+        plans[count] = result
+        comparison.append({
+            "num_riders": count,
+            "rider_names": riders,
+            "total_distance": float(sum(distances)),
+            "longest_route": float(max(distances)),
+            "shortest_route": float(min(distances)),
+        })
+
+    if not plans:
+        raise ValueError("None of the rider counts could be planned.")
+    if chosen_num_riders is None:
+        chosen_num_riders = min(plans, key=lambda count: sum(route["distance"] for route in plans[count]["routes"]))
+    elif chosen_num_riders not in plans:
+        raise ValueError(f"The plan for {chosen_num_riders} riders could not be computed.")
+
+    return {
+        "comparison": comparison,
+        "chosen_num_riders": chosen_num_riders,
+        "plan": plans[chosen_num_riders],
+        "distance_source": distance_provider.name,
+        "approximate_distances": distance_provider.approximate,
+        "pending_geocodes": pending_geocodes,
+    }
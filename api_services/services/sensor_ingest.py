@@ -0,0 +1,138 @@
+import json
+import logging
+import math
+import os
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from ..models import SensorData
+from ..utils.transactions import write_transaction
+from .sensor_rollups import add_to_rollups
+
+logger = logging.getLogger(__name__)
+
+_FLOAT_FIELDS = ('temperature', 'humidity', 'latitude', 'longitude')
+_TEXT_FIELDS = ('wake_source', 'box_status')
+_RANGES = {'latitude': (-90.0, 90.0), 'longitude': (-180.0, 180.0)}
+
+
+def parse_ndjson(body):
+    """
+    Split a newline-delimited JSON body into readings; blank lines are skipped.
+
+    Returns:
+        list: One item per line, or None for lines that are not valid JSON.
+    """
+    readings = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            readings.append(json.loads(line))
+        except ValueError:
+            readings.append(None)
+    return readings
+
+
+def _clean(reading, received_default):
+    """
+    Check one reading and build its SensorData row.
+
+    A plain dictionary walk instead of SensorDataSerializer, which costs far
+    more per reading than the INSERT it guards.
+
+    Returns:
+        tuple: (SensorData, None) or (None, errors) with errors keyed by field as in DRF.
+    """
+    if not isinstance(reading, dict):
+        return None, {"non_field_errors": ["Expected a JSON object."]}
+    errors = {}
+    values = {}
+
+    sensor_type = reading.get('sensor_type')
+    if not isinstance(sensor_type, str) or not sensor_type:
+        errors['sensor_type'] = ["This field is required."]
+    elif len(sensor_type) > 50:
+        errors['sensor_type'] = ["Ensure this field has no more than 50 characters."]
+    values['sensor_type'] = sensor_type
+
+    box_id = reading.get('box_id')
+    if box_id is not None and (not isinstance(box_id, str) or len(box_id) > 50):
+        errors['box_id'] = ["Expected a string of at most 50 characters."]
+    values['box_id'] = box_id or ''
+
+    for field in _FLOAT_FIELDS:
+        value = reading.get(field)
+        if value is None:
+            values[field] = None
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            errors[field] = ["A valid number is required."]
+            continue
+        try:
+            value = float(value)
+        except ValueError:
+            errors[field] = ["A valid number is required."]
+            continue
+        low, high = _RANGES.get(field, (-math.inf, math.inf))
+        if not math.isfinite(value) or not low <= value <= high:
+            errors[field] = ["Value is out of range."]
+            continue
+        values[field] = value
+
+    for field in _TEXT_FIELDS:
+        value = reading.get(field)
+        if value is not None and (not isinstance(value, str) or len(value) > 50):
+            errors[field] = ["Expected a string of at most 50 characters."]
+        values[field] = value
+
+    received_at = reading.get('received_at')
+    if received_at is None:
+        values['received_at'] = received_default
+    else:
+        try:
+            parsed = parse_datetime(received_at) if isinstance(received_at, str) else None
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            errors['received_at'] = ["Datetime has wrong format. Use ISO 8601."]
+        else:
+            values['received_at'] = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+    if errors:
+        return None, errors
+    return SensorData(**values), None
+
+
+def ingest_readings(readings):
+    """
+    Validate and store a batch of sensor readings.
+
+    Valid readings are written with bulk_create in chunks of
+    SENSOR_INGEST_CHUNK_SIZE and counted into the rollups, all in one
+    transaction; invalid ones are reported and skipped. Readings without
+    received_at get the time of the batch.
+
+    Parameters:
+        readings (list): Reading objects with the SensorData fields.
+
+    Returns:
+        tuple: (accepted count, rejects) where rejects lists {"index", "errors"} for each invalid reading.
+    """
+    received_default = timezone.now()
+    rows = []
+    rejects = []
+    for index, reading in enumerate(readings):
+        row, errors = _clean(reading, received_default)
+        if errors:
+            rejects.append({"index": index, "errors": errors})
+        else:
+            rows.append(row)
+
+    if rows:
+        with write_transaction():
+            SensorData.objects.bulk_create(rows, batch_size=int(os.getenv('SENSOR_INGEST_CHUNK_SIZE', 1000)))
+            # bulk_create skips the post_save signal that keeps single readings in the rollups
+            add_to_rollups(rows)
+    if rejects:
+        logger.info("Sensor batch: stored %d readings, rejected %d.", len(rows), len(rejects))
+    return len(rows), rejects
@@ -0,0 +1,243 @@
+import logging
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncHour, TruncMinute
+from ..models import SensorData, SensorHourRollup, SensorMinuteRollup
+from ..utils.transactions import write_transaction
+
+logger = logging.getLogger(__name__)
+
+# (name, model, bucket seconds, database truncation), finest first
+RESOLUTIONS = (
+    ('minute', SensorMinuteRollup, 60, TruncMinute),
+    ('hour', SensorHourRollup, 3600, TruncHour),
+)
+_METRICS = ('temperature', 'humidity')
+# Upsert statement of each rollup model, built on first use
+_UPSERT_SQL = {}
+
+
+def _bucket(moment, seconds):
+    """
+    Start of the UTC bucket of the given length that contains a moment.
+    """
+    timestamp = int(moment.timestamp())
+    return datetime.fromtimestamp(timestamp - timestamp % seconds, tz=dt_timezone.utc)
+
+
+def _empty_stats():
+    stats = {'count': 0}
+    for metric in _METRICS:
+        stats.update({f'{metric}_count': 0, f'{metric}_sum': 0.0, f'{metric}_min': None, f'{metric}_max': None})
+    return stats
+
+
+def _combine(stats, other):
+    """
+    Fold the stats of other into stats (both dicts or rollup rows, in the rollup field layout).
+    """
+    get = other.get if isinstance(other, dict) else lambda field: getattr(other, field)
+    stats['count'] += get('count')
+    for metric in _METRICS:
+        stats[f'{metric}_count'] += get(f'{metric}_count')
+        stats[f'{metric}_sum'] += get(f'{metric}_sum')
+        for field, pick in ((f'{metric}_min', min), (f'{metric}_max', max)):
+            value = get(field)
+            if value is not None:
+                stats[field] = value if stats[field] is None else pick(stats[field], value)
+    return stats
+
+
+def _reading_stats(reading):
+    stats = _empty_stats()
+    stats['count'] = 1
+    for metric in _METRICS:
+        value = getattr(reading, metric)
+        if value is not None:
+            stats.update({f'{metric}_count': 1, f'{metric}_sum': value, f'{metric}_min': value, f'{metric}_max': value})
+    return stats
+
+
+def _upsert_sql(model):
+    """
+    INSERT ... ON CONFLICT DO UPDATE adding one bucket's stats to a rollup row,
+    so writers never read the row first and concurrent ones add up instead of
+    overwriting each other.
+    """
+    sql = _UPSERT_SQL.get(model)
+    if sql is None:
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        fields = list(_empty_stats())
+        assignments = []
+        for field in fields:
+            current, new = f'{table}.{quote(field)}', f'excluded.{quote(field)}'
+            if field.endswith(('_min', '_max')):
+                # A NULL on either side keeps the other value
+                keep = '<=' if field.endswith('_min') else '>='
+                value = f'CASE WHEN {new} IS NULL OR {current} {keep} {new} THEN {current} ELSE {new} END'
+            else:
+                value = f'{current} + {new}'
+            assignments.append(f'{quote(field)} = {value}')
+        columns = ', '.join(quote(column) for column in ['box_id', 'bucket', *fields])
+        sql = _UPSERT_SQL[model] = (
+            f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * (len(fields) + 2))}) "
+            f"ON CONFLICT ({quote('box_id')}, {quote('bucket')}) DO UPDATE SET {', '.join(assignments)}"
+        )
+    return sql
+
+
+def _merge(model, groups):
+    """
+    Add per-bucket stats to a rollup table, creating missing buckets, with one upsert per bucket.
+    """
+    bucket_field = model._meta.get_field('bucket')
+    fields = list(_empty_stats())
+    params = [
+        [box_id, bucket_field.get_db_prep_value(bucket, connection), *(stats[field] for field in fields)]
+        for (box_id, bucket), stats in groups.items()
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(_upsert_sql(model), params)
+
+
+def add_to_rollups(readings):
+    """
+    Count new readings into the minute and hour rollups.
+
+    Called for every stored reading: by ingest_readings for batches and by a
+    post_save signal for readings saved one at a time. Readings edited or
+    deleted later are only corrected by rebuild_rollups.
+
+    Parameters:
+        readings (list): Stored SensorData instances.
+    """
+    if not readings:
+        return
+    # Every statement writes, so a plain transaction needs no up-front write lock
+    with transaction.atomic():
+        for _, model, seconds, _ in RESOLUTIONS:
+            groups = {}
+            for reading in readings:
+                key = (reading.box_id, _bucket(reading.received_at, seconds))
+                _combine(groups.setdefault(key, _empty_stats()), _reading_stats(reading))
+            _merge(model, groups)
+
+
+def rebuild_rollups(start, end, box_id=None):
+    """
+    Recompute the rollups of a time range from the raw readings.
+
+    The range is widened to whole hours so no bucket is left half counted.
+
+    Parameters:
+        start (datetime): Start of the range.
+        end (datetime): End of the range (exclusive).
+        box_id (str, optional): Only rebuild this box's rollups.
+
+    Returns:
+        dict: Rollup rows written per resolution name.
+    """
+    start = _bucket(start, 3600)
+    end = _bucket(end - timedelta(microseconds=1), 3600) + timedelta(hours=1)
+    readings = SensorData.objects.filter(received_at__gte=start, received_at__lt=end)
+    if box_id is not None:
+        readings = readings.filter(box_id=box_id)
+
+    aggregates = {'count': Count('id')}
+    for metric in _METRICS:
+        aggregates.update({
+            f'{metric}_count': Count(metric),
+            f'{metric}_sum': Sum(metric),
+            f'{metric}_min': Min(metric),
+            f'{metric}_max': Max(metric),
+        })
+
+    written = {}
+    with write_transaction():
+        for name, model, _, trunc in RESOLUTIONS:
+            stale = model.objects.filter(bucket__gte=start, bucket__lt=end)
+            if box_id is not None:
+                stale = stale.filter(box_id=box_id)
+            stale.delete()
+            rows = readings.annotate(bucket=trunc('received_at', tzinfo=dt_timezone.utc)).values(
+                'box_id', 'bucket',
+            ).annotate(**aggregates).order_by()
+            created = model.objects.bulk_create(
+                (model(**{**row, **{f'{metric}_sum': row[f'{metric}_sum'] or 0.0 for metric in _METRICS}})
+                 for row in rows.iterator()),
+                batch_size=500,
+            )
+            written[name] = len(created)
+    logger.info("Rebuilt sensor rollups from %s to %s: %s.", start, end, written)
+    return written
+
+
+def _point(time, stats):
+    point = {"time": time, "count": stats['count']}
+    for metric in _METRICS:
+        count = stats[f'{metric}_count']
+        point[metric] = {
+            "min": stats[f'{metric}_min'],
+            "max": stats[f'{metric}_max'],
+            "mean": stats[f'{metric}_sum'] / count if count else None,
+        }
+    return point
+
+
+def sensor_series(box_id, start, end, max_points):
+    """
+    Readings of one box over a time range, at the finest resolution that
+    stays within a point budget.
+
+    Raw readings are returned if there are few enough, then minute and hour
+    rollups. If even hourly buckets are too many, consecutive hours are merged
+    into wider buckets.
+
+    Parameters:
+        box_id (str): The box; '' for readings sent without a box id.
+        start (datetime): Start of the range.
+        end (datetime): End of the range (exclusive).
+        max_points (int): Most points to return.
+
+    Returns:
+        dict: 'resolution' ('raw', 'minute', 'hour' or 'N hours'), 'bucket_seconds'
+            (None for raw) and 'points', each with its time, reading count and
+            the min, max and mean temperature and humidity.
+    """
+    raw = SensorData.objects.filter(box_id=box_id, received_at__gte=start, received_at__lt=end)
+    if raw.count() <= max_points:
+        points = [_point(reading.received_at, _reading_stats(reading)) for reading in raw.order_by('received_at')]
+        return {"resolution": "raw", "bucket_seconds": None, "points": points}
+
+    for index, (name, model, seconds, _) in enumerate(RESOLUTIONS):
+        rows = model.objects.filter(box_id=box_id, bucket__gte=_bucket(start, seconds), bucket__lt=end)
+        coarsest = index == len(RESOLUTIONS) - 1
+        if not coarsest and rows.count() > max_points:
+            continue
+        rows = list(rows.order_by('bucket'))
+        if len(rows) <= max_points:
+            return {
+                "resolution": name,
+                "bucket_seconds": seconds,
+                "points": [_point(row.bucket, _combine(_empty_stats(), row)) for row in rows],
+            }
+
+        # Merge hours into buckets wide enough to fit the budget; aligned
+        # buckets can straddle both ends of the range, hence the loop
+        hours = math.ceil((end - start).total_seconds() / seconds / max_points)
+        while True:
+            width = seconds * hours
+            merged = {}
+            for row in rows:
+                _combine(merged.setdefault(_bucket(row.bucket, width), _empty_stats()), row)
+            if len(merged) <= max_points:
+                break
+            hours += 1
+        return {
+            "resolution": f"{hours} hours",
+            "bucket_seconds": width,
+            "points": [_point(bucket, stats) for bucket, stats in sorted(merged.items())],
+        }
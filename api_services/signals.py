@@ -0,0 +1,53 @@
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import CustomersData, OrdersData, SensorData
+from .services.distance_cache import invalidate_coordinate
+from .services.route_plan_cache import bump_orders_version
+from .services.sensor_rollups import add_to_rollups
+
+
+@receiver(pre_save, sender=CustomersData)
+def invalidate_moved_customer_distances(sender, instance, **kwargs):
+    """
+    Drop cached road distances for a customer's old coordinate when it changes,
+    and retire route plans for the dates the customer has orders on, also when
+    the customer gets its first coordinate.
+    """
+    if not instance.pk:
+        return
+    old_coordinate = CustomersData.objects.filter(pk=instance.pk).values_list('coordinate', flat=True).first()
+    if old_coordinate != instance.coordinate:
+        if old_coordinate:
+            invalidate_coordinate(old_coordinate)
+        # Unlinked orders are matched to customers by name when planning
+        orders = OrdersData.objects.filter(Q(customer=instance) | Q(customer__isnull=True, customer_name=instance.name))
+        bump_orders_version(*orders.values_list('delivery_date', flat=True).distinct())
+
+
+@receiver(pre_save, sender=OrdersData)
+def remember_previous_delivery_date(sender, instance, **kwargs):
+    """
+    Keep an order's stored delivery date so moving it retires plans for both dates.
+    """
+    instance._previous_delivery_date = None
+    if instance.pk:
+        instance._previous_delivery_date = (
+            OrdersData.objects.filter(pk=instance.pk).values_list('delivery_date', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=OrdersData)
+def bump_version_on_order_save(sender, instance, **kwargs):
+    bump_orders_version(instance.delivery_date, getattr(instance, '_previous_delivery_date', None))
+
+
+@receiver(post_delete, sender=OrdersData)
+def bump_version_on_order_delete(sender, instance, **kwargs):
+    bump_orders_version(instance.delivery_date)
+
+
+@receiver(post_save, sender=SensorData)
+def roll_up_new_reading(sender, instance, created, **kwargs):
+    if created:
+        add_to_rollups([instance])
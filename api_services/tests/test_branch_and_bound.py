@@ -0,0 +1,66 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from api_services.utils import branch_and_bound
+from api_services.utils.dynamic_programming import dp
+from api_services.utils.local_search import route_cost
+
+
+def _road_matrix(rng, n, symmetric):
+    """
+    Road distances in metres: detours over the straight line, one-way streets when asymmetric.
+    """
+    points = rng.uniform(0, 20000, size=(n, 2))
+    straight = np.hypot(*(points[:, None] - points[None]).transpose(2, 0, 1))
+    detour = rng.uniform(1.2, 1.6, size=(n, n))
+    if symmetric:
+        detour = np.triu(detour) + np.triu(detour, 1).T
+    matrix = np.round(straight * detour, 1)
+    np.fill_diagonal(matrix, 0)
+    return matrix
+
+
+class BranchAndBoundTests(SimpleTestCase):
+    def test_matches_held_karp(self):
+        rng = np.random.default_rng(3)
+        for stops in range(3, 13):
+            for symmetric in (True, False):
+                matrix = _road_matrix(rng, stops + 1, symmetric)
+                expected, _ = dp(matrix)
+                # A poor starting tour and a tiny tail table make the search branch and prune
+                for tail_entries in (branch_and_bound._TAIL_TABLE_ENTRIES, 0, 200):
+                    cost, sequence, stats = branch_and_bound.solve(
+                        matrix, time_limit=30, initial_tour=list(range(stops + 1)), tail_entries=tail_entries,
+                    )
+                    with self.subTest(stops=stops, symmetric=symmetric, tail_entries=tail_entries):
+                        self.assertTrue(stats["proven_optimal"])
+                        self.assertEqual(sequence[0], 0)
+                        self.assertEqual(sorted(sequence), list(range(stops + 1)))
+                        self.assertAlmostEqual(cost, route_cost(matrix, sequence), delta=1e-6)
+                        self.assertAlmostEqual(cost, expected, delta=1e-6)
+
+    def test_stopped_search_reports_a_valid_bound(self):
+        rng = np.random.default_rng(4)
+        for symmetric in (True, False):
+            matrix = _road_matrix(rng, 15, symmetric)
+            optimum, _ = dp(matrix)
+            cost, _, stats = branch_and_bound.solve(
+                matrix, node_limit=3, initial_tour=list(range(15)), tail_entries=200,
+            )
+            with self.subTest(symmetric=symmetric):
+                self.assertFalse(stats["proven_optimal"])
+                self.assertLessEqual(stats["lower_bound"], optimum + 1e-6)
+                self.assertGreaterEqual(cost, optimum - 1e-6)
+
+    def test_tail_table_completes_tours_exactly(self):
+        matrix = _road_matrix(np.random.default_rng(5), 9, symmetric=False)
+        tails = branch_and_bound._TailTable(matrix, max_entries=10 ** 6)
+        self.assertEqual(tails.size, 8)
+
+        full = (1 << 8) - 1
+        cost = min(matrix[0, city] + tails.cost(city, full ^ (1 << (city - 1))) for city in range(1, 9))
+        self.assertAlmostEqual(cost, dp(matrix)[0], delta=1e-6)
+        path = tails.path(3, full ^ (1 << 2))
+        self.assertEqual(sorted(path), [1, 2, 4, 5, 6, 7, 8])
+        self.assertAlmostEqual(route_cost(matrix, [0, 3, *path]) - matrix[0, 3],
+                               tails.cost(3, full ^ (1 << 2)), delta=1e-6)
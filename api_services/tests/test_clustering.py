@@ -0,0 +1,75 @@
+import os
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.cluster import KMeans
+
+from api_services.utils import clustering
+
+TOLERANCE = 0.01
+
+
+def _instance(seed):
+    """
+    Customers around a few hot spots in Bangkok with scattered outliers, plus
+    the centroids of an earlier plan for a different set of customers.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(30, 400))
+    n_clusters = int(rng.integers(2, 11))
+    low, high = [13.6, 100.4], [13.95, 100.75]
+    hot_spots = rng.uniform(low, high, size=(int(rng.integers(2, 12)), 2))
+    points = hot_spots[rng.integers(len(hot_spots), size=n)] + rng.normal(scale=rng.uniform(0.005, 0.05), size=(n, 2))
+    outliers = rng.random(n) < 0.3
+    points[outliers] = rng.uniform(low, high, size=(outliers.sum(), 2))
+
+    earlier = hot_spots[rng.integers(len(hot_spots), size=n)] + rng.normal(scale=0.03, size=(n, 2))
+    stale_centroids = KMeans(n_clusters=n_clusters, n_init=1, random_state=seed).fit(earlier).cluster_centers_
+    return points, n_clusters, stale_centroids
+
+
+def _inertia(points, centroids):
+    return ((points[:, None] - np.asarray(centroids)[None]) ** 2).sum(axis=-1).min(axis=1).sum()
+
+
+class FitClustersQualityTests(SimpleTestCase):
+    """
+    Early-stopped restarts must stay within the tolerance of the exhaustive
+    n_init=100 search they replaced.
+    """
+
+    def setUp(self):
+        environment = mock.patch.dict(os.environ)
+        environment.start()
+        self.addCleanup(environment.stop)
+        for name in ('CLUSTERING_RESTARTS', 'CLUSTERING_MIN_RESTARTS', 'CLUSTERING_PATIENCE',
+                     'CLUSTERING_MINIBATCH_THRESHOLD'):
+            os.environ.pop(name, None)
+
+    def assert_within_tolerance(self, init):
+        for seed in range(30):
+            points, n_clusters, stale_centroids = _instance(seed)
+            exhaustive = KMeans(n_clusters=n_clusters, n_init=100, random_state=0).fit(points).inertia_
+            _, centroids = clustering.fit_clusters(
+                points.tolist(), n_clusters,
+                init_centroids=stale_centroids if init == 'stale' else None, tolerance=TOLERANCE,
+            )
+            with self.subTest(seed=seed, customers=len(points), clusters=n_clusters):
+                self.assertLessEqual(_inertia(points, centroids), exhaustive * (1 + TOLERANCE))
+
+    def test_cold_start_matches_exhaustive_search(self):
+        self.assert_within_tolerance(init=None)
+
+    def test_stale_warm_start_matches_exhaustive_search(self):
+        self.assert_within_tolerance(init='stale')
+
+    def test_warm_start_alone_does_not_end_the_search(self):
+        points, n_clusters, _ = _instance(0)
+        exact = KMeans(n_clusters=n_clusters, n_init=100, random_state=0).fit(points).cluster_centers_
+
+        with mock.patch.object(clustering, 'KMeans', wraps=KMeans) as kmeans:
+            clustering.fit_clusters(points.tolist(), n_clusters, init_centroids=exact, tolerance=TOLERANCE)
+
+        restarts = [call for call in kmeans.call_args_list if isinstance(call.kwargs['init'], str)]
+        self.assertGreaterEqual(len(restarts), 16)
@@ -0,0 +1,98 @@
+import itertools
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api_services.utils.dynamic_programming import dp
+
+
+def _tour_cost(matrix, sequence):
+    return float(sum(matrix[a][b] for a, b in zip(sequence, sequence[1:] + [0])))
+
+
+def _brute_force(matrix):
+    n = len(matrix)
+    return min(_tour_cost(matrix, [0, *order]) for order in itertools.permutations(range(1, n)))
+
+
+def _held_karp_float64(matrix):
+    """
+    Optimal tour cost by Held-Karp in plain Python floats, as a double-precision reference.
+    """
+    n = len(matrix)
+    best = {(1 << j, j): matrix[0][j] for j in range(1, n)}
+    for size in range(2, n):
+        for subset in itertools.combinations(range(1, n), size):
+            mask = sum(1 << j for j in subset)
+            for j in subset:
+                best[mask, j] = min(best[mask ^ (1 << j), i] + matrix[i][j] for i in subset if i != j)
+    full = (1 << n) - 2
+    return min(best[full, j] + matrix[j][0] for j in range(1, n))
+
+
+def _road_matrix(rng, n, symmetric):
+    """
+    Road distances in metres as OSRM reports them: detours over the straight
+    line, one-way streets when asymmetric, rounded to 0.1 m.
+    """
+    points = rng.uniform(0, 40000, size=(n, 2))
+    straight = np.hypot(*(points[:, None] - points[None]).transpose(2, 0, 1))
+    detour = rng.uniform(1.2, 1.6, size=(n, n))
+    if symmetric:
+        detour = np.triu(detour) + np.triu(detour, 1).T
+    matrix = np.round(straight * detour, 1)
+    np.fill_diagonal(matrix, 0)
+    return matrix.tolist()
+
+
+def _integer_matrix(rng, n, symmetric):
+    """
+    Small integer costs, which give many tied tours.
+    """
+    matrix = rng.integers(1, 100, size=(n, n)).astype(float)
+    if symmetric:
+        matrix = np.triu(matrix, 1) + np.triu(matrix, 1).T
+    np.fill_diagonal(matrix, 0)
+    return matrix.tolist()
+
+
+class HeldKarpTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(1)
+        for n in range(3, 9):
+            for symmetric in (True, False):
+                for make_matrix in (_road_matrix, _integer_matrix) * 3:
+                    matrix = make_matrix(rng, n, symmetric)
+                    cost, sequence = dp(matrix)
+                    with self.subTest(n=n, symmetric=symmetric):
+                        self.assertEqual(sequence[0], 0)
+                        self.assertEqual(sorted(sequence), list(range(n)))
+                        self.assertAlmostEqual(cost, _tour_cost(matrix, sequence), places=6)
+                        self.assertAlmostEqual(cost, _brute_force(matrix), places=6)
+
+    def test_empty_matrix_is_rejected(self):
+        with self.assertRaises(ValueError):
+            dp([])
+
+    def test_single_city_is_an_empty_tour(self):
+        self.assertEqual(dp([[0]]), (0.0, [0]))
+
+    def test_two_cities_go_there_and_back(self):
+        self.assertEqual(dp([[0, 7.5], [4.25, 0]]), (11.75, [0, 1]))
+
+    def test_non_square_matrix_is_rejected(self):
+        with self.assertRaises(ValueError):
+            dp([[0, 1, 2], [1, 0, 3]])
+
+    def test_float32_tables_keep_the_optimal_road_tour(self):
+        # Tours of tens of kilometres summed in float32 drift by centimetres;
+        # that must not make the solver settle for a longer tour
+        rng = np.random.default_rng(2)
+        for case in range(40):
+            n = int(rng.integers(9, 13))
+            symmetric = case % 2 == 0
+            matrix = _road_matrix(rng, n, symmetric)
+            cost, sequence = dp(matrix)
+            with self.subTest(case=case, n=n, symmetric=symmetric):
+                self.assertAlmostEqual(cost, _tour_cost(matrix, sequence), delta=1e-6)
+                self.assertAlmostEqual(cost, _held_karp_float64(matrix), delta=1e-6)
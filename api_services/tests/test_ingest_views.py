@@ -0,0 +1,191 @@
+import os
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase
+
+from api_services.models import CustomersData, OrdersData, SensorData, SensorMinuteRollup
+from api_services.services.route_plan_cache import orders_version
+
+DATE = '2026-03-02'
+
+
+def _geocode(address, raise_errors=False):
+    """
+    Stands in for the geocoding API: one address fails, one is unknown, the rest are found.
+    """
+    if address.startswith('Timeout'):
+        raise RuntimeError("Geocoding request failed")
+    if address.startswith('Nowhere'):
+        return None, None
+    return 13.7 + len(address) / 1000, 100.5
+
+
+class IngestViewTestCase(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('dispatcher'))
+
+
+class OrderImportViewTests(IngestViewTestCase):
+    url = '/api/orders/import/'
+
+    def setUp(self):
+        super().setUp()
+        patches = [
+            mock.patch('api_services.services.order_import.geocode_cached', side_effect=_geocode),
+            mock.patch('api_services.services.order_import.enqueue_geocode'),
+        ]
+        self.geocode = patches[0].start()
+        self.enqueue_geocode = patches[1].start()
+        for patch in patches:
+            self.addCleanup(patch.stop)
+
+    def test_json_rows_are_reported_one_by_one(self):
+        rows = [
+            {'customer_name': 'Ann', 'address': '1 Rama IV Rd', 'product': 'vaccine box', 'delivery_date': DATE},
+            {'customer_name': 'Bob', 'address': '2 Silom Rd', 'delivery_date': DATE},
+            'not an order',
+            {'customer_name': 'Ann', 'address': '1 Rama IV Rd', 'product': 'ice packs', 'delivery_date': 'soon'},
+            {'customer_name': 'Ann', 'address': 'somewhere else', 'product': 'ice packs', 'delivery_date': DATE},
+        ]
+        response = self.client.post(self.url, rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['invalid']), (2, 3))
+        reports = response.data['rows']
+        self.assertEqual([report['row'] for report in reports], [1, 2, 3, 4, 5])
+        self.assertEqual([report['status'] for report in reports],
+                         ['created', 'invalid', 'invalid', 'invalid', 'created'])
+        self.assertIn('product', reports[1]['errors'])
+        self.assertIn('row', reports[2]['errors'])
+        self.assertIn('delivery_date', reports[3]['errors'])
+        # Both orders go to the one customer, geocoded once at the first row's address
+        self.assertEqual(reports[0]['customer_id'], reports[4]['customer_id'])
+        self.assertEqual(self.geocode.call_count, 1)
+        self.assertEqual(OrdersData.objects.count(), 2)
+        self.assertEqual(len({order.order_number for order in OrdersData.objects.all()}), 2)
+
+    def test_failed_geocode_leaves_the_customer_pending_and_queued(self):
+        rows = [
+            {'customer_name': 'Ann', 'address': 'Timeout Lane 1', 'product': 'vaccine box', 'delivery_date': DATE},
+            {'customer_name': 'Bob', 'address': 'Nowhere 2', 'product': 'vaccine box', 'delivery_date': DATE},
+            {'customer_name': 'Cat', 'address': '3 Sathorn Rd', 'product': 'vaccine box', 'delivery_date': DATE},
+        ]
+        response = self.client.post(self.url, rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        ann, bob, cat = (CustomersData.objects.get(name=name) for name in ('Ann', 'Bob', 'Cat'))
+        self.assertEqual((ann.geocode_status, ann.coordinate), (CustomersData.PENDING, None))
+        self.assertEqual((bob.geocode_status, bob.coordinate), (CustomersData.FAILED, None))
+        self.assertEqual(cat.geocode_status, CustomersData.RESOLVED)
+        self.assertEqual((cat.lat, cat.lng), _geocode('3 Sathorn Rd'))
+        self.enqueue_geocode.assert_called_once_with(ann.id)
+        reports = response.data['rows']
+        self.assertEqual(reports[0]['warning'], "Address is queued for geocoding.")
+        self.assertEqual(reports[1]['warning'], "Address could not be geocoded.")
+        self.assertNotIn('warning', reports[2])
+
+    def test_import_bumps_the_plan_version_once_per_date(self):
+        earlier = CustomersData.objects.create(name='Dan', address='Timeout Lane 4')
+        OrdersData.objects.create(customer=earlier, customer_name='Dan', address=earlier.address,
+                                  product='vaccine box', delivery_date='2026-03-01')
+        self.assertEqual(orders_version('2026-03-01'), 1)
+
+        rows = [{'customer_name': name, 'address': f'{i} Rama IV Rd', 'product': 'ice packs', 'delivery_date': DATE}
+                for i, name in enumerate(['Ann', 'Bob', 'Cat'])]
+        # Dan's address now resolves, which makes the earlier order plannable too
+        rows.append({'customer_name': 'Dan', 'address': 'Timeout Lane 4', 'product': 'ice packs',
+                     'delivery_date': '2026-03-03'})
+        self.geocode.side_effect = lambda address, raise_errors=False: (13.75, 100.55)
+        response = self.client.post(self.url, rows, format='json')
+
+        self.assertEqual(response.data['created'], 4)
+        self.assertEqual(orders_version(DATE), 1)
+        self.assertEqual(orders_version('2026-03-03'), 1)
+        self.assertEqual(orders_version('2026-03-01'), 2)
+
+    def test_csv_body_and_upload(self):
+        csv_text = ('\ufeffcustomer_name,address,product,delivery_date\n'
+                    'Ann,1 Rama IV Rd,vaccine box,2026-03-02\n'
+                    'Bob,2 Silom Rd,,2026-03-02\n'
+                    'Cat,3 Sathorn Rd,ice packs,\n')
+        response = self.client.post(self.url, csv_text.encode('utf-8'), content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([report['status'] for report in response.data['rows']], ['created', 'invalid', 'created'])
+        self.assertIn('product', response.data['rows'][1]['errors'])
+        self.assertIsNone(OrdersData.objects.get(customer_name='Cat').delivery_date)
+
+        upload = SimpleUploadedFile('orders.csv', csv_text.encode('utf-8'), content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['invalid']), (2, 1))
+        self.assertEqual(OrdersData.objects.count(), 4)
+        self.assertEqual(CustomersData.objects.count(), 2)
+
+    def test_rejected_payloads(self):
+        no_product = [{'customer_name': 'Ann', 'address': '1 Rama IV Rd'}]
+        self.assertEqual(self.client.post(self.url, no_product, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'customer_name': 'Ann'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, 'customer_name\n\xff'.encode('latin-1'),
+                                          content_type='text/csv').status_code, 400)
+        with mock.patch.dict(os.environ, {'ORDER_IMPORT_MAX_ROWS': '2'}):
+            response = self.client.post(self.url, no_product * 3, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(OrdersData.objects.count(), 0)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post(self.url, no_product, format='json').status_code, 401)
+
+
+class SensorBatchViewTests(IngestViewTestCase):
+    url = '/api/device-sensor/batch/'
+
+    def test_json_readings_are_reported_by_index(self):
+        readings = [
+            {'sensor_type': 'probe', 'box_id': 'box1', 'temperature': 4.5, 'humidity': 60,
+             'received_at': '2026-03-02T08:00:10+07:00'},
+            {'box_id': 'box1', 'temperature': 4.0},
+            {'sensor_type': 'probe', 'box_id': 'box1', 'temperature': 'warm', 'latitude': 123},
+            {'sensor_type': 'probe', 'box_id': 'box1', 'temperature': '5.5', 'received_at': '2026-03-02T08:00:50+07:00'},
+            {'sensor_type': 'probe', 'received_at': 'yesterday'},
+            7,
+        ]
+        response = self.client.post(self.url, readings, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['accepted'], response.data['rejected']), (2, 4))
+        rejects = {reject['index']: reject['errors'] for reject in response.data['rejects']}
+        self.assertEqual(sorted(rejects), [1, 2, 4, 5])
+        self.assertIn('sensor_type', rejects[1])
+        self.assertEqual(sorted(rejects[2]), ['latitude', 'temperature'])
+        self.assertIn('received_at', rejects[4])
+        self.assertIn('non_field_errors', rejects[5])
+
+        self.assertEqual(sorted(SensorData.objects.values_list('temperature', flat=True)), [4.5, 5.5])
+        rollup = SensorMinuteRollup.objects.get()
+        self.assertEqual((rollup.count, rollup.temperature_min, rollup.temperature_max), (2, 4.5, 5.5))
+
+    def test_ndjson_body(self):
+        body = ('{"sensor_type": "probe", "box_id": "box2", "temperature": 3.0}\n'
+                '\n'
+                '{"sensor_type": "probe", "box_id": \n'
+                '{"sensor_type": "probe", "box_id": "box2", "humidity": 70}\n')
+        response = self.client.post(self.url, body.encode('utf-8'), content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['accepted'], 2)
+        self.assertEqual(response.data['rejects'], [{'index': 1, 'errors': {'non_field_errors': ["Expected a JSON object."]}}])
+        self.assertEqual(SensorMinuteRollup.objects.get().count, 2)
+
+    def test_rejected_payloads(self):
+        self.assertEqual(self.client.post(self.url, [{'temperature': 4.0}], format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'sensor_type': 'probe'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, b'\xff\xfe', content_type='application/x-ndjson').status_code, 400)
+        with mock.patch.dict(os.environ, {'SENSOR_INGEST_MAX_ITEMS': '2'}):
+            response = self.client.post(self.url, [{'sensor_type': 'probe'}] * 3, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(SensorData.objects.count(), 0)
+        self.assertEqual(SensorMinuteRollup.objects.count(), 0)
@@ -0,0 +1,91 @@
+import itertools
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api_services.utils import k_medoids
+
+
+def _road_matrix(seed, n):
+    """
+    One-way road distances in metres between customers bunched around a few hot spots.
+    """
+    rng = np.random.default_rng(seed)
+    hot_spots = rng.uniform(0, 20000, size=(int(rng.integers(2, 6)), 2))
+    points = hot_spots[rng.integers(len(hot_spots), size=n)] + rng.normal(scale=rng.uniform(300, 3000), size=(n, 2))
+    straight = np.hypot(*(points[:, None] - points[None]).transpose(2, 0, 1))
+    matrix = np.round(straight * rng.uniform(1.2, 1.6, size=(n, n)), 1)
+    np.fill_diagonal(matrix, 0)
+    return matrix
+
+
+def _deviation(dist, medoids):
+    return dist[:, medoids].min(axis=1).sum()
+
+
+class FasterPamTests(SimpleTestCase):
+    def test_no_single_swap_improves_the_medoids(self):
+        for seed in range(8):
+            matrix = _road_matrix(seed, 60)
+            dist = (matrix + matrix.T) / 2.0
+            n_clusters = 2 + seed % 5
+            medoids = k_medoids.faster_pam(dist, n_clusters)
+            deviation = _deviation(dist, medoids)
+            with self.subTest(seed=seed, n_clusters=n_clusters):
+                self.assertEqual(len(set(medoids)), n_clusters)
+                self.assertLessEqual(deviation, _deviation(dist, k_medoids._build(dist, n_clusters)) + 1e-6)
+                for slot, candidate in itertools.product(range(n_clusters), range(len(dist))):
+                    if candidate in medoids:
+                        continue
+                    swapped = medoids[:slot] + [candidate] + medoids[slot + 1:]
+                    self.assertGreaterEqual(_deviation(dist, swapped), deviation - 1e-6)
+
+    def test_small_instances_reach_the_optimum(self):
+        for seed in range(6):
+            matrix = _road_matrix(100 + seed, 12)
+            dist = (matrix + matrix.T) / 2.0
+            optimum = min(_deviation(dist, list(medoids)) for medoids in itertools.combinations(range(12), 3))
+            with self.subTest(seed=seed):
+                self.assertAlmostEqual(_deviation(dist, k_medoids.faster_pam(dist, 3)), optimum, delta=1e-6)
+
+
+class ClusterTests(SimpleTestCase):
+    def test_unbalanced_assignment_uses_the_nearest_medoid(self):
+        for seed in range(6):
+            matrix = _road_matrix(200 + seed, 80)
+            dist = (matrix + matrix.T) / 2.0
+            groups = k_medoids.cluster(matrix, 5)
+            with self.subTest(seed=seed):
+                self.assertEqual(sorted(p for group in groups for p in group), list(range(80)))
+                medoids = k_medoids.faster_pam(dist, 5)
+                for medoid, group in zip(medoids, groups):
+                    self.assertIn(medoid, group)
+                    np.testing.assert_allclose(dist[group, medoid], dist[np.ix_(group, medoids)].min(axis=1))
+
+    def test_balanced_assignment_respects_max_size(self):
+        for seed in range(6):
+            matrix = _road_matrix(300 + seed, 80)
+            for max_size in (16, 18, 25):
+                groups = k_medoids.cluster(matrix, 5, max_size=max_size)
+                with self.subTest(seed=seed, max_size=max_size):
+                    self.assertEqual(sorted(p for group in groups for p in group), list(range(80)))
+                    self.assertTrue(all(1 <= len(group) <= max_size for group in groups))
+
+    def test_loose_max_size_matches_unbalanced(self):
+        matrix = _road_matrix(400, 50)
+        self.assertEqual(k_medoids.cluster(matrix, 4, max_size=50), k_medoids.cluster(matrix, 4))
+
+    def test_co_located_medoids_keep_their_own_cluster(self):
+        matrix = np.zeros((6, 6))
+        groups = k_medoids.cluster(matrix, 3)
+        self.assertTrue(all(groups))
+        self.assertEqual(sorted(p for group in groups for p in group), list(range(6)))
+
+    def test_invalid_sizes_are_rejected(self):
+        matrix = _road_matrix(500, 10)
+        with self.assertRaises(ValueError):
+            k_medoids.cluster(matrix, 11)
+        with self.assertRaises(ValueError):
+            k_medoids.cluster(np.zeros((0, 0)), 1)
+        with self.assertRaises(ValueError):
+            k_medoids.cluster(matrix, 3, max_size=3)
@@ -0,0 +1,89 @@
+import threading
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from api_services.models import OrderNumberCounter, OrdersData
+from api_services.models.orders_data import reserve_order_numbers
+
+# 09:00 in Bangkok on 2 March 2026, and just after midnight there the next day
+MORNING = datetime(2026, 3, 2, 2, 0, tzinfo=dt_timezone.utc)
+NEXT_DAY = datetime(2026, 3, 2, 17, 1, tzinfo=dt_timezone.utc)
+
+
+def _at(moment):
+    return mock.patch('api_services.models.orders_data.now', return_value=moment)
+
+
+class ReserveOrderNumbersTests(TestCase):
+    def test_reservations_are_contiguous(self):
+        with _at(MORNING):
+            self.assertEqual(reserve_order_numbers(1), ['ORD20260302-0001'])
+            self.assertEqual(reserve_order_numbers(3), ['ORD20260302-0002', 'ORD20260302-0003', 'ORD20260302-0004'])
+            order = OrdersData.objects.create(customer_name='Ann', address='1 Rama IV Rd', product='vaccine box')
+        self.assertEqual(order.order_number, 'ORD20260302-0005')
+        self.assertEqual(OrderNumberCounter.objects.get().last_number, 5)
+
+    def test_new_day_starts_its_own_counter(self):
+        with _at(MORNING):
+            reserve_order_numbers(2)
+        with _at(NEXT_DAY):
+            self.assertEqual(reserve_order_numbers(2), ['ORD20260303-0001', 'ORD20260303-0002'])
+        self.assertEqual(
+            list(OrderNumberCounter.objects.order_by('day').values_list('day', 'last_number')),
+            [(datetime(2026, 3, 2).date(), 2), (datetime(2026, 3, 3).date(), 2)],
+        )
+
+    def test_counter_created_concurrently_is_reused(self):
+        OrderNumberCounter.objects.create(day=datetime(2026, 3, 2).date(), last_number=7)
+        real_select_for_update = OrderNumberCounter.objects.select_for_update
+        lookups = []
+
+        def counter_not_there_yet():
+            # The first lookup runs before another writer's counter row is committed
+            lookups.append(None)
+            return OrderNumberCounter.objects.none() if len(lookups) == 1 else real_select_for_update()
+
+        with _at(MORNING), mock.patch.object(OrderNumberCounter.objects, 'select_for_update',
+                                             side_effect=counter_not_there_yet):
+            self.assertEqual(reserve_order_numbers(2), ['ORD20260302-0008', 'ORD20260302-0009'])
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(OrderNumberCounter.objects.get().last_number, 9)
+
+
+# The writers run in their own threads, so their transactions must really commit
+class ConcurrentReservationTests(TransactionTestCase):
+    def test_concurrent_reservations_never_overlap(self):
+        reserved = []
+        errors = []
+        lock = threading.Lock()
+
+        def writer(sizes):
+            try:
+                for size in sizes:
+                    numbers = reserve_order_numbers(size)
+                    with lock:
+                        reserved.append(numbers)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with _at(MORNING):
+            threads = [threading.Thread(target=writer, args=([1 + (i + j) % 4 for j in range(10)],))
+                       for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        numbers = [number for batch in reserved for number in batch]
+        self.assertEqual(sorted(numbers), [f'ORD20260302-{n:04d}' for n in range(1, len(numbers) + 1)])
+        # Every reservation is one unbroken run
+        for batch in reserved:
+            first = int(batch[0].rsplit('-', 1)[1])
+            self.assertEqual(batch, [f'ORD20260302-{n:04d}' for n in range(first, first + len(batch))])
+        self.assertEqual(OrderNumberCounter.objects.get().last_number, len(numbers))
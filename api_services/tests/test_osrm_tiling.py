@@ -0,0 +1,126 @@
+import json
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api_services.utils import traveling_salesman_problem
+
+
+class _OSRMTableHandler(BaseHTTPRequestHandler):
+    """
+    Answers /table/v1/<profile>/<lon,lat;...> like OSRM, with made-up but
+    asymmetric distances so transposed or misplaced tiles show up.
+    """
+    server_version = "StubOSRM"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            fail = server.failures_left > 0
+            if fail:
+                server.failures_left -= 1
+        if fail:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        url = urlsplit(self.path)
+        coordinates = [tuple(map(float, pair.split(','))) for pair in url.path.rsplit('/', 1)[-1].split(';')]
+        query = parse_qs(url.query)
+        sources = [int(i) for i in query['sources'][0].split(';')] if 'sources' in query else range(len(coordinates))
+        destinations = (
+            [int(i) for i in query['destinations'][0].split(';')] if 'destinations' in query else range(len(coordinates))
+        )
+        body = json.dumps({
+            "code": "Ok",
+            "distances": [[self.distance(coordinates[i], coordinates[j]) for j in destinations] for i in sources],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def distance(source, destination):
+        (lon1, lat1), (lon2, lat2) = source, destination
+        straight = math.hypot(lon2 - lon1, lat2 - lat1) * 111000
+        return round(straight * 1.3 + 1000 * lon1 + 10 * lat2, 1)
+
+
+class FetchDistanceMatrixTiledTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _OSRMTableHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.failures_left = 0
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        environment = mock.patch.dict(os.environ, {
+            'OSRM_IP': f"http://127.0.0.1:{self.server.server_address[1]}",
+            'OSRM_RETRIES': '3',
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        # The session keeps its retry settings, so give each test a fresh one
+        session = mock.patch.object(traveling_salesman_problem, '_session', None)
+        session.start()
+        self.addCleanup(session.stop)
+
+        rng = np.random.default_rng(7)
+        self.locations = [[13.7 + rng.random() * 0.1, 100.45 + rng.random() * 0.1] for _ in range(23)]
+
+    def test_tiles_assemble_into_the_full_table(self):
+        # 23 locations in tiles of 10 // 2 = 5: the last row and column of tiles are partial
+        expected = traveling_salesman_problem.fetch_distance_matrix(self.locations)
+        self.server.requests.clear()
+
+        tiled = traveling_salesman_problem.fetch_distance_matrix_tiled(self.locations, max_table_size=10)
+
+        np.testing.assert_array_equal(tiled, expected)
+        self.assertEqual(len(self.server.requests), 5 * 5)
+
+    def test_tiles_respect_sources_and_destinations(self):
+        sources = [22, 0, 5, 6, 7, 13, 21]
+        destinations = list(range(3, 20, 2))
+        expected = traveling_salesman_problem.fetch_distance_matrix(
+            self.locations, sources=sources, destinations=destinations,
+        )
+
+        tiled = traveling_salesman_problem.fetch_distance_matrix_tiled(
+            self.locations, sources=sources, destinations=destinations, max_table_size=6,
+        )
+
+        np.testing.assert_array_equal(tiled, expected)
+
+    def test_overloaded_server_is_retried(self):
+        expected = traveling_salesman_problem.fetch_distance_matrix(self.locations)
+        self.server.requests.clear()
+        self.server.failures_left = 1
+
+        tiled = traveling_salesman_problem.fetch_distance_matrix_tiled(self.locations, max_table_size=10)
+
+        np.testing.assert_array_equal(tiled, expected)
+        self.assertEqual(len(self.server.requests), 5 * 5 + 1)
+
+    def test_persistent_failure_raises(self):
+        self.server.failures_left = 100
+        os.environ['OSRM_RETRIES'] = '1'
+
+        with self.assertRaises(RuntimeError):
+            traveling_salesman_problem.fetch_distance_matrix_tiled(self.locations[:4], max_table_size=10)
@@ -0,0 +1,30 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from api_services.utils import polyline
+
+
+class PolylineTests(SimpleTestCase):
+    def test_reference_example(self):
+        # The worked example from the Encoded Polyline Algorithm Format documentation
+        points = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+        self.assertEqual(polyline.encode(points), '_p~iF~ps|U_ulLnnqC_mqNvxq`@')
+        self.assertEqual(polyline.decode('_p~iF~ps|U_ulLnnqC_mqNvxq`@'), points)
+
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        for precision in (5, 6):
+            # A route around Bangkok that returns to its origin, with a repeated stop
+            points = (rng.uniform([13.5, 100.3], [14.0, 100.9], size=(40, 2))).tolist()
+            points = points + [points[5], points[0]]
+            decoded = polyline.decode(polyline.encode(points, precision), precision)
+            with self.subTest(precision=precision):
+                self.assertEqual(len(decoded), len(points))
+                np.testing.assert_allclose(decoded, points, atol=0.5 / 10 ** precision + 1e-12)
+                self.assertEqual(polyline.encode(decoded, precision), polyline.encode(points, precision))
+
+    def test_empty_and_negative_coordinates(self):
+        self.assertEqual(polyline.encode([]), '')
+        self.assertEqual(polyline.decode(''), [])
+        points = [[-33.86882, 151.20929], [-33.86882, 151.20929], [0.0, -0.00001]]
+        self.assertEqual(polyline.decode(polyline.encode(points)), points)
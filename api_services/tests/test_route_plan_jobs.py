@@ -0,0 +1,115 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import TransactionTestCase
+
+from api_services.models import RoutePlanJob
+from api_services.services import route_plan_cache, route_plan_jobs
+
+DATE = '2026-03-02'
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class _FakePlanner:
+    """
+    Stands in for plan_routes: blocks until released or cancelled, recording its calls.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.cancelled = threading.Event()
+        self.returned = threading.Event()
+
+    def __call__(self, cancel_event=None, **parameters):
+        self.calls.append(parameters)
+        try:
+            while not self.release.wait(0.02):
+                if cancel_event.is_set():
+                    self.cancelled.set()
+                    raise RuntimeError("Route planning was cancelled")
+            return {"routes": [], "rider_names": parameters["rider_names"]}
+        finally:
+            self.returned.set()
+
+
+# Worker threads need committed rows, so these tests run outside a test transaction
+class RoutePlanJobTests(TransactionTestCase):
+    def setUp(self):
+        route_plan_cache._memory_cache.clear()
+        self.planner = _FakePlanner()
+        patch = mock.patch.object(route_plan_jobs, 'plan_routes', self.planner)
+        patch.start()
+        self.addCleanup(patch.stop)
+        # Never leave a worker thread blocked past the test
+        self.addCleanup(self.planner.release.set)
+
+    def status(self, job):
+        return RoutePlanJob.objects.get(pk=job.pk).status
+
+    def test_identical_requests_share_one_job(self):
+        job, created = route_plan_jobs.submit_plan(2, DATE, ['ann', 'bob'])
+        self.assertTrue(created)
+        self.assertTrue(_wait_for(lambda: self.status(job) == RoutePlanJob.RUNNING))
+
+        joined, created = route_plan_jobs.submit_plan(2, DATE, ['bob', 'ann'])
+        self.assertFalse(created)
+        self.assertEqual(joined.pk, job.pk)
+
+        self.planner.release.set()
+        self.assertTrue(_wait_for(lambda: self.status(job) == RoutePlanJob.DONE))
+        self.assertEqual(len(self.planner.calls), 1)
+        self.assertEqual(RoutePlanJob.objects.get(pk=job.pk).result_json["rider_names"], ['ann', 'bob'])
+
+    def test_different_riders_get_their_own_job(self):
+        self.planner.release.set()
+        first, _ = route_plan_jobs.submit_plan(2, DATE, ['ann', 'bob'])
+        second, created = route_plan_jobs.submit_plan(2, DATE, ['ann', 'cat'])
+        self.assertTrue(created)
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertTrue(_wait_for(
+            lambda: RoutePlanJob.objects.filter(status=RoutePlanJob.DONE).count() == 2
+        ), list(RoutePlanJob.objects.values_list('status', 'error')))
+
+    def test_cancelling_stops_the_run_for_every_requester(self):
+        job, _ = route_plan_jobs.submit_plan(2, DATE, ['ann', 'bob'])
+        self.assertTrue(_wait_for(lambda: self.status(job) == RoutePlanJob.RUNNING))
+        joined, _ = route_plan_jobs.submit_plan(2, DATE, ['ann', 'bob'])
+
+        cancelled = route_plan_jobs.cancel_job(joined.pk)
+        self.assertEqual(cancelled.status, RoutePlanJob.CANCELLED)
+        # The watcher polls once a second
+        self.assertTrue(self.planner.cancelled.wait(3))
+        self.assertTrue(self.planner.returned.wait(1))
+        job = RoutePlanJob.objects.get(pk=job.pk)
+        self.assertEqual((job.status, job.result_json), (RoutePlanJob.CANCELLED, None))
+
+        # The plan's key is free again for a new computation
+        self.planner.release.set()
+        retry, created = route_plan_jobs.submit_plan(2, DATE, ['ann', 'bob'])
+        self.assertTrue(created)
+        self.assertNotEqual(retry.pk, job.pk)
+        self.assertTrue(_wait_for(lambda: self.status(retry) == RoutePlanJob.DONE))
+
+    def test_job_cancelled_before_it_starts_never_runs(self):
+        job = RoutePlanJob.objects.create(cache_key='key', delivery_date=DATE, parameters={})
+        route_plan_jobs.cancel_job(job.pk)
+        route_plan_jobs._run_job(job.pk)
+        self.assertEqual(self.planner.calls, [])
+        self.assertEqual(self.status(job), RoutePlanJob.CANCELLED)
+
+    def test_finished_job_cannot_be_cancelled(self):
+        self.planner.release.set()
+        job, _ = route_plan_jobs.submit_plan(2, DATE, ['ann', 'bob'])
+        self.assertTrue(_wait_for(lambda: self.status(job) == RoutePlanJob.DONE))
+        self.assertEqual(route_plan_jobs.cancel_job(job.pk).status, RoutePlanJob.DONE)
+        self.assertIsNone(route_plan_jobs.cancel_job('00000000-0000-0000-0000-000000000000'))
@@ -0,0 +1,72 @@
+import gzip
+import json
+
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+
+from api_services.services import route_plan_cache
+from api_services.services.route_plan_cache import render_plan, store_plan
+from api_services.services.route_planner_service import plan_cache_key
+from api_services.utils import polyline
+
+DATE = '2026-03-02'
+DEPOT = [13.7563, 100.5018]
+STOPS = [[13.72, 100.52], [13.74, 100.56], [13.79, 100.55]]
+PLAN = {
+    "deliveries": [{"customer_name": f"customer {i}", "latlng": f"{lat},{lng}"} for i, (lat, lng) in enumerate(STOPS)],
+    "latlng": STOPS,
+    "clusters": [[DEPOT, STOPS[0], STOPS[1], DEPOT], [DEPOT, STOPS[2], DEPOT]],
+    "routes": [
+        {"rider_name": "ann", "route": [DEPOT, STOPS[1], STOPS[0], DEPOT], "distance": 9100.0},
+        {"rider_name": "bob", "route": [DEPOT, STOPS[2], DEPOT], "distance": 10200.0},
+    ],
+    "plan_mode": "full",
+}
+
+
+class RoutePlannerResponseTests(APITestCase):
+    url = f'/api/route-planner/?num_riders=2&delivery_date={DATE}&rider_names=ann&rider_names=bob'
+
+    def setUp(self):
+        route_plan_cache._memory_cache.clear()
+        self.client.force_authenticate(User.objects.create_user('dispatcher'))
+        store_plan(DATE, plan_cache_key(DATE, ['ann', 'bob']), PLAN)
+        self.etag = render_plan(PLAN).etag
+
+    def test_encodings_have_their_own_etags(self):
+        compressed = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(compressed.status_code, 200)
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed['ETag'], f'"{self.etag}-gzip"')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(compressed.content)), PLAN)
+
+        identity = self.client.get(self.url)
+        self.assertEqual(identity.status_code, 200)
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        self.assertEqual(identity['ETag'], f'"{self.etag}"')
+        self.assertIn('Accept-Encoding', identity['Vary'])
+        self.assertEqual(json.loads(identity.content), PLAN)
+
+    def test_not_modified_only_for_the_same_representation(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=f'"{self.etag}-gzip"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], f'"{self.etag}-gzip"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.etag}"')
+        self.assertEqual(response.status_code, 304)
+
+        # A cached uncompressed copy does not validate the compressed body, nor the other way round
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=f'"{self.etag}"')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.etag}-gzip"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_compact_routes_carry_their_polylines(self):
+        response = self.client.get(self.url + '&response_format=compact')
+        compact = json.loads(response.content)
+        self.assertEqual(response['ETag'], f'"{render_plan(PLAN, compact=True).etag}"')
+        for route, original in zip(compact["routes"], PLAN["routes"]):
+            self.assertEqual([compact["coordinates"][i] for i in route["stops"]], original["route"])
+            self.assertEqual(polyline.decode(route["polyline"]), original["route"])
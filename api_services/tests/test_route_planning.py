@@ -0,0 +1,208 @@
+import os
+from datetime import date
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase
+
+from api_services.models import CustomersData, OrdersData, OriginData, RiderHistoryData, RoadDistance
+from api_services.services import distance_cache, route_plan_cache, route_planner_service
+from api_services.services.distance_cache import coordinate_key, get_distance_matrix
+from api_services.services.distance_providers import CachedDistanceProvider
+from api_services.services.order_import import import_orders
+from api_services.services.route_plan_cache import get_latest_plan, orders_version
+from api_services.utils.haversine import haversine_matrix
+
+DATE = '2026-03-02'
+RIDERS = ['ann', 'bob', 'cat']
+
+
+def _fake_osrm(locations, timeout=10, sources=None, destinations=None, profile='cycling'):
+    """
+    Stands in for the OSRM table service: great-circle distances with a road factor.
+    """
+    matrix = haversine_matrix([[float(lat), float(lng)] for lat, lng in locations]) * 1.3
+    rows = range(len(locations)) if sources is None else sources
+    cols = range(len(locations)) if destinations is None else destinations
+    return matrix[np.ix_(list(rows), list(cols))]
+
+
+def _cached_distances(locations):
+    # The real provider runs in a worker thread, which cannot see the test transaction
+    return get_distance_matrix(locations), CachedDistanceProvider()
+
+
+class PlanningTestCase(TestCase):
+    def setUp(self):
+        route_plan_cache._memory_cache.clear()
+        distance_cache._memory_cache.clear()
+        patches = [
+            mock.patch.object(distance_cache.traveling_salesman_problem, 'fetch_distance_matrix_tiled',
+                              side_effect=_fake_osrm),
+            mock.patch.object(route_planner_service, 'distance_matrix_with_fallback', _cached_distances),
+            mock.patch.dict(os.environ, {'TSP_WORKERS': '1', 'TSP_TIME_BUDGET': '0.2'}),
+        ]
+        self.osrm = patches[0].start()
+        for patch in patches[1:]:
+            patch.start()
+        for patch in patches:
+            self.addCleanup(patch.stop)
+
+    def add_order(self, index, delivery_date=DATE):
+        rng = np.random.default_rng(index)
+        lat, lng = 13.70 + rng.random() * 0.1, 100.45 + rng.random() * 0.1
+        customer = CustomersData.objects.create(name=f'customer {index}', address=f'{index} Sukhumvit Rd',
+                                                coordinate=f'{lat:.6f},{lng:.6f}')
+        return OrdersData.objects.create(customer=customer, customer_name=customer.name, address=customer.address,
+                                         product='vaccine box', delivery_date=delivery_date)
+
+
+class OrdersVersionTests(PlanningTestCase):
+    def test_order_save_and_delete_bump_the_version(self):
+        self.assertEqual(orders_version(DATE), 0)
+        order = self.add_order(1)
+        self.assertEqual(orders_version(DATE), 1)
+        key = route_planner_service.plan_cache_key(DATE, RIDERS)
+
+        order.product = 'ice packs'
+        order.save()
+        self.assertEqual(orders_version(DATE), 2)
+        self.assertNotEqual(route_planner_service.plan_cache_key(DATE, RIDERS), key)
+
+        order.delivery_date = date(2026, 3, 3)
+        order.save()
+        self.assertEqual((orders_version(DATE), orders_version('2026-03-03')), (3, 1))
+
+        order.delete()
+        self.assertEqual((orders_version(DATE), orders_version('2026-03-03')), (3, 2))
+
+    def test_import_bumps_the_version_of_every_date(self):
+        self.add_order(1)
+        rows = [
+            {'customer_name': 'customer 1', 'address': '1 Sukhumvit Rd', 'product': 'a', 'delivery_date': DATE},
+            {'customer_name': 'new customer', 'address': '9 Silom Rd', 'product': 'b', 'delivery_date': '2026-03-04'},
+            {'customer_name': 'no product', 'address': '9 Silom Rd', 'delivery_date': '2026-03-05'},
+        ]
+        with mock.patch('api_services.services.order_import.geocode_cached', return_value=(13.72, 100.52)):
+            reports = import_orders(rows)
+        self.assertEqual([report['status'] for report in reports], ['created', 'created', 'invalid'])
+        self.assertEqual(orders_version(DATE), 2)
+        self.assertEqual(orders_version('2026-03-04'), 1)
+        self.assertEqual(orders_version('2026-03-05'), 0)
+
+    def test_moving_a_customer_bumps_the_dates_of_its_orders(self):
+        order = self.add_order(1)
+        self.add_order(2, delivery_date='2026-03-03')
+        order.customer.address = 'same place, new spelling'
+        order.customer.save()
+        self.assertEqual(orders_version(DATE), 1)
+
+        order.customer.coordinate = '13.800000,100.600000'
+        order.customer.save()
+        self.assertEqual((orders_version(DATE), orders_version('2026-03-03')), (2, 1))
+
+
+class MovedCustomerDistanceTests(PlanningTestCase):
+    def test_moved_customer_invalidates_its_distance_rows(self):
+        origin = [13.7563, 100.5018]
+        orders = [self.add_order(i) for i in range(3)]
+        customers = [order.customer for order in orders]
+        locations = [origin] + [customer.coordinate.split(',') for customer in customers]
+        first = get_distance_matrix(locations)
+        self.assertEqual(RoadDistance.objects.count(), 12)
+
+        old_key = coordinate_key(customers[1].coordinate)
+        customers[1].coordinate = '13.810000,100.610000'
+        customers[1].save()
+        self.assertFalse(RoadDistance.objects.filter(from_coordinate=old_key).exists())
+        self.assertFalse(RoadDistance.objects.filter(to_coordinate=old_key).exists())
+        self.assertEqual(RoadDistance.objects.count(), 6)
+
+        self.osrm.reset_mock()
+        locations[2] = customers[1].coordinate.split(',')
+        moved = get_distance_matrix(locations)
+        # Only the moved customer's row and column are fetched again
+        _, kwargs = self.osrm.call_args
+        self.assertEqual((kwargs['sources'], kwargs['destinations']), ([0, 1, 2, 3], [0, 1, 2, 3]))
+        self.assertEqual(RoadDistance.objects.count(), 12)
+        np.testing.assert_allclose(np.delete(np.delete(moved, 2, 0), 2, 1), np.delete(np.delete(first, 2, 0), 2, 1))
+        np.testing.assert_allclose(moved, _fake_osrm(locations))
+
+
+class IncrementalReplanTests(PlanningTestCase):
+    def setUp(self):
+        super().setUp()
+        OriginData.objects.create(name='Depot', address='Rama IV Rd', latlng='13.7563,100.5018')
+        for i, rider in enumerate(RIDERS):
+            RiderHistoryData.objects.create(rider_name=rider, total_distance=100.0 * i)
+        self.orders = [self.add_order(i) for i in range(30)]
+
+    def plan(self, **kwargs):
+        result = route_planner_service.plan_routes(len(RIDERS), DATE, RIDERS, **kwargs)
+        plan_key = route_planner_service._generate_cache_key(DATE, RIDERS, None, {})
+        _, route_orders = get_latest_plan(plan_key)
+        return result, route_orders
+
+    def assert_covers(self, result, route_orders, order_ids):
+        self.assertEqual(sorted(o for orders in route_orders for o in orders), sorted(order_ids))
+        located = {order.id: [order.customer.lat, order.customer.lng]
+                   for order in OrdersData.objects.filter(id__in=order_ids).select_related('customer')}
+        for route, orders in zip(result['routes'], route_orders):
+            self.assertEqual(route['route'][1:-1], [located[o] for o in orders])
+
+    def test_incremental_result_covers_the_same_orders_as_a_full_replan(self):
+        first, route_orders = self.plan()
+        self.assertEqual(first['plan_mode'], 'full')
+        self.assert_covers(first, route_orders, [order.id for order in self.orders])
+
+        self.orders.pop(4).delete()
+        self.orders += [self.add_order(100), self.add_order(101)]
+        order_ids = [order.id for order in self.orders]
+
+        result, route_orders = self.plan()
+        self.assertEqual(result['plan_mode'], 'incremental')
+        # Riders keep their routes
+        self.assertEqual([route['rider_name'] for route in result['routes']],
+                         [route['rider_name'] for route in first['routes']])
+        self.assert_covers(result, route_orders, order_ids)
+
+        full, full_route_orders = self.plan(force_full=True)
+        self.assertEqual(full['plan_mode'], 'full')
+        self.assert_covers(full, full_route_orders, order_ids)
+
+    def test_too_many_changes_fall_back_to_a_full_plan(self):
+        self.plan()
+        for order in self.orders[:10]:
+            order.delete()
+        result, route_orders = self.plan()
+        self.assertEqual(result['plan_mode'], 'full')
+        self.assert_covers(result, route_orders, [order.id for order in self.orders[10:]])
+
+
+class PlanInputsTests(PlanningTestCase):
+    def test_orders_that_cannot_be_planned_are_reported(self):
+        OriginData.objects.create(name='Depot', address='Rama IV Rd', latlng='13.7563,100.5018')
+        RiderHistoryData.objects.create(rider_name='ann')
+        located = self.add_order(1)
+        CustomersData.objects.create(name='Pending', address='1 Silom Rd')
+        failed = CustomersData.objects.create(name='Failed', address='Nowhere')
+        CustomersData.objects.filter(pk=failed.pk).update(geocode_status=CustomersData.FAILED)
+        for name in ('Pending', 'Failed', 'Unknown'):
+            OrdersData.objects.create(customer_name=name, address=f'{name} address', product='ice packs',
+                                      delivery_date=DATE)
+
+        inputs = route_planner_service._load_plan_inputs(DATE, ['ann'])
+
+        self.assertEqual(inputs.order_ids, [located.id])
+        self.assertEqual(inputs.latlng_data, [(located.customer.lat, located.customer.lng)])
+        base = {"product": "ice packs", "delivery_date": DATE, "origin": "Depot", "latlng": None}
+        self.assertEqual(inputs.delivery_data, [
+            {**base, "customer_name": "customer 1", "address": "1 Sukhumvit Rd", "product": "vaccine box",
+             "latlng": located.customer.coordinate},
+            {**base, "customer_name": "Pending", "address": "Pending address",
+             "error": "Customer address is still being geocoded for Pending"},
+            {**base, "customer_name": "Failed", "address": "Failed address",
+             "error": "Customer coordinate not resolved for Failed"},
+            {**base, "customer_name": "Unknown", "address": "Unknown address",
+             "error": "Customer data not found for Unknown"},
+        ])
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+
+from api_services.models import SensorData, SensorHourRollup, SensorMinuteRollup
+from api_services.services.sensor_ingest import ingest_readings
+from api_services.services.sensor_rollups import rebuild_rollups
+
+START = datetime(2026, 3, 1, 8, 0, tzinfo=dt_timezone.utc)
+
+
+def _rows(model):
+    return sorted(
+        (row.box_id, row.bucket, row.count, row.temperature_count, round(row.temperature_sum, 6),
+         row.temperature_min, row.temperature_max, row.humidity_count, round(row.humidity_sum, 6),
+         row.humidity_min, row.humidity_max)
+        for row in model.objects.all()
+    )
+
+
+class IncrementalRollupTests(TestCase):
+    def readings(self):
+        # Two boxes over two hours, with gaps in both metrics
+        for i in range(150):
+            yield {
+                'sensor_type': 'probe',
+                'box_id': f'box{i % 2}',
+                'temperature': None if i % 7 == 0 else 2.0 + (i * 37 % 11) / 2,
+                'humidity': None if i % 5 == 0 else 55.0 + (i * 13 % 17),
+                'received_at': START + timedelta(seconds=47 * i),
+            }
+
+    def assert_matches_rebuild(self):
+        incremental = {model: _rows(model) for model in (SensorMinuteRollup, SensorHourRollup)}
+        rebuild_rollups(START, START + timedelta(hours=3))
+        for model, rows in incremental.items():
+            self.assertEqual(rows, _rows(model), model.__name__)
+
+    def test_single_saves_match_rebuild(self):
+        for reading in self.readings():
+            SensorData.objects.create(**reading)
+        self.assertEqual(SensorHourRollup.objects.count(), 4)
+        self.assert_matches_rebuild()
+
+    def test_batches_and_single_saves_add_up(self):
+        readings = list(self.readings())
+        for start in range(0, 100, 30):
+            ingest_readings([{**reading, 'received_at': reading['received_at'].isoformat()}
+                             for reading in readings[start:start + 30]])
+        for reading in readings[120:]:
+            SensorData.objects.create(**reading)
+        self.assertEqual(SensorData.objects.count(), 150)
+        self.assert_matches_rebuild()
+
+    def test_missing_values_keep_existing_extremes(self):
+        SensorData.objects.create(sensor_type='probe', temperature=4.0, humidity=None, received_at=START)
+        SensorData.objects.create(sensor_type='probe', temperature=None, humidity=60.0, received_at=START)
+        SensorData.objects.create(sensor_type='probe', temperature=3.0, humidity=None, received_at=START)
+
+        row = SensorMinuteRollup.objects.get()
+        self.assertEqual((row.count, row.temperature_count, row.humidity_count), (3, 2, 1))
+        self.assertEqual((row.temperature_min, row.temperature_max), (3.0, 4.0))
+        self.assertEqual((row.humidity_min, row.humidity_max), (60.0, 60.0))
@@ -0,0 +1,58 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api_services.utils import solver_pool
+
+
+class SolveClustersTests(SimpleTestCase):
+    """
+    The process pool is swapped for threads so that the solver can be faked.
+    """
+
+    def setUp(self):
+        self.pool = ThreadPoolExecutor(max_workers=4)
+        self.release = threading.Event()
+        self.addCleanup(self.pool.shutdown)
+        self.addCleanup(self.release.set)
+        patches = [
+            mock.patch.object(solver_pool, 'get_pool', return_value=self.pool),
+            mock.patch.object(solver_pool.traveling_salesman_problem, 'process_tsp', side_effect=self.solve),
+            mock.patch.dict(os.environ, {'TSP_WORKERS': '4'}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def solve(self, origin, route, distance_matrix=None):
+        if route == 'broken':
+            raise ValueError("Distance matrix contains invalid values.")
+        if route == 'slow':
+            self.release.wait(10)
+        return route, 1.0, {"solver": "held_karp", "optimality_gap": 0.0}
+
+    def test_results_keep_cluster_order(self):
+        results = solver_pool.solve_clusters([0, 0], ['a', 'b', 'c'], [None] * 3)
+        self.assertEqual([route for route, _, _ in results], ['a', 'b', 'c'])
+
+    def test_failed_cluster_fails_fast(self):
+        started = time.monotonic()
+        with self.assertRaises(ValueError):
+            solver_pool.solve_clusters([0, 0], ['slow', 'broken', 'slow'], [None] * 3)
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_cancel_event_abandons_pending_clusters(self):
+        cancel_event = threading.Event()
+        threading.Timer(0.2, cancel_event.set).start()
+        started = time.monotonic()
+        with self.assertRaises(RuntimeError):
+            solver_pool.solve_clusters([0, 0], ['slow', 'slow'], [None] * 2, cancel_event=cancel_event)
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_timeout(self):
+        with self.assertRaises(TimeoutError):
+            solver_pool.solve_clusters([0, 0], ['slow', 'a'], [None] * 2, timeout=0.3)
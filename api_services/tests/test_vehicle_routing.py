@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api_services.utils import vehicle_routing
+from api_services.utils.local_search import route_cost
+
+
+def _road_matrix(rng, n, symmetric):
+    """
+    Road distances in metres around a depot at index 0, some customers
+    bunched into hot spots so that savings builds very uneven routes.
+    """
+    hot_spots = rng.uniform(0, 20000, size=(3, 2))
+    points = rng.uniform(0, 20000, size=(n, 2))
+    bunched = rng.random(n) < 0.6
+    points[bunched] = hot_spots[rng.integers(3, size=bunched.sum())] + rng.normal(scale=800, size=(bunched.sum(), 2))
+    straight = np.hypot(*(points[:, None] - points[None]).transpose(2, 0, 1))
+    detour = rng.uniform(1.2, 1.6, size=(n, n))
+    if symmetric:
+        detour = np.triu(detour) + np.triu(detour, 1).T
+    matrix = np.round(straight * detour, 1)
+    np.fill_diagonal(matrix, 0)
+    return matrix
+
+
+class VehicleRoutingTests(SimpleTestCase):
+    def assert_valid_plan(self, matrix, routes, n_vehicles, min_stops, max_stops):
+        self.assertEqual(len(routes), n_vehicles)
+        visited = [customer for _, sequence in routes for customer in sequence[1:]]
+        self.assertEqual(sorted(visited), list(range(1, len(matrix))))
+        for cost, sequence in routes:
+            self.assertEqual(sequence[0], 0)
+            self.assertGreaterEqual(len(sequence) - 1, min_stops)
+            self.assertLessEqual(len(sequence) - 1, max_stops)
+            self.assertAlmostEqual(cost, route_cost(matrix, sequence), delta=1e-6)
+
+    def test_routes_cover_every_customer_once_within_slack(self):
+        for seed, (customers, n_vehicles) in enumerate([(200, 10), (120, 7), (45, 4), (9, 3)]):
+            for symmetric in (True, False):
+                matrix = _road_matrix(np.random.default_rng(seed), customers + 1, symmetric)
+                routes = vehicle_routing.solve(matrix, n_vehicles, time_limit=1.0)
+                share = customers / n_vehicles
+                with self.subTest(customers=customers, n_vehicles=n_vehicles, symmetric=symmetric):
+                    self.assert_valid_plan(matrix, routes, n_vehicles,
+                                           max(1, math.floor(share * 0.75)), math.ceil(share * 1.25))
+
+    def test_explicit_size_limits(self):
+        matrix = _road_matrix(np.random.default_rng(7), 61, symmetric=False)
+        routes = vehicle_routing.solve(matrix, 6, time_limit=0.5, min_stops=10, max_stops=10)
+        self.assert_valid_plan(matrix, routes, 6, 10, 10)
+
+    def test_as_many_vehicles_as_customers(self):
+        matrix = _road_matrix(np.random.default_rng(8), 6, symmetric=True)
+        routes = vehicle_routing.solve(matrix, 5, time_limit=0.5)
+        self.assert_valid_plan(matrix, routes, 5, 1, 1)
+
+    def test_unreachable_size_limits_are_rejected(self):
+        matrix = _road_matrix(np.random.default_rng(9), 21, symmetric=True)
+        with self.assertRaises(ValueError):
+            vehicle_routing.solve(matrix, 4, min_stops=6)
+        with self.assertRaises(ValueError):
+            vehicle_routing.solve(matrix, 4, max_stops=4)
+        with self.assertRaises(ValueError):
+            vehicle_routing.solve(matrix, 21)
+
+    def test_rebalance_fills_short_routes_from_long_ones(self):
+        matrix = _road_matrix(np.random.default_rng(10), 31, symmetric=False)
+        routes = [list(range(1, 28)), [28], [29], [30]]
+        vehicle_routing._rebalance(matrix, routes, min_stops=6, max_stops=9)
+        self.assertEqual(sorted(c for route in routes for c in route), list(range(1, 31)))
+        self.assertTrue(all(6 <= len(route) <= 9 for route in routes))
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import DeviceSensorDataView , CustomersDataView , OrdersDataView , OriginDataView ,RiderHistoryDataView,RoutePlannerView
+from .views import RoutePlanJobView, RoutePlanJobDetailView, FleetSweepView, GeocodeCacheStatsView
 
 
 router = DefaultRouter()
@@ -13,5 +14,9 @@ router.register(r'rider-history',RiderHistoryDataView,basename='rider-history')
 urlpatterns = [
     path('', include(router.urls)),  # ViewSet endpoints
     path('origin/',OriginDataView.as_view(),name='origin'),
-    path('route-planner/',RoutePlannerView.as_view(),name="route-planner")
+    path('geocode-cache/stats/',GeocodeCacheStatsView.as_view(),name='geocode-cache-stats'),
+    path('route-planner/',RoutePlannerView.as_view(),name="route-planner"),
+    path('route-planner/jobs/',RoutePlanJobView.as_view(),name="route-plan-jobs"),
+    path('route-planner/sweep/',FleetSweepView.as_view(),name="route-planner-sweep"),
+    path('route-planner/jobs/<uuid:job_id>/',RoutePlanJobDetailView.as_view(),name="route-plan-job-detail"),
 ]
\ No newline at end of file
@@ -1,3 +1,5 @@
+import re
+import unicodedata
 import requests
 import logging
 import os
@@ -5,33 +7,67 @@ from dotenv import load_dotenv
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-def address_to_coordinate(address):
+def normalize_address(address):
     """
-    Retrieve latitude and longitude for a given address using the Google Geocoding API.
-    
+    Reduce an address to a canonical form, so spellings that differ only in
+    case, width, punctuation or spacing share one geocoding cache entry.
+
+    Parameters:
+        address (str): The address as entered.
+
+    Returns:
+        str: The normalized address ('' for an empty address).
+    """
+    normalized = unicodedata.normalize('NFKC', address or '').casefold()
+    normalized = re.sub(r'[,.;:()\[\]"\'`]+', ' ', normalized)
+    return ' '.join(normalized.split())
+
+def geocode(address):
+    """
+    Look up an address with the Google Geocoding API, telling "not found" apart from failures.
+
     Parameters:
         address (str): The address to be geocoded.
-        
+
     Returns:
-        tuple: (latitude, longitude) if successful; otherwise, (None, None).
+        tuple: (latitude, longitude), or (None, None) if Google has no result for the address.
+
+    Raises:
+        RuntimeError: If the request fails or Google refuses it (quota, key), so the outcome is unknown.
     """
     # Retrieve API key from environment variables (replace with your secure method)
     api_key = os.getenv('GOOGLE_MAPS_API_KEY')
     url = 'https://maps.googleapis.com/maps/api/geocode/json'
-    
+
     try:
         response = requests.get(url, params={'address': address, 'key': api_key}, timeout=5)
         response.raise_for_status()  # Raises HTTPError for bad responses (status code != 200)
-        
         data = response.json()
-        results = data.get('results')
-        if results:
-            location = results[0]['geometry']['location']
-            return location['lat'], location['lng']
-        else:
-            logger.warning("No geocoding results found for address: %s", address)
-            return None, None
-
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         logger.error("Geocode API request failed: %s", e)
+        raise RuntimeError("Geocode API request failed") from e
+
+    results = data.get('results')
+    if results:
+        location = results[0]['geometry']['location']
+        return location['lat'], location['lng']
+    if data.get('status', 'ZERO_RESULTS') != 'ZERO_RESULTS':
+        logger.error("Geocode API refused the request: %s", data.get('status'))
+        raise RuntimeError(f"Geocode API returned {data.get('status')}")
+    logger.warning("No geocoding results found for address: %s", address)
+    return None, None
+
+def address_to_coordinate(address):
+    """
+    Retrieve latitude and longitude for a given address using the Google Geocoding API.
+    
+    Parameters:
+        address (str): The address to be geocoded.
+        
+    Returns:
+        tuple: (latitude, longitude) if successful; otherwise, (None, None).
+    """
+    try:
+        return geocode(address)
+    except RuntimeError:
         return None, None
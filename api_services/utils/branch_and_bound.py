@@ -0,0 +1,327 @@
+import math
+import time
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from api_services.utils import local_search
+
+# Bounds must beat the incumbent by more than this (in matrix units) to keep a branch alive
+_EPSILON = 1e-7
+
+# Most entries in the table of exact tails; partial tours with few enough cities
+# left to fit are completed from it instead of being branched further
+_TAIL_TABLE_ENTRIES = 4_000_000
+
+
+def _spanning_tree_weight(weights, nodes):
+    """
+    Weight of the minimum spanning tree over the given nodes (Prim's algorithm).
+
+    Parameters:
+        weights (np.ndarray): A symmetric matrix of edge weights.
+        nodes (np.ndarray): Indices of the nodes to span.
+
+    Returns:
+        tuple: (total_weight, degrees) where degrees[k] is the tree degree of nodes[k].
+    """
+    k = len(nodes)
+    degrees = np.zeros(k, dtype=np.int64)
+    if k < 2:
+        return 0.0, degrees
+    sub = weights[nodes[:, None], nodes]
+    in_tree = np.zeros(k, dtype=bool)
+    in_tree[0] = True
+    best = sub[0].copy()
+    parent = np.zeros(k, dtype=np.int64)
+    total = 0.0
+    for _ in range(k - 1):
+        candidates = np.where(in_tree, np.inf, best)
+        nxt = int(candidates.argmin())
+        total += candidates[nxt]
+        degrees[nxt] += 1
+        degrees[parent[nxt]] += 1
+        in_tree[nxt] = True
+        closer = sub[nxt] < best
+        best = np.where(closer, sub[nxt], best)
+        parent = np.where(closer, nxt, parent)
+    return total, degrees
+
+
+def _tree_weight(weight_rows, nodes):
+    """
+    Weight of the minimum spanning tree over the given nodes, by Prim's algorithm on plain lists.
+
+    Faster than _spanning_tree_weight on the handful of nodes left deep in the
+    search, where NumPy's per-call overhead dominates.
+
+    Parameters:
+        weight_rows (list): Rows of a symmetric matrix of edge weights.
+        nodes (list): Indices of the nodes to span.
+    """
+    # best[i] is the cheapest edge from the tree to others[i]
+    others = nodes[1:]
+    best = [weight_rows[nodes[0]][node] for node in others]
+    total = 0.0
+    while others:
+        nearest = best.index(min(best))
+        total += best.pop(nearest)
+        row = weight_rows[others.pop(nearest)]
+        best = [weight if weight < row[node] else row[node] for weight, node in zip(best, others)]
+    return total
+
+
+def _one_tree(weights):
+    """
+    Minimum 1-tree: a spanning tree over cities 1..n-1 plus the two cheapest edges at the origin.
+
+    Returns:
+        tuple: (total_weight, degrees) for every city.
+    """
+    n = len(weights)
+    total, tree_degrees = _spanning_tree_weight(weights, np.arange(1, n))
+    cheapest = np.argsort(weights[0, 1:])[:2] + 1
+    degrees = np.concatenate(([2], tree_degrees))
+    degrees[cheapest] += 1
+    return total + weights[0, cheapest].sum(), degrees
+
+
+def held_karp_bound(distance_matrix, upper_bound, iterations=100):
+    """
+    Held-Karp (Lagrangian 1-tree) lower bound on the tour length.
+
+    Directed distances are relaxed to min(d_ij, d_ji), so the bound is valid
+    for asymmetric matrices as well. Node penalties are tuned by subgradient
+    ascent towards a 1-tree in which every city has degree two.
+
+    Parameters:
+        distance_matrix (np.ndarray): An n x n matrix of travel distances, city 0 being the origin.
+        upper_bound (float): Length of a known tour, used to size subgradient steps.
+        iterations (int, optional): Number of subgradient steps. Default is 100.
+
+    Returns:
+        tuple: (lower_bound, penalties) where penalties are the best node multipliers found.
+    """
+    symmetric = np.minimum(distance_matrix, distance_matrix.T)
+    n = len(symmetric)
+    penalties = np.zeros(n)
+    best_bound, best_penalties = -np.inf, penalties.copy()
+    step_scale = 2.0
+    stalled = 0
+    for _ in range(iterations):
+        weights = symmetric + penalties[:, None] + penalties[None, :]
+        tree_weight, degrees = _one_tree(weights)
+        bound = tree_weight - 2.0 * penalties.sum()
+        if bound > best_bound + _EPSILON:
+            best_bound, best_penalties = bound, penalties.copy()
+            stalled = 0
+        else:
+            stalled += 1
+            if stalled >= 5:
+                step_scale /= 2.0
+                stalled = 0
+        subgradient = degrees - 2
+        norm = float((subgradient ** 2).sum())
+        if norm == 0:
+            # The 1-tree is itself a tour, so the bound is tight
+            break
+        penalties = penalties + step_scale * (upper_bound - bound) / norm * subgradient
+    return best_bound, best_penalties
+
+
+def _subset_layers(m, max_size):
+    """
+    Every subset of m cities with at most max_size members, as bitmasks (bit c - 1 for city c).
+
+    Returns:
+        list: layers[k] is a sorted int64 array of the masks with exactly k cities.
+    """
+    layers = [np.zeros(1, dtype=np.int64)]
+    highest = np.full(1, -1)
+    for _ in range(max_size):
+        # Extend each mask with a city above its highest one, so every subset appears once, in order
+        grown = [(layers[-1][highest < bit] | (1 << bit), np.full(int((highest < bit).sum()), bit))
+                 for bit in range(m)]
+        layers.append(np.concatenate([masks for masks, _ in grown]))
+        highest = np.concatenate([bits for _, bits in grown])
+    return layers
+
+
+class _TailTable:
+    """
+    Cheapest completions of every partial tour with at most 'size' cities left,
+    computed once by a backward Held-Karp recursion so that the search can
+    finish its deepest levels with lookups instead of solving them.
+
+    costs[k][i, j] is the cheapest path from city j through every city of
+    layers[k][i] to the origin, for j outside that subset.
+    """
+
+    def __init__(self, dist, max_entries):
+        n = len(dist)
+        m = n - 1
+        size, entries = 0, n
+        while size < m:
+            entries += math.comb(m, size + 1) * n
+            if entries > max_entries:
+                break
+            size += 1
+        self.dist = dist
+        self.size = size
+        self.layers = _subset_layers(m, size)
+        self.costs = [dist[:, 0][None, :].copy()]
+        for k in range(1, size + 1):
+            layer, previous = self.layers[k], self.layers[k - 1]
+            costs = np.full((len(layer), n), np.inf)
+            for city in range(1, n):
+                rows = np.flatnonzero((layer >> (city - 1)) & 1)
+                rest = np.searchsorted(previous, layer[rows] ^ (1 << (city - 1)))
+                # Go to 'city' first, then take the cheapest path through the rest
+                candidates = dist[:, city][None, :] + self.costs[k - 1][rest, city][:, None]
+                np.minimum(costs[rows], candidates, out=candidates)
+                costs[rows] = candidates
+            self.costs.append(costs)
+
+    def cost(self, last, mask):
+        k = mask.bit_count()
+        return self.costs[k][np.searchsorted(self.layers[k], mask), last]
+
+    def path(self, last, mask):
+        """
+        Visiting order of the cities in 'mask' on the cheapest path from 'last' to the origin.
+        """
+        cities = []
+        while mask:
+            k = mask.bit_count()
+            best_city, best_cost = None, np.inf
+            for city in range(1, len(self.dist)):
+                bit = 1 << (city - 1)
+                if mask & bit:
+                    rest = mask ^ bit
+                    cost = self.dist[last, city] + self.costs[k - 1][np.searchsorted(self.layers[k - 1], rest), city]
+                    if cost < best_cost:
+                        best_city, best_cost = city, cost
+            cities.append(best_city)
+            mask ^= 1 << (best_city - 1)
+            last = best_city
+        return cities
+
+
+def _assignment_bound(costs):
+    """
+    Cost of the cheapest assignment of rows to columns; inf marks forbidden pairs.
+
+    As a relaxation of the tour every city is left once and entered once, but
+    the edges need not form a single cycle.
+    """
+    rows, cols = linear_sum_assignment(costs)
+    return float(costs[rows, cols].sum())
+
+
+def solve(distance_matrix, time_limit=5.0, node_limit=1_000_000, initial_tour=None,
+          tail_entries=_TAIL_TABLE_ENTRIES):
+    """
+    Solve the TSP exactly by depth-first branch-and-bound.
+
+    The incumbent is seeded with a local-search tour and the root is bounded
+    by the Held-Karp 1-tree bound. Each node computes one penalised spanning
+    tree over its remaining cities, which bounds all of its children at once;
+    children it cannot prune get the assignment bound as well. Partial tours
+    with few cities left are completed from a table of exact tails built once
+    per solve. When either limit is hit the best tour found so far is returned.
+
+    Parameters:
+        distance_matrix (list): An n x n matrix of travel distances, city 0 being the origin.
+        time_limit (float, optional): Wall-clock budget in seconds. Default is 5 seconds.
+        node_limit (int, optional): Maximum number of search nodes to expand. Default is 1,000,000.
+        initial_tour (list, optional): A known tour (starting at city 0) to use as the incumbent.
+        tail_entries (int, optional): Size cap of the exact tail table, in matrix entries.
+
+    Returns:
+        tuple: (cost, sequence, stats) where stats is a dict with 'proven_optimal',
+            'lower_bound' and 'nodes'.
+
+    Raises:
+        ValueError: If the distance matrix is empty.
+    """
+    start = time.monotonic()
+    deadline = start + time_limit
+    dist = np.asarray(distance_matrix, dtype=np.float64)
+    n = len(dist)
+    if n == 0:
+        raise ValueError("Distance matrix must contain at least one city.")
+
+    if initial_tour is None:
+        _, initial_tour = local_search.solve(dist, time_limit=min(0.5, time_limit / 10))
+    best_sequence = list(initial_tour)
+    best_cost = local_search.route_cost(dist, best_sequence)
+    if n < 4:
+        return best_cost, best_sequence, {"proven_optimal": True, "lower_bound": best_cost, "nodes": 0}
+
+    root_bound, penalties = held_karp_bound(dist, best_cost)
+    without_loops = dist.copy()
+    np.fill_diagonal(without_loops, np.inf)
+    root_bound = max(root_bound, _assignment_bound(without_loops))
+    symmetric = np.minimum(dist, dist.T)
+    penalty_list = penalties.tolist()
+    weight_rows = (symmetric + penalties[:, None] + penalties[None, :]).tolist()
+    tails = _TailTable(dist, tail_entries)
+
+    nodes = 0
+    exhausted = True
+    # Stack entries: (lower_bound, path, path_cost, remaining cities, bitmask of the remaining cities)
+    stack = [(root_bound, [0], 0.0, list(range(1, n)), (1 << (n - 1)) - 1)]
+    while stack:
+        if nodes >= node_limit or time.monotonic() >= deadline:
+            exhausted = False
+            break
+        node_bound, path, cost, remaining, mask = stack.pop()
+        if node_bound >= best_cost - _EPSILON:
+            # The incumbent improved after this node was pushed
+            continue
+        nodes += 1
+        last = path[-1]
+
+        if len(remaining) <= tails.size:
+            total = cost + tails.cost(last, mask)
+            if total < best_cost - _EPSILON:
+                best_cost, best_sequence = total, path + tails.path(last, mask)
+            continue
+
+        # Every child keeps the same cities left to span: its new last city, the
+        # rest of 'remaining' and the origin. In a path through them the inner
+        # cities have degree two and both ends degree one
+        tree_base = (_tree_weight(weight_rows, [0, *remaining])
+                     - 2.0 * sum(penalty_list[city] for city in remaining) - penalty_list[0])
+
+        # Children not pruned by the tree get the assignment bound: each remaining
+        # city is left once, towards another one or, last of all, the origin
+        leaving = None
+        children = []
+        for idx, city in enumerate(remaining):
+            child_cost = cost + dist[last, city]
+            limit = best_cost - _EPSILON - child_cost
+            child_bound = tree_base + penalty_list[city]
+            if child_bound >= limit:
+                continue
+            if leaving is None:
+                leaving = dist[np.ix_(remaining, [*remaining, 0])]
+                leaving[np.arange(len(remaining)), np.arange(len(remaining))] = np.inf
+            # The child arrives at 'city', so nothing else enters it and it cannot end the tour
+            costs = np.delete(leaving, idx, axis=1)
+            if len(remaining) > 1:
+                costs[idx, -1] = np.inf
+            child_bound = max(child_bound, _assignment_bound(costs))
+            rest = remaining[:idx] + remaining[idx + 1:]
+            if child_bound < limit:
+                children.append((child_cost + child_bound, path + [city], child_cost, rest,
+                                 mask ^ (1 << (city - 1))))
+
+        # Push the most promising child last so it is explored first
+        children.sort(key=lambda child: child[0], reverse=True)
+        stack.extend(children)
+
+    lower_bound = best_cost
+    if not exhausted:
+        # Every tour not yet ruled out extends a node still on the stack
+        lower_bound = min(best_cost, max(root_bound, min(entry[0] for entry in stack)))
+    stats = {"proven_optimal": exhausted, "lower_bound": float(lower_bound), "nodes": nodes}
+    return float(best_cost), best_sequence, stats
@@ -1,8 +1,142 @@
 import logging
-from sklearn.cluster import KMeans
+import os
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on k-means++ restarts, matching the former fixed n_init=100
+_MAX_RESTARTS = 100
+
+def _fit_kmeans(points, n_clusters, init_centroids, tolerance, restarts_per_round, minibatch_threshold,
+                min_restarts, patience):
+    """
+    Fit K-Means in rounds of a few k-means++ restarts until the best objective
+    (inertia) looks settled: at least 'min_restarts' restarts have run, the last
+    'patience' rounds each improved it by less than 'tolerance', and a second
+    restart has reached it. On rugged inputs nearly every restart ends in a
+    different local optimum, so the search runs on towards the cap there.
+    Previous centroids, when given, are tried as one more candidate but never
+    end the search on their own, since a stale seed can sit in a poor optimum.
+    """
+    # Relative slack within which two restarts count as reaching the same objective;
+    # mini-batch objectives are noisy, so they get more of it
+    if len(points) > minibatch_threshold:
+        slack = tolerance / 10
+
+        def make(init, seed):
+            return MiniBatchKMeans(n_clusters=n_clusters, init=init, n_init=1, max_iter=300,
+                                   batch_size=1024, max_no_improvement=10, random_state=seed)
+    else:
+        slack = tolerance / 100
+
+        def make(init, seed):
+            return KMeans(n_clusters=n_clusters, init=init, n_init=1, max_iter=300,
+                          tol=1e-4, random_state=seed)
+
+    best = None
+    inertias = []
+    if init_centroids is not None:
+        best = make(init_centroids, 42).fit(points)
+        inertias.append(best.inertia_)
+
+    # Never run more restarts than the original exhaustive search did
+    restarts = 0
+    rounds_without_improvement = 0
+    for start in range(42, 42 + _MAX_RESTARTS, restarts_per_round):
+        models = [make('k-means++', seed).fit(points)
+                  for seed in range(start, min(start + restarts_per_round, 42 + _MAX_RESTARTS))]
+        restarts += len(models)
+        inertias.extend(model.inertia_ for model in models)
+        model = min(models, key=lambda model: model.inertia_)
+        if best is None:
+            best = model
+            continue
+        improved = model.inertia_ < best.inertia_ * (1 - tolerance)
+        if model.inertia_ < best.inertia_:
+            best = model
+        rounds_without_improvement = 0 if improved else rounds_without_improvement + 1
+        reached = sum(inertia <= best.inertia_ * (1 + slack) for inertia in inertias)
+        if restarts >= min_restarts and rounds_without_improvement >= patience and reached >= 2:
+            break
+
+    if isinstance(best, MiniBatchKMeans):
+        # Polish the mini-batch centroids with full Lloyd iterations
+        best = KMeans(n_clusters=n_clusters, init=best.cluster_centers_, n_init=1, max_iter=300).fit(points)
+    return best
+
+
+def fit_clusters(customer_latlng_list, n_clusters, init_centroids=None, tolerance=None):
+    """
+    Group customer locations into clusters, optionally warm-started from earlier centroids.
+
+    Parameters:
+        customer_latlng_list (list): A list of customer coordinates in the format [[lat, lon], ...].
+        n_clusters (int): The number of clusters (usually equal to the number of riders).
+        init_centroids (list, optional): Centroids from a previous plan, as [[lat, lon], ...].
+            Ignored unless there is exactly one per cluster.
+        tolerance (float, optional): Relative objective improvement below which a round of restarts
+            counts as not improving. Defaults to the CLUSTERING_TOLERANCE environment variable, or 0.01.
+
+    Returns:
+        tuple: (groups, centroids) where groups holds one list of indices into
+            customer_latlng_list per cluster and centroids is [[lat, lon], ...].
+
+    Raises:
+        ValueError: If the number of clusters exceeds the number of customers, or if input coordinates are invalid.
+    """
+    # Validate input: number of clusters should not exceed the number of customer locations.
+    if not customer_latlng_list or len(customer_latlng_list) < n_clusters:
+        raise ValueError("Number of clusters cannot exceed number of customers.")
+
+    # Convert customer coordinates to floats.
+    try:
+        customer_points = np.array([list(map(float, latlng)) for latlng in customer_latlng_list])
+    except (ValueError, TypeError) as e:
+        logger.error("Invalid customer coordinates in list: %s", customer_latlng_list)
+        raise ValueError("Invalid customer coordinates in list.") from e
+
+    if tolerance is None:
+        tolerance = float(os.getenv('CLUSTERING_TOLERANCE', 0.01))
+    if init_centroids is not None:
+        init_centroids = np.asarray(init_centroids, dtype=np.float64)
+        if init_centroids.shape != (n_clusters, 2):
+            init_centroids = None
+
+    kmeans = _fit_kmeans(
+        customer_points,
+        n_clusters,
+        init_centroids,
+        tolerance,
+        restarts_per_round=int(os.getenv('CLUSTERING_RESTARTS', 4)),
+        minibatch_threshold=int(os.getenv('CLUSTERING_MINIBATCH_THRESHOLD', 2000)),
+        min_restarts=int(os.getenv('CLUSTERING_MIN_RESTARTS', 16)),
+        patience=int(os.getenv('CLUSTERING_PATIENCE', 2)),
+    )
+    clusters = kmeans.labels_
+
+    groups = [np.flatnonzero(clusters == i).tolist() for i in range(n_clusters)]
+    return groups, kmeans.cluster_centers_.tolist()
+
+
+def assign_clusters(customer_latlng_list, n_clusters):
+    """
+    Group customer locations into clusters and return the members of each cluster by index.
+
+    Parameters:
+        customer_latlng_list (list): A list of customer coordinates in the format [[lat, lon], ...].
+        n_clusters (int): The number of clusters (usually equal to the number of riders).
+
+    Returns:
+        list: One list per cluster holding indices into customer_latlng_list.
+
+    Raises:
+        ValueError: If the number of clusters exceeds the number of customers, or if input coordinates are invalid.
+    """
+    groups, _ = fit_clusters(customer_latlng_list, n_clusters)
+    return groups
+
+
 def cluster(customer_latlng_list, origin_latlng, n_clusters):
     """
     Cluster customer locations into groups and generate a route for each cluster.
@@ -18,10 +152,6 @@ def cluster(customer_latlng_list, origin_latlng, n_clusters):
     Raises:
         ValueError: If the number of clusters exceeds the number of customers, or if input coordinates are invalid.
     """
-    # Validate input: number of clusters should not exceed the number of customer locations.
-    if not customer_latlng_list or len(customer_latlng_list) < n_clusters:
-        raise ValueError("Number of clusters cannot exceed number of customers.")
-    
     # Convert origin coordinates to floats.
     try:
         origin = [float(coord) for coord in origin_latlng]
@@ -29,31 +159,12 @@ def cluster(customer_latlng_list, origin_latlng, n_clusters):
         logger.error("Invalid origin coordinates: %s", origin_latlng)
         raise ValueError("Invalid origin coordinates.") from e
 
-    # Convert customer coordinates to floats.
-    try:
-        customer_points = [list(map(float, latlng)) for latlng in customer_latlng_list]
-    except (ValueError, TypeError) as e:
-        logger.error("Invalid customer coordinates in list: %s", customer_latlng_list)
-        raise ValueError("Invalid customer coordinates in list.") from e
-
-    # Initialize KMeans with production-tuned parameters.
-    kmeans = KMeans(
-        n_clusters=n_clusters,
-        init='k-means++',
-        n_init=100,
-        max_iter=1000,
-        random_state=42
-    )
-    kmeans.fit(customer_points)
-    clusters = kmeans.labels_
+    groups = assign_clusters(customer_latlng_list, n_clusters)
 
     routes = []
     # Generate a route for each cluster.
-    for i in range(n_clusters):
-        cluster_points = [
-            customer_points[j] for j in range(len(customer_points))
-            if clusters[j] == i
-        ]
+    for members in groups:
+        cluster_points = [list(map(float, customer_latlng_list[j])) for j in members]
         route = create_route(cluster_points, origin)
         routes.append(route)
 
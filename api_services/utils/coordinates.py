@@ -0,0 +1,30 @@
+def parse_latlng(value):
+    """
+    Split a "lat,lng" string into floats.
+
+    Parameters:
+        value (str): Coordinates such as "13.7563,100.5018".
+
+    Returns:
+        tuple: (lat, lng) as floats, or (None, None) if the value is empty or malformed.
+    """
+    if not value:
+        return None, None
+    try:
+        lat, lng = (float(part.strip()) for part in value.split(","))
+    except (AttributeError, ValueError):
+        return None, None
+    return lat, lng
+
+
+def sync_latlng_fields(instance, source_field, update_fields):
+    """
+    Refresh an instance's numeric lat/lng columns from its "lat,lng" string field before saving.
+
+    Returns:
+        The update_fields to pass on to Model.save(), extended with lat/lng when needed.
+    """
+    instance.lat, instance.lng = parse_latlng(getattr(instance, source_field))
+    if update_fields is not None and source_field in update_fields:
+        update_fields = set(update_fields) | {'lat', 'lng'}
+    return update_fields
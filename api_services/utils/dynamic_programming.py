@@ -1,47 +1,89 @@
+import numpy as np
+
+
+def _layered_masks(m):
+    """
+    Group every subset of the m non-origin cities by its size.
+
+    Returns:
+        list: layers[k] is an int64 array of the bitmasks containing exactly k cities.
+    """
+    masks = np.arange(1 << m, dtype=np.int64)
+    popcount = np.zeros(1 << m, dtype=np.int8)
+    for bit in range(m):
+        popcount += ((masks >> bit) & 1).astype(np.int8)
+    order = np.argsort(popcount, kind='stable')
+    bounds = np.searchsorted(popcount[order], np.arange(m + 2))
+    return [order[bounds[k]:bounds[k + 1]] for k in range(m + 1)]
+
+
 def dp(distance_matrix):
+    """
+    Solve the TSP exactly with the Held-Karp dynamic programming algorithm.
+
+    The origin (city 0) is implicitly part of every visited set, so the tables
+    are indexed only by subsets of the remaining n - 1 cities. Each layer of
+    subsets of equal size is relaxed with NumPy array operations instead of
+    per-mask Python loops.
+
+    Parameters:
+        distance_matrix (list): An n x n matrix of travel distances, city 0 being the origin.
+
+    Returns:
+        tuple: (min_cost, sequence) where sequence starts at city 0 and lists every city once;
+            a lone origin is the empty tour (0.0, [0]).
+
+    Raises:
+        ValueError: If the distance matrix is empty or not square.
+    """
     n = len(distance_matrix)
     if n == 0:
         raise ValueError("Distance matrix must contain at least one city.")
-    
-    # dp_table[mask][i] represents the minimum cost to reach city i with the visited set of cities 'mask'
-    dp_table = [[float('inf')] * n for _ in range(1 << n)]
-    dp_table[1][0] = 0  # Starting from the origin (city 0)
-    
-    # Predecessor table for path reconstruction
-    predecessor = [[-1] * n for _ in range(1 << n)]
-    
-    # Iterate over every subset of cities represented by bitmask
-    for mask in range(1 << n):
-        for u in range(n):
-            if mask & (1 << u):  # City u is in the current subset 'mask'
-                for v in range(n):
-                    if not (mask & (1 << v)):  # City v is not visited in 'mask'
-                        new_mask = mask | (1 << v)
-                        new_cost = dp_table[mask][u] + distance_matrix[u][v]
-                        if new_cost < dp_table[new_mask][v]:
-                            dp_table[new_mask][v] = new_cost
-                            predecessor[new_mask][v] = u
-
-    final_mask = (1 << n) - 1  # All cities visited
-    min_cost = float('inf')
-    last_city = -1
-
-    # Find the optimal cost to return to the origin (city 0)
-    for u in range(1, n):
-        total_cost = dp_table[final_mask][u] + distance_matrix[u][0]
-        if total_cost < min_cost:
-            min_cost = total_cost
-            last_city = u
+
+    dist = np.asarray(distance_matrix, dtype=np.float64)
+    if dist.shape != (n, n):
+        raise ValueError("Distance matrix must be square.")
+    if n == 1:
+        return 0.0, [0]
+
+    # Cities 1..n-1 are re-indexed as 0..m-1 inside the tables
+    m = n - 1
+    inner = dist[1:, 1:].astype(np.float32)
+    from_origin = dist[0, 1:].astype(np.float32)
+
+    # dp_table[mask, j] is the minimum cost of leaving the origin, visiting every
+    # city in 'mask' and ending at city j; predecessor holds the previous city (-1 = origin)
+    dp_table = np.full((1 << m, m), np.inf, dtype=np.float32)
+    predecessor = np.full((1 << m, m), -1, dtype=np.int16)
+    singles = np.arange(m)
+    dp_table[1 << singles, singles] = from_origin
+
+    layers = _layered_masks(m)
+    for size in range(2, m + 1):
+        layer = layers[size]
+        for v in range(m):
+            masks = layer[(layer >> v) & 1 == 1]
+            # Costs of arriving at v from every u in the subset without v;
+            # cities outside that subset hold inf and are never selected
+            candidates = dp_table[masks ^ (1 << v)] + inner[:, v]
+            best = candidates.argmin(axis=1)
+            dp_table[masks, v] = candidates[np.arange(len(masks)), best]
+            predecessor[masks, v] = best
+
+    final_mask = (1 << m) - 1
+    last_city = int((dp_table[final_mask] + dist[1:, 0].astype(np.float32)).argmin())
 
     # Reconstruct the optimal route sequence using the predecessor table
     sequence = []
     mask = final_mask
     while last_city != -1:
-        sequence.append(last_city)
-        next_city = predecessor[mask][last_city]
-        mask ^= (1 << last_city)  # Remove last_city from the mask
+        sequence.append(last_city + 1)
+        next_city = int(predecessor[mask, last_city])
+        mask ^= (1 << last_city)
         last_city = next_city
+    sequence.append(0)
+    sequence.reverse()
 
-    sequence.reverse()  # Reverse to obtain the route from origin to destination
-    
+    # Re-sum the tour in double precision so the reported cost is not affected by float32 tables
+    min_cost = float(dist[sequence, sequence[1:] + [0]].sum())
     return min_cost, sequence
@@ -0,0 +1,22 @@
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371008.8
+
+
+def haversine_matrix(sources, destinations=None):
+    """
+    Great-circle distances between every source and every destination.
+
+    Parameters:
+        sources (list): A list of coordinate pairs (each as [lat, lon]).
+        destinations (list, optional): A list of coordinate pairs. Defaults to sources.
+
+    Returns:
+        np.ndarray: A matrix where entry [i][j] is the distance in meters from sources[i] to destinations[j].
+    """
+    src = np.radians(np.asarray(sources, dtype=np.float64).reshape(-1, 2))
+    dst = src if destinations is None else np.radians(np.asarray(destinations, dtype=np.float64).reshape(-1, 2))
+    lat1, lon1 = src[:, 0:1], src[:, 1:2]
+    lat2, lon2 = dst[:, 0], dst[:, 1]
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
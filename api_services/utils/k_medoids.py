@@ -0,0 +1,145 @@
+import numpy as np
+
+
+def _build(dist, n_clusters):
+    """
+    Greedy BUILD initialisation: repeatedly add the medoid that lowers the total distance most.
+    """
+    medoids = [int(dist.sum(axis=1).argmin())]
+    nearest = dist[medoids[0]].copy()
+    for _ in range(1, n_clusters):
+        # Gain of each candidate: how much it would shorten every point's distance to its medoid
+        gains = np.maximum(nearest[None, :] - dist, 0.0).sum(axis=1)
+        gains[medoids] = -np.inf
+        candidate = int(gains.argmax())
+        medoids.append(candidate)
+        nearest = np.minimum(nearest, dist[candidate])
+    return medoids
+
+
+def _nearest_two(dist, medoids):
+    """
+    For every point, the index (into medoids) of its nearest medoid and the
+    distances to its nearest and second-nearest medoids.
+    """
+    to_medoids = dist[:, medoids]
+    if len(medoids) == 1:
+        return np.zeros(len(dist), dtype=np.int64), to_medoids[:, 0], np.full(len(dist), np.inf)
+    order = np.argsort(to_medoids, axis=1)[:, :2]
+    rows = np.arange(len(dist))
+    return order[:, 0], to_medoids[rows, order[:, 0]], to_medoids[rows, order[:, 1]]
+
+
+def faster_pam(dist, n_clusters, max_iter=100):
+    """
+    FasterPAM k-medoids (Schubert & Rousseeuw): for each non-medoid candidate
+    the change in total deviation for swapping it with every medoid is computed
+    in one pass, and the first improving swap is applied immediately. The
+    per-medoid removal losses are cached and refreshed only after a swap.
+
+    Parameters:
+        dist (np.ndarray): A symmetric n x n dissimilarity matrix.
+        n_clusters (int): The number of medoids.
+        max_iter (int, optional): Maximum number of passes over all candidates. Default is 100.
+
+    Returns:
+        list: Indices of the medoids.
+    """
+    n = len(dist)
+    medoids = _build(dist, n_clusters)
+    nearest, d_near, d_second = _nearest_two(dist, medoids)
+    removal_loss = np.bincount(nearest, weights=d_second - d_near, minlength=n_clusters)
+    is_medoid = np.zeros(n, dtype=bool)
+    is_medoid[medoids] = True
+
+    last_swap = None
+    for _ in range(max_iter):
+        swapped = False
+        for candidate in range(n):
+            if candidate == last_swap:
+                # A full pass since the last swap found nothing better
+                return medoids
+            if is_medoid[candidate]:
+                continue
+            d_candidate = dist[candidate]
+            closer = d_candidate < d_near
+            between = ~closer & (d_candidate < d_second)
+            # Points moving to the candidate gain regardless of which medoid is removed
+            shared = (d_candidate[closer] - d_near[closer]).sum()
+            delta = removal_loss.copy()
+            # ...and no longer fall back to their second medoid if theirs is removed
+            delta += np.bincount(nearest[closer], weights=d_near[closer] - d_second[closer], minlength=n_clusters)
+            # Points whose fallback becomes the candidate lose less when their medoid goes
+            delta += np.bincount(nearest[between], weights=d_candidate[between] - d_second[between],
+                                 minlength=n_clusters)
+            best = int(delta.argmin())
+            if delta[best] + shared < -1e-9:
+                is_medoid[medoids[best]] = False
+                is_medoid[candidate] = True
+                medoids[best] = candidate
+                nearest, d_near, d_second = _nearest_two(dist, medoids)
+                removal_loss = np.bincount(nearest, weights=d_second - d_near, minlength=n_clusters)
+                last_swap = candidate
+                swapped = True
+        if not swapped:
+            break
+    return medoids
+
+
+def _balanced_assignment(dist, medoids, max_size):
+    """
+    Assign points to medoids so that no cluster exceeds max_size, taking the
+    points that would lose the most by not getting their nearest medoid first.
+    """
+    n = len(dist)
+    to_medoids = dist[:, medoids]
+    preference = np.argsort(to_medoids, axis=1)
+    sorted_costs = np.take_along_axis(to_medoids, preference, axis=1)
+    regret = sorted_costs[:, 1] - sorted_costs[:, 0] if len(medoids) > 1 else np.zeros(n)
+    labels = np.full(n, -1, dtype=np.int64)
+    labels[medoids] = np.arange(len(medoids))
+    sizes = np.ones(len(medoids), dtype=np.int64)
+    for point in np.argsort(-regret, kind='stable'):
+        if labels[point] >= 0:
+            continue
+        for choice in preference[point]:
+            if sizes[choice] < max_size:
+                labels[point] = choice
+                sizes[choice] += 1
+                break
+    return labels
+
+
+def cluster(distance_matrix, n_clusters, max_size=None):
+    """
+    Group points into clusters with k-medoids on a road-distance matrix.
+
+    Parameters:
+        distance_matrix (np.ndarray): An n x n matrix of road distances between the points.
+            Asymmetric distances are averaged in both directions.
+        n_clusters (int): The number of clusters (usually equal to the number of riders).
+        max_size (int, optional): Largest allowed cluster. Unlimited by default.
+
+    Returns:
+        list: One list per cluster holding indices of its points.
+
+    Raises:
+        ValueError: If the number of clusters exceeds the number of points, or max_size cannot fit every point.
+    """
+    dist = np.asarray(distance_matrix, dtype=np.float64)
+    n = len(dist)
+    if n == 0 or n < n_clusters:
+        raise ValueError("Number of clusters cannot exceed number of customers.")
+    if max_size is not None and max_size * n_clusters < n:
+        raise ValueError("Cluster size limit is too small for the number of customers.")
+    dist = (dist + dist.T) / 2.0
+
+    medoids = faster_pam(dist, n_clusters)
+    if max_size is not None:
+        labels = _balanced_assignment(dist, medoids, max_size)
+    else:
+        labels, _, _ = _nearest_two(dist, medoids)
+        # Medoids at identical locations must still keep their own cluster
+        labels[medoids] = np.arange(n_clusters)
+
+    return [np.flatnonzero(labels == i).tolist() for i in range(n_clusters)]
@@ -0,0 +1,161 @@
+import time
+import numpy as np
+
+# Moves must improve the tour by more than this (in matrix units) to be applied
+_EPSILON = 1e-7
+
+
+def route_cost(distance_matrix, sequence):
+    """
+    Compute the length of a closed tour.
+
+    Parameters:
+        distance_matrix (np.ndarray): An n x n matrix of travel distances.
+        sequence (list): City indices starting at the origin; the return to the origin is implied.
+
+    Returns:
+        float: The total distance of the tour.
+    """
+    closed = list(sequence) + [sequence[0]]
+    return float(distance_matrix[closed[:-1], closed[1:]].sum())
+
+
+def nearest_neighbor(distance_matrix):
+    """
+    Build a tour from the origin by always moving to the closest unvisited city.
+
+    Parameters:
+        distance_matrix (np.ndarray): An n x n matrix of travel distances, city 0 being the origin.
+
+    Returns:
+        list: City indices starting at city 0.
+    """
+    n = len(distance_matrix)
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    sequence = [0]
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, distance_matrix[sequence[-1]])
+        nxt = int(row.argmin())
+        visited[nxt] = True
+        sequence.append(nxt)
+    return sequence
+
+
+def two_opt(distance_matrix, sequence, deadline):
+    """
+    Improve a tour with 2-opt segment reversals until no move helps or the deadline passes.
+
+    Distances may be asymmetric, so the cost of traversing a reversed segment
+    is taken from prefix sums of the backward edges rather than assumed equal.
+
+    Parameters:
+        distance_matrix (np.ndarray): An n x n matrix of travel distances.
+        sequence (list): City indices starting at the origin.
+        deadline (float): time.monotonic() value after which the search stops.
+
+    Returns:
+        tuple: (sequence, improved) where improved tells whether any move was applied.
+    """
+    n = len(sequence)
+    tour = np.array(list(sequence) + [sequence[0]])
+    improved = False
+    found = True
+    while found and time.monotonic() < deadline:
+        found = False
+        forward = np.concatenate(([0.0], np.cumsum(distance_matrix[tour[:-1], tour[1:]])))
+        backward = np.concatenate(([0.0], np.cumsum(distance_matrix[tour[1:], tour[:-1]])))
+        for i in range(n - 2):
+            j = np.arange(i + 2, n)
+            a, b = tour[i], tour[i + 1]
+            delta = (
+                distance_matrix[a, tour[j]] + distance_matrix[b, tour[j + 1]]
+                - distance_matrix[a, b] - distance_matrix[tour[j], tour[j + 1]]
+                + (backward[j] - backward[i + 1]) - (forward[j] - forward[i + 1])
+            )
+            best = int(delta.argmin())
+            if delta[best] < -_EPSILON:
+                end = int(j[best])
+                tour[i + 1:end + 1] = tour[i + 1:end + 1][::-1].copy()
+                found = improved = True
+                break
+    return tour[:-1].tolist(), improved
+
+
+def or_opt(distance_matrix, sequence, deadline, max_segment=3):
+    """
+    Improve a tour by relocating segments of up to max_segment consecutive cities.
+
+    Parameters:
+        distance_matrix (np.ndarray): An n x n matrix of travel distances.
+        sequence (list): City indices starting at the origin.
+        deadline (float): time.monotonic() value after which the search stops.
+        max_segment (int, optional): Longest segment that may be moved. Default is 3.
+
+    Returns:
+        tuple: (sequence, improved) where improved tells whether any move was applied.
+    """
+    tour = list(sequence) + [sequence[0]]
+    n = len(sequence)
+    improved = False
+    found = True
+    while found and time.monotonic() < deadline:
+        found = False
+        for length in range(1, max_segment + 1):
+            for start in range(1, n - length + 1):
+                segment = tour[start:start + length]
+                prev_city, next_city = tour[start - 1], tour[start + length]
+                removal_gain = (
+                    distance_matrix[prev_city, segment[0]] + distance_matrix[segment[-1], next_city]
+                    - distance_matrix[prev_city, next_city]
+                )
+                rest = np.array(tour[:start] + tour[start + length:])
+                insertion = (
+                    distance_matrix[rest[:-1], segment[0]] + distance_matrix[segment[-1], rest[1:]]
+                    - distance_matrix[rest[:-1], rest[1:]]
+                )
+                # Re-inserting at the original gap is not a move
+                insertion[start - 1] = np.inf
+                best = int(insertion.argmin())
+                if insertion[best] - removal_gain < -_EPSILON:
+                    rest = rest.tolist()
+                    tour = rest[:best + 1] + segment + rest[best + 1:]
+                    found = improved = True
+                    break
+            if found:
+                break
+    return tour[:-1], improved
+
+
+def solve(distance_matrix, time_limit=1.0):
+    """
+    Solve the TSP heuristically: nearest-neighbour construction followed by
+    alternating 2-opt and Or-opt local search within a time budget.
+
+    Parameters:
+        distance_matrix (list): An n x n matrix of travel distances, city 0 being the origin.
+        time_limit (float, optional): Wall-clock budget in seconds. Default is 1 second.
+
+    Returns:
+        tuple: (cost, sequence) in the same format as dynamic_programming.dp.
+
+    Raises:
+        ValueError: If the distance matrix is empty.
+    """
+    dist = np.asarray(distance_matrix, dtype=np.float64)
+    if len(dist) == 0:
+        raise ValueError("Distance matrix must contain at least one city.")
+    if len(dist) < 4:
+        sequence = list(range(len(dist)))
+        if len(dist) == 3 and route_cost(dist, [0, 2, 1]) < route_cost(dist, sequence):
+            sequence = [0, 2, 1]
+        return route_cost(dist, sequence), sequence
+
+    deadline = time.monotonic() + time_limit
+    sequence = nearest_neighbor(dist)
+    improved = True
+    while improved and time.monotonic() < deadline:
+        sequence, _ = two_opt(dist, sequence, deadline)
+        sequence, improved = or_opt(dist, sequence, deadline)
+
+    return route_cost(dist, sequence), sequence
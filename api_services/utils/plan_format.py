@@ -0,0 +1,52 @@
+from api_services.utils import polyline
+from api_services.utils.coordinates import parse_latlng
+
+
+def compact_plan(result):
+    """
+    Rewrite a route plan so every coordinate appears once.
+
+    All coordinates go into one 'coordinates' table and are referenced by
+    index from deliveries, latlng, clusters and route stops; each route also
+    carries its geometry as an encoded polyline.
+
+    Parameters:
+        result (dict): A plan as returned by plan_routes.
+
+    Returns:
+        dict: The compact plan, marked with "format": "compact".
+    """
+    coordinates = []
+    index = {}
+
+    def ref(coordinate):
+        key = (float(coordinate[0]), float(coordinate[1]))
+        if key not in index:
+            index[key] = len(coordinates)
+            coordinates.append(list(key))
+        return index[key]
+
+    routes = []
+    for route in result.get("routes", []):
+        compact_route = {key: value for key, value in route.items() if key != "route"}
+        compact_route["stops"] = [ref(point) for point in route["route"]]
+        compact_route["polyline"] = polyline.encode(route["route"])
+        routes.append(compact_route)
+
+    deliveries = []
+    for delivery in result.get("deliveries", []):
+        compact_delivery = {key: value for key, value in delivery.items() if key != "latlng"}
+        lat, lng = parse_latlng(delivery.get("latlng"))
+        compact_delivery["coordinate"] = None if lat is None else ref((lat, lng))
+        deliveries.append(compact_delivery)
+
+    compact = {key: value for key, value in result.items() if key not in ("routes", "deliveries", "latlng", "clusters")}
+    compact.update({
+        "format": "compact",
+        "coordinates": coordinates,
+        "deliveries": deliveries,
+        "latlng": [ref(point) for point in result.get("latlng", [])],
+        "clusters": [[ref(point) for point in cluster] for cluster in result.get("clusters", [])],
+        "routes": routes,
+    })
+    return compact
@@ -0,0 +1,57 @@
+def encode(points, precision=5):
+    """
+    Encode coordinates with the Encoded Polyline Algorithm used by Google Maps and OSRM.
+
+    Parameters:
+        points (list): Coordinates as [lat, lon] pairs.
+        precision (int, optional): Decimal places kept. Default is 5 (about one meter).
+
+    Returns:
+        str: The encoded polyline.
+    """
+    factor = 10 ** precision
+    output = []
+    previous_lat = previous_lng = 0
+    for lat, lng in points:
+        lat, lng = int(round(float(lat) * factor)), int(round(float(lng) * factor))
+        for delta in (lat - previous_lat, lng - previous_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                output.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            output.append(chr(value + 63))
+        previous_lat, previous_lng = lat, lng
+    return "".join(output)
+
+
+def decode(polyline, precision=5):
+    """
+    Decode an encoded polyline back into [lat, lon] pairs.
+
+    Parameters:
+        polyline (str): The encoded polyline.
+        precision (int, optional): Decimal places it was encoded with. Default is 5.
+
+    Returns:
+        list: Coordinates as [lat, lon] pairs.
+    """
+    factor = 10 ** precision
+    points = []
+    position = 0
+    lat = lng = 0
+    while position < len(polyline):
+        deltas = []
+        for _ in range(2):
+            shift = value = 0
+            while True:
+                byte = ord(polyline[position]) - 63
+                position += 1
+                value |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append([lat / factor, lng / factor])
+    return points
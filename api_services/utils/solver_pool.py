@@ -0,0 +1,106 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_EXCEPTION, wait
+from concurrent.futures.process import BrokenProcessPool
+from api_services.utils import traveling_salesman_problem
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _worker_count():
+    return int(os.getenv('TSP_WORKERS', os.cpu_count() or 1))
+
+
+def get_pool():
+    """
+    Process pool shared by all requests in this worker, created on first use.
+
+    Children are spawned rather than forked so they do not inherit the
+    parent's threads, locks or database connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_worker_count(),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def solve_clusters(origin_latlng, cluster_routes, distance_matrices, timeout=None, cancel_event=None):
+    """
+    Solve the TSP for every cluster, in parallel when there is more than one.
+
+    Parameters:
+        origin_latlng (list): The origin coordinates [lat, lon].
+        cluster_routes (list): One route per cluster, as passed to process_tsp.
+        distance_matrices (list): One distance matrix per cluster, matching cluster_routes.
+        timeout (float, optional): Seconds to wait for all clusters.
+            Defaults to the TSP_POOL_TIMEOUT environment variable, or 60 seconds.
+        cancel_event (threading.Event, optional): When set, pending clusters are abandoned.
+
+    Returns:
+        list: process_tsp results in the same order as cluster_routes.
+
+    Raises:
+        TimeoutError: If the clusters are not solved within the timeout.
+        RuntimeError: If the work is cancelled or a cluster fails to solve.
+    """
+    if timeout is None:
+        timeout = float(os.getenv('TSP_POOL_TIMEOUT', 60))
+
+    if len(cluster_routes) <= 1 or _worker_count() <= 1:
+        results = []
+        for route, matrix in zip(cluster_routes, distance_matrices):
+            if cancel_event is not None and cancel_event.is_set():
+                raise RuntimeError("Route planning was cancelled")
+            results.append(traveling_salesman_problem.process_tsp(origin_latlng, route, distance_matrix=matrix))
+        return results
+
+    pool = get_pool()
+    try:
+        futures = [
+            pool.submit(traveling_salesman_problem.process_tsp, origin_latlng, route, distance_matrix=matrix)
+            for route, matrix in zip(cluster_routes, distance_matrices)
+        ]
+    except BrokenProcessPool as e:
+        _discard_pool(pool)
+        raise RuntimeError("TSP worker pool is unavailable") from e
+
+    deadline = time.monotonic() + timeout
+    pending = set(futures)
+    try:
+        # Wait in short slices so a cancellation is noticed promptly
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                raise RuntimeError("Route planning was cancelled")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Solving clusters exceeded %.1f seconds" % timeout)
+            done, pending = wait(pending, timeout=min(remaining, 0.5), return_when=FIRST_EXCEPTION)
+            failed = next((future for future in done if future.exception() is not None), None)
+            if failed is not None:
+                # Fail now rather than wait on the other clusters; the rest are cancelled below
+                raise failed.exception()
+        return [future.result() for future in futures]
+    except BrokenProcessPool as e:
+        _discard_pool(pool)
+        raise RuntimeError("TSP worker pool crashed") from e
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,38 @@
+import logging
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def write_transaction(using=None):
+    """
+    transaction.atomic() for blocks that write, taking the write lock up front on SQLite.
+
+    SQLite starts transactions deferred: one that reads before it writes has to
+    upgrade its lock, and fails at once with "database is locked" if another
+    connection is writing meanwhile, without waiting out the busy timeout. An
+    outermost block here begins IMMEDIATE instead, so concurrent writers queue
+    for the lock. Nested blocks are ordinary savepoints, and other databases get
+    a plain atomic block.
+
+    Parameters:
+        using (str, optional): Database alias; the default database if omitted.
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    # The connection resets transaction_mode from its settings when it connects
+    connection.ensure_connection()
+    configured = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = configured
+            yield
+    finally:
+        connection.transaction_mode = configured
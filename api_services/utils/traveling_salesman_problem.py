@@ -1,44 +1,125 @@
 import requests
 import logging
-from api_services.utils import dynamic_programming
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from api_services.utils import branch_and_bound, dynamic_programming, local_search
 from dotenv import load_dotenv
 import os
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-def process_tsp(origin_coords, route, timeout=10):
+# Rough cost of one Held-Karp transition, used to predict whether the exact solver fits the time budget
+_HELD_KARP_SECONDS_PER_OP = 1e-8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _osrm_session():
     """
-    Process the Traveling Salesman Problem (TSP) for a given route.
+    Shared keep-alive session for OSRM requests, retrying transient failures with exponential backoff.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=int(os.getenv('OSRM_RETRIES', 3)),
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+            )
+            adapter = HTTPAdapter(pool_maxsize=int(os.getenv('OSRM_MAX_WORKERS', 4)), max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+
+def exact_stop_limit():
+    """
+    Largest number of stops solve_tsp still tries to solve to proven optimality.
+    """
+    return int(os.getenv('TSP_BNB_MAX_STOPS', 25))
+
+
+def solve_tsp(distance_matrix, exact_max_stops=None, bnb_max_stops=None, time_budget=None):
+    """
+    Solve the TSP with the exact Held-Karp DP when it fits, with branch-and-bound
+    for mid-sized clusters, and otherwise with local search.
+
+    Within the default 2 second budget, branch-and-bound proves nearly every
+    road-distance cluster of up to about 20 stops optimal. From 21 to 25 stops
+    a growing share stops early: most symmetric and about half of the
+    asymmetric clusters of 25 stops are still proven, and the others come back
+    with an optimality_gap of at most a few percent (6% in benchmarks).
 
     Parameters:
-        origin_coords (list/tuple): The origin coordinates [lat, lon].
-        route (list): A list of coordinate pairs (each as [lat, lon]). The first and last element should be the origin.
+        distance_matrix (list): An n x n matrix of travel distances, city 0 being the origin.
+        exact_max_stops (int, optional): Largest number of stops solved with Held-Karp.
+            Defaults to the TSP_EXACT_MAX_STOPS environment variable, or 16.
+        bnb_max_stops (int, optional): Largest number of stops solved with branch-and-bound.
+            Defaults to the TSP_BNB_MAX_STOPS environment variable, or 25.
+        time_budget (float, optional): Seconds allowed for one solve.
+            Defaults to the TSP_TIME_BUDGET environment variable, or 2 seconds.
+
+    Returns:
+        tuple: (cost, sequence, solver_info) where solver_info is a dict with
+            'solver' ('held_karp', 'branch_and_bound' or 'local_search') and
+            'optimality_gap' (0.0 when proven optimal, None when unknown).
+    """
+    if exact_max_stops is None:
+        exact_max_stops = int(os.getenv('TSP_EXACT_MAX_STOPS', 16))
+    if bnb_max_stops is None:
+        bnb_max_stops = exact_stop_limit()
+    if time_budget is None:
+        time_budget = float(os.getenv('TSP_TIME_BUDGET', 2.0))
+
+    stops = len(distance_matrix) - 1
+    estimated_seconds = (1 << max(stops, 0)) * stops * stops * _HELD_KARP_SECONDS_PER_OP
+    if stops <= exact_max_stops and estimated_seconds <= time_budget:
+        cost, sequence = dynamic_programming.dp(distance_matrix=distance_matrix)
+        return cost, sequence, {"solver": "held_karp", "optimality_gap": 0.0}
+
+    if stops <= bnb_max_stops:
+        cost, sequence, stats = branch_and_bound.solve(distance_matrix, time_limit=time_budget)
+        if stats["proven_optimal"]:
+            gap = 0.0
+        else:
+            logger.info("Branch-and-bound stopped early after %d nodes.", stats["nodes"])
+            gap = (cost - stats["lower_bound"]) / stats["lower_bound"] if stats["lower_bound"] > 0 else None
+        return cost, sequence, {"solver": "branch_and_bound", "optimality_gap": gap}
+
+    logger.info("Using heuristic TSP solver for %d stops.", stops)
+    cost, sequence = local_search.solve(distance_matrix, time_limit=time_budget)
+    return cost, sequence, {"solver": "local_search", "optimality_gap": None}
+
+
+def fetch_distance_matrix(locations, timeout=10, sources=None, destinations=None, profile='cycling'):
+    """
+    Fetch the road-distance matrix between locations from the OSRM table service.
+
+    Parameters:
+        locations (list): A list of coordinate pairs (each as [lat, lon]).
         timeout (int, optional): Timeout for the HTTP request in seconds. Default is 10 seconds.
+        sources (list, optional): Indices of the locations to use as rows. Default is all of them.
+        destinations (list, optional): Indices of the locations to use as columns. Default is all of them.
+        profile (str, optional): OSRM routing profile. Default is 'cycling'.
 
     Returns:
-        tuple: A tuple containing:
-            - ordered_route (list): The optimized route as a list of [lat, lon] (ending at the origin).
-            - shortest_distance (float): The total distance of the optimized route.
+        np.ndarray: A matrix where entry [i][j] is the distance in meters from the i-th source to the j-th destination.
 
     Raises:
-        ValueError: If the origin coordinates or locations are invalid.
-        RuntimeError: If fetching the distance matrix or TSP computation fails.
+        ValueError: If the locations are invalid.
+        RuntimeError: If fetching or decoding the distance matrix fails.
     """
-    # Convert origin coordinates to floats
-    try:
-        origin = [float(origin_coords[0]), float(origin_coords[1])]
-    except (TypeError, ValueError) as e:
-        logger.error("Invalid origin coordinates: %s", origin_coords)
-        raise ValueError("Invalid origin coordinates") from e
-
-    # Ensure there are waypoints (exclude starting and ending origin if applicable)
-    waypoints = route[1:-1] if len(route) >= 2 else []
-    # Combine origin and waypoints into a single list for distance calculations
-    locations = [origin] + waypoints
     osrm_ip = os.getenv('OSRM_IP')
-    # Prepare the OSRM API URL for the cycling profile
+    # Prepare the OSRM API URL for the routing profile
 
-    base_url = f"{osrm_ip}/table/v1/cycling"
+    base_url = f"{osrm_ip}/table/v1/{profile}"
     try:
         # OSRM expects coordinates in "lon,lat" format separated by semicolons
         coordinates = ";".join([f"{float(lon)},{float(lat)}" for lat, lon in locations])
@@ -47,10 +128,14 @@ def process_tsp(origin_coords, route, timeout=10):
         raise ValueError("Invalid coordinate values") from e
 
     full_url = f"{base_url}/{coordinates}?annotations=distance"
+    if sources is not None:
+        full_url += "&sources=" + ";".join(str(i) for i in sources)
+    if destinations is not None:
+        full_url += "&destinations=" + ";".join(str(i) for i in destinations)
 
     # Fetch the distance matrix from the OSRM server
     try:
-        response = requests.get(full_url, timeout=timeout)
+        response = _osrm_session().get(full_url, timeout=timeout)
         response.raise_for_status()
     except requests.RequestException as e:
         logger.error("Error fetching distance matrix from OSRM: %s", e)
@@ -66,9 +151,122 @@ def process_tsp(origin_coords, route, timeout=10):
         logger.error("Error decoding JSON response: %s", e)
         raise RuntimeError("Invalid JSON response") from e
 
-    # Compute the optimal route using TSP dynamic programming
+    # OSRM reports unroutable pairs as null, which NumPy turns into NaN
+    matrix = np.array(distance_matrix, dtype=np.float64)
+    if np.isnan(matrix).any():
+        logger.error("OSRM returned unroutable pairs for locations: %s", locations)
+        raise RuntimeError("Distance matrix contains unroutable pairs")
+    return matrix
+
+
+def fetch_distance_matrix_tiled(locations, timeout=10, sources=None, destinations=None, profile='cycling',
+                                max_table_size=None, max_workers=None):
+    """
+    Fetch a distance matrix of any size by splitting it into source/destination
+    tiles that each stay within OSRM's max-table-size, requesting the tiles
+    concurrently and assembling them into one matrix.
+
+    Parameters:
+        locations (list): A list of coordinate pairs (each as [lat, lon]).
+        timeout (int, optional): Timeout for each HTTP request in seconds. Default is 10 seconds.
+        sources (list, optional): Indices of the locations to use as rows. Default is all of them.
+        destinations (list, optional): Indices of the locations to use as columns. Default is all of them.
+        profile (str, optional): OSRM routing profile. Default is 'cycling'.
+        max_table_size (int, optional): Most coordinates sent in one request.
+            Defaults to the OSRM_MAX_TABLE_SIZE environment variable, or 100.
+        max_workers (int, optional): Most tiles fetched at once.
+            Defaults to the OSRM_MAX_WORKERS environment variable, or 4.
+
+    Returns:
+        np.ndarray: A matrix where entry [i][j] is the distance in meters from the i-th source to the j-th destination.
+
+    Raises:
+        ValueError: If the locations are invalid.
+        RuntimeError: If fetching any tile fails.
+    """
+    if max_table_size is None:
+        max_table_size = int(os.getenv('OSRM_MAX_TABLE_SIZE', 100))
+    if max_workers is None:
+        max_workers = int(os.getenv('OSRM_MAX_WORKERS', 4))
+    sources = list(range(len(locations))) if sources is None else list(sources)
+    destinations = list(range(len(locations))) if destinations is None else list(destinations)
+
+    # A tile's sources and destinations together must fit in one request
+    tile = max(max_table_size // 2, 1)
+    tiles = [
+        (row, col)
+        for row in range(0, len(sources), tile)
+        for col in range(0, len(destinations), tile)
+    ]
+
+    def fetch_tile(bounds):
+        row, col = bounds
+        tile_sources = sources[row:row + tile]
+        tile_destinations = destinations[col:col + tile]
+        # Send only the coordinates this tile needs, re-indexed locally
+        members = list(dict.fromkeys(tile_sources + tile_destinations))
+        local = {index: position for position, index in enumerate(members)}
+        return fetch_distance_matrix(
+            [locations[i] for i in members],
+            timeout=timeout,
+            sources=[local[i] for i in tile_sources],
+            destinations=[local[i] for i in tile_destinations],
+            profile=profile,
+        )
+
+    matrix = np.empty((len(sources), len(destinations)))
+    if len(tiles) == 1:
+        blocks = [fetch_tile(tiles[0])]
+    else:
+        logger.info("Fetching distance matrix in %d tiles.", len(tiles))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            blocks = list(executor.map(fetch_tile, tiles))
+    for (row, col), block in zip(tiles, blocks):
+        matrix[row:row + block.shape[0], col:col + block.shape[1]] = block
+    return matrix
+
+
+def process_tsp(origin_coords, route, distance_matrix=None, timeout=10):
+    """
+    Process the Traveling Salesman Problem (TSP) for a given route.
+
+    Parameters:
+        origin_coords (list/tuple): The origin coordinates [lat, lon].
+        route (list): A list of coordinate pairs (each as [lat, lon]). The first and last element should be the origin.
+        distance_matrix (np.ndarray, optional): Distances between the origin and the waypoints of
+            the route, in that order. Fetched from OSRM when not given.
+        timeout (int, optional): Timeout for the HTTP request in seconds. Default is 10 seconds.
+
+    Returns:
+        tuple: A tuple containing:
+            - ordered_route (list): The optimized route as a list of [lat, lon] (ending at the origin).
+            - shortest_distance (float): The total distance of the optimized route.
+            - solver_info (dict): Which solver ran and its optimality gap, if known.
+
+    Raises:
+        ValueError: If the origin coordinates or locations are invalid.
+        RuntimeError: If fetching the distance matrix or TSP computation fails.
+    """
+    # Convert origin coordinates to floats
+    try:
+        origin = [float(origin_coords[0]), float(origin_coords[1])]
+    except (TypeError, ValueError) as e:
+        logger.error("Invalid origin coordinates: %s", origin_coords)
+        raise ValueError("Invalid origin coordinates") from e
+
+    # Ensure there are waypoints (exclude starting and ending origin if applicable)
+    waypoints = route[1:-1] if len(route) >= 2 else []
+    # Combine origin and waypoints into a single list for distance calculations
+    locations = [origin] + waypoints
+
+    if distance_matrix is None:
+        distance_matrix = fetch_distance_matrix(locations, timeout=timeout)
+    elif len(distance_matrix) != len(locations):
+        raise ValueError("Distance matrix does not match the route locations")
+
+    # Compute the optimal route, exactly for small clusters and heuristically for large ones
     try:
-        shortest_distance, optimal_route_indices = dynamic_programming.dp(distance_matrix=distance_matrix)
+        shortest_distance, optimal_route_indices, solver_info = solve_tsp(distance_matrix)
     except Exception as e:
         logger.error("Error computing TSP: %s", e)
         raise RuntimeError("Failed to compute TSP") from e
@@ -80,4 +278,4 @@ def process_tsp(origin_coords, route, timeout=10):
         raise RuntimeError("Invalid optimal route indices") from e
 
     # Append the origin at the end to complete the loop and return the results
-    return ordered_route + [origin], shortest_distance
+    return ordered_route + [origin], shortest_distance, solver_info
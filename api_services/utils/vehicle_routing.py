@@ -0,0 +1,267 @@
+import math
+import time
+import numpy as np
+from api_services.utils import local_search
+
+# Moves must improve the plan by more than this (in matrix units) to be applied
+_EPSILON = 1e-7
+
+
+def _closed(route):
+    return np.array([0] + route + [0])
+
+
+def savings(distance_matrix, n_vehicles, max_stops):
+    """
+    Build routes with the Clarke-Wright parallel savings algorithm.
+
+    Every customer starts on its own out-and-back route; routes are then joined
+    tail-to-head in order of decreasing saving d(i,0) + d(0,j) - d(i,j) until
+    only n_vehicles remain. Joins that would exceed max_stops are skipped, and
+    if that leaves too many routes the best remaining joins are forced.
+
+    Parameters:
+        distance_matrix (np.ndarray): An n x n matrix of travel distances, index 0 being the depot.
+        n_vehicles (int): Number of routes to produce.
+        max_stops (int): Preferred maximum number of customers per route.
+
+    Returns:
+        list: One list of customer indices per route, in visiting order.
+    """
+    dist = distance_matrix
+    n = len(dist)
+    routes = {i: [i] for i in range(1, n)}
+    route_of = np.arange(n)
+    if len(routes) <= n_vehicles:
+        return list(routes.values())
+
+    gain = dist[1:, 0][:, None] + dist[0, 1:][None, :] - dist[1:, 1:]
+    np.fill_diagonal(gain, -np.inf)
+    for flat in np.argsort(-gain, axis=None, kind='stable'):
+        if len(routes) <= n_vehicles:
+            break
+        i, j = divmod(int(flat), n - 1)
+        i, j = i + 1, j + 1
+        ri, rj = route_of[i], route_of[j]
+        if ri == rj or routes[ri][-1] != i or routes[rj][0] != j:
+            continue
+        if len(routes[ri]) + len(routes[rj]) > max_stops:
+            continue
+        routes[ri].extend(routes[rj])
+        route_of[routes[rj]] = ri
+        del routes[rj]
+
+    # Capacity blocked further joins: force the best remaining ones
+    while len(routes) > n_vehicles:
+        ids = list(routes)
+        tails = np.array([routes[r][-1] for r in ids])
+        heads = np.array([routes[r][0] for r in ids])
+        pair_gain = dist[tails, 0][:, None] + dist[0, heads][None, :] - dist[tails[:, None], heads[None, :]]
+        np.fill_diagonal(pair_gain, -np.inf)
+        a, b = np.unravel_index(int(pair_gain.argmax()), pair_gain.shape)
+        routes[ids[a]].extend(routes.pop(ids[b]))
+
+    return list(routes.values())
+
+
+def _rebalance(dist, routes, min_stops, max_stops):
+    """
+    Move customers from long routes to short ones until every route has between
+    min_stops and max_stops customers, each time making the move that
+    lengthens the plan least.
+    """
+    while True:
+        sizes = [len(route) for route in routes]
+        if min(sizes) < min_stops:
+            targets = [r for r, size in enumerate(sizes) if size < min_stops]
+            donors = [r for r, size in enumerate(sizes) if size > min_stops]
+        elif max(sizes) > max_stops:
+            targets = [r for r, size in enumerate(sizes) if size < max_stops]
+            donors = [r for r, size in enumerate(sizes) if size > max_stops]
+        else:
+            return
+
+        best_delta, best_move = np.inf, None
+        for a in donors:
+            closed_a = _closed(routes[a])
+            customers = closed_a[1:-1]
+            removal_gain = (dist[closed_a[:-2], customers] + dist[customers, closed_a[2:]]
+                            - dist[closed_a[:-2], closed_a[2:]])
+            for b in targets:
+                closed_b = _closed(routes[b])
+                # insertion[g, p]: cost of putting customer p of route a into gap g of route b
+                insertion = (dist[closed_b[:-1, None], customers[None, :]] + dist[customers[None, :], closed_b[1:, None]]
+                             - dist[closed_b[:-1], closed_b[1:]][:, None])
+                delta = insertion - removal_gain[None, :]
+                gap, pos = np.unravel_index(int(delta.argmin()), delta.shape)
+                if delta[gap, pos] < best_delta:
+                    best_delta, best_move = delta[gap, pos], (a, int(pos), b, int(gap))
+
+        a, pos, b, gap = best_move
+        routes[b].insert(gap, routes[a].pop(pos))
+
+
+def _relocate(dist, routes, min_stops, max_stops, deadline):
+    """Move single customers to the cheapest position in another route."""
+    improved = False
+    for a in range(len(routes)):
+        pos = 0
+        while pos < len(routes[a]) and time.monotonic() < deadline:
+            if len(routes[a]) <= min_stops:
+                break
+            closed_a = _closed(routes[a])
+            customer = closed_a[pos + 1]
+            prev_city, next_city = closed_a[pos], closed_a[pos + 2]
+            removal_gain = dist[prev_city, customer] + dist[customer, next_city] - dist[prev_city, next_city]
+            best_delta, best_route, best_gap = -_EPSILON, None, None
+            for b in range(len(routes)):
+                if b == a or len(routes[b]) >= max_stops:
+                    continue
+                closed_b = _closed(routes[b])
+                insertion = (dist[closed_b[:-1], customer] + dist[customer, closed_b[1:]]
+                             - dist[closed_b[:-1], closed_b[1:]])
+                gap = int(insertion.argmin())
+                if insertion[gap] - removal_gain < best_delta:
+                    best_delta, best_route, best_gap = insertion[gap] - removal_gain, b, gap
+            if best_route is None:
+                pos += 1
+                continue
+            del routes[a][pos]
+            routes[best_route].insert(best_gap, int(customer))
+            improved = True
+    return improved
+
+
+def _exchange(dist, routes, deadline):
+    """Swap pairs of customers between two routes."""
+    improved = False
+    for a in range(len(routes)):
+        for pos in range(len(routes[a])):
+            if time.monotonic() >= deadline:
+                return improved
+            closed_a = _closed(routes[a])
+            customer = closed_a[pos + 1]
+            prev_a, next_a = closed_a[pos], closed_a[pos + 2]
+            leave_a = dist[prev_a, customer] + dist[customer, next_a]
+            for b in range(a + 1, len(routes)):
+                closed_b = _closed(routes[b])
+                others = closed_b[1:-1]
+                prev_b, next_b = closed_b[:-2], closed_b[2:]
+                delta = (
+                    dist[prev_a, others] + dist[others, next_a] - leave_a
+                    + dist[prev_b, customer] + dist[customer, next_b]
+                    - dist[prev_b, others] - dist[others, next_b]
+                )
+                q = int(delta.argmin())
+                if delta[q] < -_EPSILON:
+                    routes[a][pos], routes[b][q] = int(others[q]), int(customer)
+                    improved = True
+                    break
+    return improved
+
+
+def _two_opt_star(dist, routes, min_stops, max_stops, deadline):
+    """Exchange the tails of two routes (2-opt*), keeping both within min_stops and max_stops."""
+    improved = False
+    for a in range(len(routes)):
+        for b in range(a + 1, len(routes)):
+            if time.monotonic() >= deadline:
+                return improved
+            closed_a, closed_b = _closed(routes[a]), _closed(routes[b])
+            len_a, len_b = len(routes[a]), len(routes[b])
+            # Cutting after i stops of A and j stops of B joins A[:i] + B[j:] and B[:j] + A[i:]
+            i = np.arange(len_a + 1)[:, None]
+            j = np.arange(len_b + 1)[None, :]
+            delta = (
+                dist[closed_a[i], closed_b[j + 1]] + dist[closed_b[j], closed_a[i + 1]]
+                - dist[closed_a[i], closed_a[i + 1]] - dist[closed_b[j], closed_b[j + 1]]
+            )
+            size_a, size_b = i + (len_b - j), j + (len_a - i)
+            delta[(size_a > max_stops) | (size_b > max_stops) | (size_a < min_stops) | (size_b < min_stops)] = np.inf
+            cut_a, cut_b = np.unravel_index(int(delta.argmin()), delta.shape)
+            if delta[cut_a, cut_b] < -_EPSILON:
+                tail_a, tail_b = routes[a][cut_a:], routes[b][cut_b:]
+                routes[a] = routes[a][:cut_a] + tail_b
+                routes[b] = routes[b][:cut_b] + tail_a
+                improved = True
+    return improved
+
+
+def insert_cheapest(distance_matrix, routes, customers):
+    """
+    Add customers to existing routes one at a time, each at the position
+    (over all routes) where it lengthens the plan least.
+
+    Parameters:
+        distance_matrix (np.ndarray): An n x n matrix of travel distances, index 0 being the depot.
+        routes (list): One list of customer indices per route, in visiting order. Modified in place.
+        customers (list): Indices of the customers to insert.
+
+    Returns:
+        set: Indices (into routes) of the routes that received a customer.
+    """
+    dist = np.asarray(distance_matrix, dtype=np.float64)
+    touched = set()
+    for customer in customers:
+        best_cost, best_route, best_gap = np.inf, None, None
+        for r, route in enumerate(routes):
+            closed = _closed(route)
+            insertion = dist[closed[:-1], customer] + dist[customer, closed[1:]] - dist[closed[:-1], closed[1:]]
+            gap = int(insertion.argmin())
+            if insertion[gap] < best_cost:
+                best_cost, best_route, best_gap = insertion[gap], r, gap
+        routes[best_route].insert(best_gap, int(customer))
+        touched.add(best_route)
+    return touched
+
+
+def solve(distance_matrix, n_vehicles, time_limit=5.0, max_stops=None, slack=0.25, min_stops=None):
+    """
+    Solve the vehicle routing problem: savings construction, rebalancing of
+    route sizes, then inter-route relocate, exchange and 2-opt* moves and
+    intra-route 2-opt/Or-opt within a time budget.
+
+    Parameters:
+        distance_matrix (list): An n x n matrix of travel distances, index 0 being the depot.
+        n_vehicles (int): Number of routes (riders).
+        time_limit (float, optional): Wall-clock budget in seconds. Default is 5 seconds.
+        max_stops (int, optional): Most customers on one route.
+            Defaults to the even share of customers plus 'slack'.
+        slack (float, optional): Fraction of the even share a route may be above or below it. Default is 0.25.
+        min_stops (int, optional): Fewest customers on one route.
+            Defaults to the even share of customers minus 'slack', and at least 1.
+
+    Returns:
+        list: One (cost, sequence) tuple per route, each sequence starting at index 0
+            in the same format as dynamic_programming.dp.
+
+    Raises:
+        ValueError: If there are fewer customers than vehicles, or the route size limits cannot all be met.
+    """
+    deadline = time.monotonic() + time_limit
+    dist = np.asarray(distance_matrix, dtype=np.float64)
+    customers = len(dist) - 1
+    if n_vehicles < 1 or customers < n_vehicles:
+        raise ValueError("Number of riders cannot exceed number of customers.")
+    if max_stops is None:
+        max_stops = math.ceil(customers / n_vehicles * (1 + slack))
+    if min_stops is None:
+        min_stops = max(1, math.floor(customers / n_vehicles * (1 - slack)))
+    if min_stops * n_vehicles > customers or max_stops * n_vehicles < customers or min_stops > max_stops:
+        raise ValueError("Route size limits cannot be met with this number of riders.")
+
+    routes = savings(dist, n_vehicles, max_stops)
+    # Savings stops joining once n_vehicles routes remain, which can leave a few
+    # near-empty routes next to full ones; forced joins can overfill
+    _rebalance(dist, routes, min_stops, max_stops)
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = _relocate(dist, routes, min_stops, max_stops, deadline)
+        improved = _exchange(dist, routes, deadline) or improved
+        improved = _two_opt_star(dist, routes, min_stops, max_stops, deadline) or improved
+        for r, route in enumerate(routes):
+            sequence, _ = local_search.two_opt(dist, [0] + route, deadline)
+            sequence, _ = local_search.or_opt(dist, sequence, deadline)
+            routes[r] = sequence[1:]
+
+    return [(local_search.route_cost(dist, [0] + route), [0] + route) for route in routes]
@@ -3,4 +3,6 @@ from .orders_data_view import OrdersDataView
 from .customers_data_view import CustomersDataView
 from .origin_data_view import OriginDataView
 from .rider_history_data_view import RiderHistoryDataView
-from .route_planner_view import RoutePlannerView
\ No newline at end of file
+from .route_planner_view import RoutePlannerView, FleetSweepView
+from .route_plan_job_view import RoutePlanJobView, RoutePlanJobDetailView
+from .geocode_cache_view import GeocodeCacheStatsView
\ No newline at end of file
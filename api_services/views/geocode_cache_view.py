@@ -0,0 +1,15 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+
+from ..services.geocode_cache import geocode_cache_stats
+
+class GeocodeCacheStatsView(APIView):
+    """
+    API view reporting how often this worker's geocoding cache avoided a Google API call.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(geocode_cache_stats(), status=status.HTTP_200_OK)
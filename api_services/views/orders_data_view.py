@@ -1,9 +1,12 @@
+import os
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from ..models import OrdersData
 from ..serializers import OrdersDataSerializer
 from rest_framework.response import Response
 from ..services.create_customer import get_or_create_customer
+from ..services.order_import import import_orders, parse_csv
 
 class OrdersDataView(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
@@ -29,3 +32,33 @@ class OrdersDataView(viewsets.ModelViewSet):
             order_serializer.save()
             return Response(order_serializer.data, status=status.HTTP_201_CREATED)
         return Response(order_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_orders(self, request):
+        """
+        Create many orders from a JSON array, a CSV body (Content-Type: text/csv)
+        or a CSV file uploaded as "file", and report the outcome of each row.
+        """
+        try:
+            if request.content_type.startswith('text/csv'):
+                rows = parse_csv(request.body.decode('utf-8-sig'))
+            elif 'file' in request.FILES:
+                rows = parse_csv(request.FILES['file'].read().decode('utf-8-sig'))
+            else:
+                rows = request.data
+        except UnicodeDecodeError:
+            return Response({"error": "CSV must be UTF-8 encoded."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(rows, list) or not rows:
+            return Response({"error": "Expected a non-empty JSON array or CSV file of orders."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        max_rows = int(os.getenv('ORDER_IMPORT_MAX_ROWS', 5000))
+        if len(rows) > max_rows:
+            return Response({"error": f"At most {max_rows} orders can be imported at once."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        reports = import_orders(rows)
+        created = sum(report["status"] == "created" for report in reports)
+        return Response(
+            {"created": created, "invalid": len(reports) - created, "rows": reports},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
@@ -0,0 +1,84 @@
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+
+from ..models import RoutePlanJob
+from ..serializers.route_planner_serializer import RoutePlannerSerializer
+from ..services.route_plan_jobs import cancel_job, get_job, submit_plan
+
+
+def _job_payload(request, job):
+    payload = {
+        "job_id": str(job.pk),
+        "status": job.status,
+        "status_url": request.build_absolute_uri(reverse('route-plan-job-detail', args=[job.pk])),
+    }
+    if job.status == RoutePlanJob.DONE:
+        payload["result"] = job.result_json
+    elif job.status in (RoutePlanJob.FAILED, RoutePlanJob.CANCELLED):
+        payload["error"] = job.error
+    return payload
+
+
+class RoutePlanJobView(APIView):
+    """
+    API view for planning delivery routes in the background.
+
+    Accepts the same body as the route planner and returns 202 with a job id
+    to poll, or 200 with the plan if it is already cached. Requests identical
+    to a plan still being computed join that job.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = RoutePlannerSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rider_names = serializer.validated_data.get("rider_names", [])
+        if len(rider_names) != serializer.validated_data.get("num_riders"):
+            return Response({"error": "The number of rider names must match num_riders."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        job, _ = submit_plan(
+            serializer.validated_data.get("num_riders"),
+            serializer.validated_data.get("delivery_date").strftime("%Y-%m-%d"),
+            rider_names,
+            routing_engine=serializer.validated_data.get("routing_engine"),
+            clustering_method=serializer.validated_data.get("clustering_method"),
+            balance_clusters=serializer.validated_data.get("balance_clusters"),
+            force_full=serializer.validated_data.get("force_full_replan"),
+        )
+        code = status.HTTP_200_OK if job.status == RoutePlanJob.DONE else status.HTTP_202_ACCEPTED
+        return Response(_job_payload(request, job), status=code)
+
+
+class RoutePlanJobDetailView(APIView):
+    """
+    API view for polling a background route plan.
+
+    Returns the job status, with the plan once it is done. A failed job
+    answers with the status code the synchronous planner would have used.
+    DELETE cancels a job that has not finished yet.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_job(job_id)
+        if job is None:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+        if job.status == RoutePlanJob.FAILED:
+            return Response(_job_payload(request, job), status=job.error_status or status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(_job_payload(request, job), status=status.HTTP_200_OK)
+
+    def delete(self, request, job_id):
+        job = cancel_job(job_id)
+        if job is None:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+        if job.status != RoutePlanJob.CANCELLED:
+            return Response({"error": "Job has already finished.", **_job_payload(request, job)},
+                            status=status.HTTP_409_CONFLICT)
+        return Response(_job_payload(request, job), status=status.HTTP_200_OK)
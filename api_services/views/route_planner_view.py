@@ -1,22 +1,58 @@
+import gzip
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework.views import APIView 
 from rest_framework.response import Response 
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 
-from ..serializers.route_planner_serializer import RoutePlannerSerializer
-from ..services.route_planner_service import plan_routes
+from ..serializers.route_planner_serializer import FleetSweepSerializer, RoutePlannerSerializer
+from ..services.route_plan_cache import get_rendered_plan, render_plan
+from ..services.route_planner_service import plan_cache_key, plan_routes, sweep_fleet_sizes
+
+
+def _plan_response(request, rendered):
+    """
+    Serve a pre-rendered plan as-is: gzip-compressed when the client accepts
+    it, with its ETag, and as 304 Not Modified when the client's copy matches.
+
+    The compressed and uncompressed bodies are different representations, so
+    the compressed one's ETag carries a "-gzip" suffix.
+    """
+    compressed = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    etag = f'"{rendered.etag}-gzip"' if compressed else f'"{rendered.etag}"'
+    if request.method == 'GET' and etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    elif compressed:
+        response = HttpResponse(rendered.body, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(rendered.body), content_type='application/json')
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
 
 class RoutePlannerView(APIView):
     """
     API view for planning delivery routes.
     
-    Expects a POST request with 'num_riders', 'delivery_date', and 'rider_names'.
-    Returns delivery details, customer coordinates, clustering results, and assigned routes.
+    Expects a POST request with 'num_riders', 'delivery_date', and 'rider_names'
+    (or a GET request with the same query parameters, which also answers 304
+    when If-None-Match carries the plan's ETag).
+    Returns delivery details, customer coordinates, clustering results, and assigned routes,
+    or with 'response_format': 'compact' one coordinate table referenced by index and route polylines.
     """
     permission_classes = [IsAuthenticated]
 
+    def get(self, request):
+        return self._plan(request, request.query_params)
+
     def post(self, request):
-        serializer = RoutePlannerSerializer(data=request.data)
+        return self._plan(request, request.data)
+
+    def _plan(self, request, data):
+        serializer = RoutePlannerSerializer(data=data)
         
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -25,13 +61,70 @@ class RoutePlannerView(APIView):
         # Format delivery_date to YYYY-MM-DD string
         delivery_date = serializer.validated_data.get("delivery_date").strftime("%Y-%m-%d")
         rider_names = serializer.validated_data.get("rider_names", [])
+        routing_engine = serializer.validated_data.get("routing_engine")
+        clustering_method = serializer.validated_data.get("clustering_method")
+        balance_clusters = serializer.validated_data.get("balance_clusters")
+        force_full = serializer.validated_data.get("force_full_replan")
+        compact = serializer.validated_data.get("response_format") == "compact"
+        if len(rider_names) != num_riders:
+            return Response({"error": "The number of rider names must match num_riders."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            result = plan_routes(num_riders, delivery_date, rider_names)
+            # Cache hits are served from the stored bytes without re-rendering
+            cache_key = plan_cache_key(delivery_date, rider_names, routing_engine, clustering_method, balance_clusters)
+            rendered = None if force_full else get_rendered_plan(delivery_date, cache_key, compact)
+            if rendered is None:
+                result = plan_routes(
+                    num_riders, delivery_date, rider_names,
+                    routing_engine=routing_engine, clustering_method=clustering_method,
+                    balance_clusters=balance_clusters, force_full=force_full,
+                )
+                # Plans with approximate distances are not cached, so render those here
+                rendered = get_rendered_plan(delivery_date, cache_key, compact) or render_plan(result, compact)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except TimeoutError as e:
+            return Response({"error": str(e)}, status=status.HTTP_504_GATEWAY_TIMEOUT)
         except Exception as e:
             # Log unexpected errors here if needed
             return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+        return _plan_response(request, rendered)
+
+
+class FleetSweepView(APIView):
+    """
+    API view for comparing fleet sizes.
+
+    Expects a POST request with 'delivery_date', 'rider_names', 'min_riders' and 'max_riders'.
+    Returns a distance comparison for every rider count in the range and the
+    full plan for the chosen one.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = FleetSweepSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            result = sweep_fleet_sizes(
+                data["delivery_date"].strftime("%Y-%m-%d"),
+                data["rider_names"],
+                range(data["min_riders"], data["max_riders"] + 1),
+                routing_engine=data["routing_engine"],
+                clustering_method=data["clustering_method"],
+                balance_clusters=data["balance_clusters"],
+                chosen_num_riders=data.get("chosen_num_riders"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except TimeoutError as e:
+            return Response({"error": str(e)}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+        except Exception:
+            return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
         return Response(result, status=status.HTTP_200_OK)
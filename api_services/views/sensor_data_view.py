@@ -1,10 +1,59 @@
+import os
+from django.db import transaction
 from rest_framework.permissions import IsAuthenticated
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from ..models import SensorData 
-from ..serializers import SensorDataSerializer
+from ..serializers import SensorDataSerializer, SensorSeriesSerializer
+from ..services.sensor_ingest import ingest_readings, parse_ndjson
+from ..services.sensor_rollups import sensor_series
 
 class DeviceSensorDataView(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = SensorData.objects.all()
     serializer_class = SensorDataSerializer
 
+    def perform_create(self, serializer):
+        # Commit the reading and its rollup upserts together, with one sync to disk
+        with transaction.atomic():
+            serializer.save()
+
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """
+        Store many readings in one request, sent as a JSON array or as
+        NDJSON (Content-Type: application/x-ndjson, one reading per line).
+        """
+        if request.content_type.startswith(('application/x-ndjson', 'application/ndjson')):
+            try:
+                readings = parse_ndjson(request.body.decode('utf-8'))
+            except UnicodeDecodeError:
+                return Response({"error": "NDJSON must be UTF-8 encoded."}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            readings = request.data
+        if not isinstance(readings, list) or not readings:
+            return Response({"error": "Expected a non-empty JSON array or NDJSON body of readings."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        max_items = int(os.getenv('SENSOR_INGEST_MAX_ITEMS', 10000))
+        if len(readings) > max_items:
+            return Response({"error": f"At most {max_items} readings can be sent at once."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        accepted, rejects = ingest_readings(readings)
+        return Response(
+            {"accepted": accepted, "rejected": len(rejects), "rejects": rejects},
+            status=status.HTTP_201_CREATED if accepted else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, methods=['get'], url_path='series')
+    def series(self, request):
+        """
+        Chart data for one box: min/max/mean temperature and humidity over
+        [start, end), downsampled to at most max_points points.
+        """
+        serializer = SensorSeriesSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        return Response(sensor_series(data['box_id'], data['start'], data['end'], data['max_points']))
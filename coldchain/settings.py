@@ -86,6 +86,19 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Planning jobs, the warmer and the geocoding queue write from background
+        # threads; wait up to 20 seconds for SQLite's write lock rather than 5.
+        # Transactions that read before writing take the lock up front through
+        # api_services.utils.transactions.write_transaction.
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        # In-memory test databases share one cache across threads and fail at
+        # once on a locked table instead of waiting, so tests that run planning
+        # jobs in worker threads use a file like production does
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 